@@ -1,5 +1,6 @@
 import streamlit as st
 from datetime import date
+from stsp.assets import show_image
 
 st.set_page_config(layout="wide", page_title="南科學發展與周遭環境變遷Streamlit App！")
 
@@ -25,13 +26,14 @@ st.markdown(
     1. 由下圖了解南科興建發展史📒 <br>
     2. 以左右分科圖對比1994和2024年的衛星影像🗺️ <br>
     3. 以自訂年份方式查閱各年南科周遭的土地監督式分類的模樣🔎 <br>
-    4. 2014的都市熱島效應☀️ <br>
-    5. 2024的都市熱島效應☀️ <br>
-    6. 失敗紀錄：原先要匯入的台灣堡圖❌ <br>
+    4. 自選年份比較南科周遭的都市熱島效應☀️ <br>
+    5. 1984 年至今南科周遭的 NDVI 與地表溫度時間序列📈 <br>
+    6. 上傳或繪製任意範圍 (例如整個台南市)，計算 NDVI 與地表溫度統計🧭 <br>
+    7. 失敗紀錄：原先要匯入的台灣堡圖❌ <br>
     </p>
     """,
     unsafe_allow_html=True
 )
 
 st.markdown("### 南科發展史📒")
-st.image("南科史2.jpg")
+show_image("南科史2.jpg", width=960)
@@ -0,0 +1 @@
+# 效能量測工具：以假的 Earth Engine 後端無頭執行每個頁面。
@@ -0,0 +1,333 @@
+import hashlib
+import json
+import sys
+import threading
+import time
+import types
+
+# --- 假的 Earth Engine 後端 ---
+# 以同名模組取代 ee / geemap，所有運算圖只在本機記錄，不連線也不需要憑證。
+# 會阻塞的呼叫 (getInfo / getMapId / getThumbURL / getDownloadURL) 會計數，
+# 並依設定睡眠一段時間，模擬 Earth Engine 的往返延遲；回傳值依運算圖的形狀產生。
+
+BLOCKING_CALLS = ("getInfo", "getMapId", "getThumbURL", "getDownloadURL")
+
+
+class FakeBackend:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = {name: 0 for name in BLOCKING_CALLS}
+        self._lock = threading.Lock()
+
+    def call(self, name, respond):
+        with self._lock:
+            self.calls[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return respond()
+
+    def snapshot(self, reset=False):
+        with self._lock:
+            calls = dict(self.calls)
+            if reset:
+                self.calls = {name: 0 for name in BLOCKING_CALLS}
+        return calls
+
+
+BACKEND = FakeBackend()
+
+
+class EEException(Exception):
+    pass
+
+
+class Node:
+    def __init__(self, op, args=(), kwargs=None, parent=None):
+        self.op = op
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.parent = parent
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: Node(name, args, kwargs, self)
+
+    def tree(self):
+        return [
+            self.op,
+            [_tree(a) for a in self.args],
+            {k: _tree(v) for k, v in sorted(self.kwargs.items())},
+            self.parent.tree() if self.parent is not None else None,
+        ]
+
+    def serialize(self, for_cloud_api=True):
+        return json.dumps(self.tree(), sort_keys=True, default=str)
+
+    # 與真正的 ee 物件一樣，字串表示由運算圖決定，而不是記憶體位址
+    def __repr__(self):
+        return self.serialize()
+
+    # --- 會阻塞的呼叫 ---
+    def getInfo(self):
+        return BACKEND.call("getInfo", lambda: respond(self))
+
+    def getMapId(self, vis_params=None):
+        def respond_map():
+            mapid = hashlib.sha1(self.serialize().encode()).hexdigest()[:12]
+            url = f"https://fake-ee.invalid/map/{mapid}/{{z}}/{{x}}/{{y}}"
+            return {"mapid": mapid, "token": "", "tile_fetcher": types.SimpleNamespace(url_format=url)}
+        return BACKEND.call("getMapId", respond_map)
+
+    def getThumbURL(self, params=None):
+        key = hashlib.sha1(self.serialize().encode()).hexdigest()[:12]
+        return BACKEND.call("getThumbURL", lambda: f"https://fake-ee.invalid/thumb/{key}.png")
+
+    getThumbUrl = getThumbURL
+
+    def getDownloadURL(self, params=None):
+        key = hashlib.sha1(self.serialize().encode()).hexdigest()[:12]
+        return BACKEND.call("getDownloadURL", lambda: f"https://fake-ee.invalid/download/{key}")
+
+
+def _tree(value):
+    if isinstance(value, Node):
+        return value.tree()
+    if isinstance(value, (list, tuple)):
+        return [_tree(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _tree(v) for k, v in sorted(value.items())}
+    if isinstance(value, types.FunctionType):
+        # ee.List.map / ImageCollection.map 的函數：以名稱代替，每次重建的閉包序列化結果相同
+        return f"<function {value.__qualname__}>"
+    return value
+
+
+class Factory:
+    # ee.Image / ee.Reducer.minMax / ee.Geometry.Rectangle ... 都是可呼叫、可取屬性的工廠
+    def __init__(self, name):
+        self.name = name
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return Factory(f"{self.name}.{name}")
+
+    def __call__(self, *args, **kwargs):
+        return Node(self.name, args, kwargs)
+
+
+# --- 依運算圖形狀產生回應 ---
+def band_names(node):
+    while node is not None:
+        if node.op == "rename":
+            names = node.args[0] if node.args else node.kwargs.get("names")
+            return [names] if isinstance(names, str) else list(names)
+        if node.op in ("Image.cat", "cat"):
+            items = node.args[0] if len(node.args) == 1 and isinstance(node.args[0], (list, tuple)) else node.args
+            return [b for item in items for b in band_names(item)]
+        if node.op == "select" and len(node.args) > 1:
+            return list(node.args[1])
+        if node.op == "normalizedDifference":
+            return ["nd"]
+        node = node.parent
+    return ["b1"]
+
+
+def reducer_ops(node):
+    ops = set()
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if not isinstance(current, Node):
+            continue
+        ops.add(current.op.split(".")[-1])
+        stack.append(current.parent)
+        stack.extend(current.args)
+        stack.extend(current.kwargs.values())
+    return ops
+
+
+def band_stats(band):
+    if "LST" in band:
+        return {"mean": 31.5, "min": 22.0, "max": 41.0, "p90": 37.5, "p50": 31.0, "stdDev": 3.2}
+    return {"mean": 0.35, "min": -0.12, "max": 0.78, "p90": 0.62, "p50": 0.33, "stdDev": 0.18}
+
+
+def reduce_region(node):
+    image = node.parent
+    reducer = node.kwargs.get("reducer", node.args[0] if node.args else None)
+    ops = reducer_ops(reducer)
+    if "group" in ops:
+        # stsp.uhi：LST 依土地覆蓋類別分組，各類別的平均溫度略有不同
+        groups = []
+        for cls in (0, 3, 4, 6):
+            stats = {k.split("_", 1)[1]: v for k, v in reduce_region_bands(["LST"], reducer, ops).items()}
+            if "sum" in stats:
+                stats["sum"] += (cls - 3) * stats.get("count", 0)
+            groups.append({"class": cls, **stats})
+        return {"groups": groups}
+    return reduce_region_bands(band_names(image), reducer, ops)
+
+
+def reduce_region_bands(bands, reducer, ops):
+    result = {}
+    for band in bands:
+        if "frequencyHistogram" in ops:
+            result[band] = {"0": 120.0, "3": 340.0, "4": 510.0, "6": 45.0}
+            continue
+        stats = band_stats(band)
+        for op in ("mean", "min", "max", "stdDev"):
+            if op in ops or (op in ("min", "max") and "minMax" in ops):
+                result[f"{band}_{op}"] = stats[op]
+        if "percentile" in ops:
+            result[f"{band}_p50"] = stats["p50"]
+            result[f"{band}_p90"] = stats["p90"]
+        # stsp.aoi 的可合併部分結果
+        if "count" in ops:
+            result[f"{band}_count"] = 1000
+        if "sum" in ops:
+            result[f"{band}_sum"] = stats["mean"] * 1000
+        histogram = find_node(reducer, "Reducer.fixedHistogram")
+        if histogram is not None:
+            low, high, bins = histogram.args
+            width = (high - low) / bins
+            result[f"{band}_histogram"] = [
+                [low + i * width, 1000.0 if low + i * width <= stats["p50"] < low + (i + 1) * width else 0.0]
+                for i in range(bins)
+            ]
+    return result
+
+
+def find_node(node, op):
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if not isinstance(current, Node):
+            continue
+        if current.op == op:
+            return current
+        stack.append(current.parent)
+        stack.extend(current.args)
+        stack.extend(current.kwargs.values())
+    return None
+
+
+def reduce_regions(node, columns):
+    collection = node.kwargs.get("collection", node.args[0] if node.args else None)
+    features = collection.args[0] if collection is not None and collection.args else []
+    rows = []
+    for i, feature in enumerate(features):
+        props = dict(feature.args[1]) if len(feature.args) > 1 else {}
+        for column in columns:
+            if column in props:
+                continue
+            band, _, stat = column.rpartition("_")
+            # 讓各區的值有些差異，熱點分析才有意義
+            props[column] = band_stats(band).get(stat, 0.0) * (1 + 0.05 * ((i * 7) % 5 - 2))
+        rows.append({"type": "Feature", "geometry": None, "properties": props})
+    return {"type": "FeatureCollection", "features": rows}
+
+
+def respond(node):
+    op = node.op
+    if op == "Dictionary.fromLists":
+        return {k: 12 for k in node.args[0]}
+    if op == "reduceRegion":
+        return reduce_region(node)
+    if op == "combine" and node.parent is not None and not node.parent.op.startswith("Reducer"):
+        merged = dict(respond(node.parent) or {})
+        merged.update(respond(node.args[0]) or {})
+        return merged
+    if op == "select" and node.parent is not None and node.parent.op == "reduceRegions":
+        return reduce_regions(node.parent, node.args[0])
+    if op == "stratifiedSample":
+        bands = ["blue", "green", "red", "nir", "swir1", "swir2"]
+        return {"type": "FeatureCollection", "features": [
+            {"type": "Feature", "geometry": None,
+             "properties": {**{b: 0.05 + 0.01 * (i % 7) for b in bands}, "class": i % 9}}
+            for i in range(90)
+        ]}
+    if op == "get" and node.parent is not None and node.parent.op == "reduceColumns":
+        # stsp.timeseries 的 [month, NDVI, LST, images]
+        # 7 月整個 AOI 被雲遮住：有影像但平均值為 NO_DATA
+        return [
+            [f"2024-{m:02d}", -9999, -9999, 2] if m == 7 else [f"2024-{m:02d}", 0.25 + 0.02 * (m % 6), 28.0 + m % 7, 2]
+            for m in range(1, 13)
+        ]
+    if op == "aggregate_array":
+        return [f"LC08_118044_2024{m:02d}15" for m in range(1, 13)]
+    if op == "size":
+        return 12
+    return {}
+
+
+# --- 假的 geemap ---
+def make_geemap():
+    import folium
+    from folium import plugins
+
+    class Map(folium.Map):
+        def __init__(self, center=(23.0865, 120.3138), zoom=12, **kwargs):
+            super().__init__(location=list(center), zoom_start=zoom)
+
+        def addLayer(self, ee_object, vis_params=None, name=None, shown=True, opacity=1.0):
+            ee_tile_layer(ee_object, vis_params, name, shown, opacity).add_to(self)
+
+        add_layer = addLayer
+
+        def centerObject(self, ee_object, zoom=None):
+            pass
+
+        def add_tile_layer(self, url, name, attribution, **kwargs):
+            folium.TileLayer(tiles=url, name=name, attr=attribution, overlay=True).add_to(self)
+
+        def add_layer_control(self):
+            folium.LayerControl().add_to(self)
+
+        def split_map(self, left_layer, right_layer, **kwargs):
+            left_layer.add_to(self)
+            right_layer.add_to(self)
+            plugins.SideBySideLayers(left_layer, right_layer).add_to(self)
+
+        def to_html(self, **kwargs):
+            return self.get_root().render()
+
+        def to_streamlit(self, height=600, **kwargs):
+            import streamlit.components.v1 as components
+            components.html(self.to_html(), height=height)
+
+    def ee_tile_layer(ee_object, vis_params=None, name="Layer", shown=True, opacity=1.0):
+        url = ee_object.getMapId(vis_params)["tile_fetcher"].url_format
+        return folium.TileLayer(tiles=url, attr="fake ee", name=name, overlay=True,
+                                show=shown, opacity=opacity)
+
+    foliumap = types.ModuleType("geemap.foliumap")
+    foliumap.Map = Map
+    foliumap.ee_tile_layer = ee_tile_layer
+    geemap = types.ModuleType("geemap")
+    geemap.foliumap = foliumap
+    geemap.Map = Map
+    geemap.ee_tile_layer = ee_tile_layer
+    return geemap, foliumap
+
+
+def module_getattr(name):
+    # inspect.getmodule 等會查詢 __file__ / __spec__ 之類的屬性，不能回傳工廠
+    if name.startswith("__") and name.endswith("__"):
+        raise AttributeError(name)
+    return Factory(name)
+
+
+def install(latency=0.0):
+    BACKEND.latency = latency
+    ee = types.ModuleType("ee")
+    ee.EEException = EEException
+    ee.Initialize = lambda *args, **kwargs: None
+    ee.Authenticate = lambda *args, **kwargs: None
+    ee.__getattr__ = module_getattr
+    sys.modules["ee"] = ee
+    geemap, foliumap = make_geemap()
+    sys.modules["geemap"] = geemap
+    sys.modules["geemap.foliumap"] = foliumap
+    return BACKEND
@@ -0,0 +1,235 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# --- 頁面效能量測 ---
+# 以 streamlit.testing 的 AppTest 無頭執行 app.py 與 pages/ 下每個頁面，
+# Earth Engine 換成 bench.fake_ee (可設定每次往返的延遲)。每個頁面在獨立行程中執行，
+# 使用全新的快取資料夾，量測：
+#   - 冷啟動第一次執行與緊接著的 rerun 延遲
+#   - getInfo / getMapId / getThumbURL / getDownloadURL 的阻塞呼叫次數
+#   - 輸出的 HTML (地圖 iframe、unsafe HTML) 與圖片 bytes
+#   - 尖峰記憶體 (tracemalloc)
+#
+#   python -m bench.run --latency 0.2                  結果寫入 bench/results/<commit>.json
+#   python -m bench.run --compare bench/results/baseline.json   與先前結果比較，往返次數增加時回傳 1
+#   python -m bench.run --check                        有頁面失敗或沒有任何往返時回傳 1
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = ROOT / "bench" / "results"
+# 冷啟動時本來就不呼叫 Earth Engine 的頁面 (純文字、預先產生的圖片，或要按下按鈕才開始計算)；
+# 其他頁面若量到 0 次往返，表示頁面在呼叫 Earth Engine 之前就失敗了，量測結果沒有意義
+STATIC_PAGES = {
+    "app.py",
+    "南科 Timelapse 比較展示.py",
+    "南科 Timelapse 產生器🎞️.py",
+    "失敗的台灣堡圖.py",
+}
+
+
+def page_paths():
+    return [ROOT / "app.py", *sorted((ROOT / "pages").glob("*.py"))]
+
+
+class OutputMeter:
+    # 包裝 Streamlit 的輸出函數，累計送到瀏覽器的 HTML 與圖片大小
+    def __init__(self):
+        self.html_bytes = 0
+        self.image_bytes = 0
+        self.images = 0
+        self.iframes = 0
+        self._patched = []
+
+    def _patch(self, owner, name, wrapper):
+        original = getattr(owner, name)
+        self._patched.append((owner, name, original))
+        setattr(owner, name, wrapper(original))
+
+    def __enter__(self):
+        import streamlit as st
+        import streamlit.components.v1 as components
+
+        def html(original):
+            def wrapped(body, *args, **kwargs):
+                self.iframes += 1
+                self.html_bytes += len(body.encode("utf-8"))
+                return original(body, *args, **kwargs)
+            return wrapped
+
+        def iframe(original):
+            # 地圖以 HTML 字串嵌入；網址或檔案路徑只計次數
+            def wrapped(src, *args, **kwargs):
+                self.iframes += 1
+                if isinstance(src, str) and not src.startswith(("http://", "https://", "data:", "/")):
+                    self.html_bytes += len(src.encode("utf-8"))
+                return original(src, *args, **kwargs)
+            return wrapped
+
+        def markdown(original):
+            def wrapped(body, *args, **kwargs):
+                if kwargs.get("unsafe_allow_html"):
+                    self.html_bytes += len(str(body).encode("utf-8"))
+                return original(body, *args, **kwargs)
+            return wrapped
+
+        def image(original):
+            def wrapped(image, *args, **kwargs):
+                self.images += 1
+                if isinstance(image, bytes):
+                    self.image_bytes += len(image)
+                elif isinstance(image, (str, Path)) and Path(image).is_file():
+                    self.image_bytes += Path(image).stat().st_size
+                return original(image, *args, **kwargs)
+            return wrapped
+
+        self._patch(components, "html", html)
+        self._patch(st, "iframe", iframe)
+        self._patch(st, "markdown", markdown)
+        self._patch(st, "image", image)
+        return self
+
+    def __exit__(self, *exc):
+        for owner, name, original in reversed(self._patched):
+            setattr(owner, name, original)
+
+    def snapshot(self, reset=False):
+        values = {
+            "html_bytes": self.html_bytes,
+            "image_bytes": self.image_bytes,
+            "images": self.images,
+            "iframes": self.iframes,
+        }
+        if reset:
+            self.html_bytes = self.image_bytes = self.images = self.iframes = 0
+        return values
+
+
+def measure_page(path, latency, timeout):
+    # 在目前行程中執行；由 run_isolated 以子行程呼叫
+    from bench import fake_ee
+
+    backend = fake_ee.install(latency)
+    sys.path.insert(0, str(ROOT))
+    os.chdir(ROOT)
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(path), default_timeout=timeout)
+    result = {"page": path.name}
+    with OutputMeter() as meter:
+        for label in ("cold", "rerun"):
+            tracemalloc.start()
+            start = time.perf_counter()
+            at.run()
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            result[label] = {
+                "seconds": round(elapsed, 3),
+                "peak_memory_bytes": peak,
+                "round_trips": backend.snapshot(reset=True),
+                **meter.snapshot(reset=True),
+                "exception": [str(e.value) for e in at.exception] or None,
+            }
+    return result
+
+
+def run_isolated(path, latency, timeout):
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = {**os.environ, "STSP_CACHE_DIR": cache_dir}
+        out = subprocess.run(
+            [sys.executable, "-m", "bench.run", "--page", str(path),
+             "--latency", str(latency), "--timeout", str(timeout)],
+            cwd=ROOT, env=env, capture_output=True, text=True,
+        )
+    if out.returncode != 0:
+        return {"page": path.name, "error": out.stderr.strip().splitlines()[-1:] or ["failed"]}
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def git_commit():
+    out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                         capture_output=True, text=True)
+    return out.stdout.strip() or "unknown"
+
+
+def total_round_trips(run):
+    return sum(run["round_trips"].values())
+
+
+def print_table(results):
+    print(f"{'page':48s} {'cold s':>7s} {'rerun s':>8s} {'trips':>6s} {'rerun':>6s} "
+          f"{'iframes':>7s} {'html KB':>8s} {'img KB':>7s} {'peak MB':>8s}")
+    for r in results:
+        if "error" in r:
+            print(f"{r['page'][:48]:48s} ERROR {r['error']}")
+            continue
+        cold, rerun = r["cold"], r["rerun"]
+        print(f"{r['page'][:48]:48s} {cold['seconds']:7.2f} {rerun['seconds']:8.2f} "
+              f"{total_round_trips(cold):6d} {total_round_trips(rerun):6d} {cold['iframes']:7d} "
+              f"{cold['html_bytes'] / 1024:8.0f} {cold['image_bytes'] / 1024:7.0f} "
+              f"{cold['peak_memory_bytes'] / 2**20:8.1f}")
+
+
+def silent_pages(results):
+    return [
+        r["page"] for r in results
+        if r["page"] not in STATIC_PAGES
+        and ("error" in r or r["cold"]["exception"] or total_round_trips(r["cold"]) == 0)
+    ]
+
+
+def compare(results, baseline_path):
+    baseline = {r["page"]: r for r in json.loads(Path(baseline_path).read_text())["pages"]}
+    regressed = False
+    for r in results:
+        base = baseline.get(r["page"])
+        if base is None or "error" in r or "error" in base:
+            continue
+        for label in ("cold", "rerun"):
+            before, after = total_round_trips(base[label]), total_round_trips(r[label])
+            if after != before:
+                print(f"{r['page']} {label}: round trips {before} -> {after}")
+            regressed |= after > before
+    return regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="以假的 Earth Engine 後端量測各頁面效能")
+    parser.add_argument("--latency", type=float, default=0.2, help="每次阻塞呼叫的模擬延遲 (秒)")
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--page", help="只量測單一頁面並輸出 JSON (內部使用)")
+    parser.add_argument("--compare", help="與先前的結果 JSON 比較")
+    parser.add_argument("--output", help="結果 JSON 路徑 (預設 bench/results/<commit>.json)")
+    parser.add_argument("--check", action="store_true", help="有頁面失敗或沒有任何往返時回傳 1")
+    args = parser.parse_args(argv)
+
+    if args.page:
+        print(json.dumps(measure_page(Path(args.page), args.latency, args.timeout)))
+        return
+
+    results = [run_isolated(path, args.latency, args.timeout) for path in page_paths()]
+    print_table(results)
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{git_commit()}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(
+        {"commit": git_commit(), "latency": args.latency, "pages": results},
+        ensure_ascii=False, indent=2,
+    ))
+    print(f"wrote {output}")
+
+    failed = silent_pages(results) if args.check else []
+    for page in failed:
+        print(f"{page}: 失敗或沒有任何 Earth Engine 往返")
+    if failed or (args.compare and compare(results, args.compare)):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+from bench.run import page_paths, run_isolated, silent_pages
+
+
+def test_pages_reach_fake_backend():
+    # 冷啟動時每個會用到 Earth Engine 的頁面都要有往返；0 次代表頁面在量測前就失敗了
+    results = [run_isolated(path, latency=0.0, timeout=300) for path in page_paths()]
+    assert silent_pages(results) == []
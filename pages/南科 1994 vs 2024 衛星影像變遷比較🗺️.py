@@ -1,85 +1,119 @@
 import streamlit as st
-import ee
-from google.oauth2 import service_account
-import geemap.foliumap as geemap
-
-# ✅ 授權 Earth Engine
-service_account_info = st.secrets["GEE_SERVICE_ACCOUNT"]
-credentials = service_account.Credentials.from_service_account_info(
-    service_account_info,
-    scopes=["https://www.googleapis.com/auth/earthengine"]
-)
-ee.Initialize(credentials)
+from datetime import date
+from stsp.bootstrap import init_ee, load_geemap
+from stsp.change import detect_change, preview_rgb, transition_rows
+from stsp.ee_cache import map_url
+from stsp.maps import ee_tile_layer, render_map
+from stsp.prefetch import neighbour_years, submit
+from stsp.composites import FIRST_YEAR, SENTINEL2_FIRST_YEAR, TRUE_COLOR_VIS, composite
+from stsp.timelapse import STSP_BBOX
+from stsp.historic_map import available_maps, overlay_layer
+from stsp.landcover import CLASS_NAMES
+from stsp.trace import debug_sidebar, start_rerun
 
 # ✅ Streamlit 頁面設定
 st.set_page_config(layout="wide")
-st.title("南科 1994 vs 2024 衛星影像變遷比較🗺️")
+# 標題依選取的年份決定，先保留位置
+title_slot = st.empty()
 
-# ✅ AOI：以南科中心點建立緩衝區
+# ✅ 授權 Earth Engine（每個行程只做一次）
+start_rerun()
+ee = init_ee()
+geemap = load_geemap()
+
+# ✅ AOI：以南科中心點為地圖中心
 center_coords = [120.271552, 23.106393]
-center_point = ee.Geometry.Point(center_coords)
-aoi = center_point.buffer(3000)
+
+# ✅ 選擇左右兩側的年份
+# 1984–2011 使用 Landsat 5、2012 使用 Landsat 7、2013 之後使用 Landsat 8 / 9；
+# 2017 之後可改用 Sentinel-2 (10 m)
+LAST_YEAR = date.today().year
+# 下方的觀察結論是針對這組年份寫的
+DEFAULT_YEARS = (1994, 2024)
+col_left, col_right, col_sensor = st.columns([2, 2, 1])
+with col_left:
+    left_year = st.select_slider("左側年份", options=list(range(FIRST_YEAR, LAST_YEAR + 1)), value=DEFAULT_YEARS[0])
+with col_right:
+    right_year = st.select_slider("右側年份", options=list(range(FIRST_YEAR, LAST_YEAR + 1)), value=DEFAULT_YEARS[1])
+with col_sensor:
+    use_sentinel = st.checkbox("2017 後使用 Sentinel-2", value=True)
+title_slot.title(f"南科 {left_year} vs {right_year} 衛星影像變遷比較🗺️")
+
+vis = TRUE_COLOR_VIS
+
+
+def sensor_for(year):
+    return "sentinel2" if use_sentinel and year >= SENTINEL2_FIRST_YEAR else "landsat"
+
+
+def year_image(year):
+    return composite(year, STSP_BBOX, sensor=sensor_for(year))
+
 
 # ✅ 建立地圖（指定中心與縮放）
 my_Map = geemap.Map(center=center_coords[::-1], zoom=14)
 
-# === 1994 年 Landsat 5 處理 ===
-collection_1994 = ee.ImageCollection('LANDSAT/LT05/C02/T1_L2') \
-    .filterDate('1994-01-01', '1994-12-31') \
-    .filterBounds(aoi) \
-    .filter(ee.Filter.lt('CLOUD_COVER', 60))
-
-image_1994 = collection_1994.select(['SR_B3', 'SR_B2', 'SR_B1']) \
-    .median() \
-    .multiply(0.0000275).add(-0.2)
-
-vis_1994 = {
-    'min': 0.0,
-    'max': 0.3,
-    'bands': ['SR_B3', 'SR_B2', 'SR_B1']
-}
-
-# === 2024 年 Sentinel-2 處理 ===
-collection_2024 = ee.ImageCollection('COPERNICUS/S2_SR') \
-    .filterDate('2024-01-01', '2024-12-31') \
-    .filterBounds(aoi) \
-    .filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE', 20)) \
-    .sort('CLOUDY_PIXEL_PERCENTAGE')
-
-image_2024 = collection_2024.first()
-
-if not image_2024:
-    st.error("❌ 找不到符合條件的 2024 年 Sentinel-2 影像。")
-    st.stop()
-else:
-    st.write("✅ 成功取得 2024 年 Sentinel-2 影像。")
-
-image2024_rgb = image_2024.select(['B4', 'B3', 'B2'])
-
-vis_2024 = {
-    'min': 0,
-    'max': 3000,
-    'bands': ['B4', 'B3', 'B2']
-}
-
-# ✅ 建立比較圖層
-left_layer = geemap.ee_tile_layer(image_1994, vis_1994, '1994 真色')
-right_layer = geemap.ee_tile_layer(image2024_rgb, vis_2024, '2024 真色')
+# ✅ 建立比較圖層（圖磚網址經磁碟快取；相鄰年份已在背景預先解析時會直接命中）
+left_layer = ee_tile_layer(year_image(left_year), vis, f'{left_year} 真色')
+right_layer = ee_tile_layer(year_image(right_year), vis, f'{right_year} 真色')
 
 # ✅ 加入左右滑動地圖
 my_Map.split_map(left_layer, right_layer)
 
+# ✅ 台灣堡圖疊加 (有產生圖磚金字塔時才顯示選項)
+historic_maps = available_maps()
+if historic_maps and st.checkbox("疊加台灣堡圖"):
+    for metadata in historic_maps.values():
+        overlay_layer(metadata, opacity=0.6, label=f"台灣堡圖 {metadata['name']}").add_to(my_Map)
+
 # ✅ 顯示地圖於 Streamlit
-my_Map.to_streamlit(height=600)
+st.subheader(f"{left_year} ({sensor_for(left_year)}) vs {right_year} ({sensor_for(right_year)})")
+render_map(my_Map, height=600, name="split_map")
 
+# ✅ 背景預先解析前後一年的圖層，切換年份時不必等待 Earth Engine
+for year in neighbour_years([left_year, right_year], FIRST_YEAR, LAST_YEAR):
+    submit(("split_map", year, sensor_for(year)), lambda y=year: map_url(year_image(y), vis))
 
-st.markdown(""" 
+
+if (left_year, right_year) == DEFAULT_YEARS:
+    st.markdown("""
 <p>
 對比南科還沒出現的1994和南科三期擴建結束的2024年之衛星影像圖，觀察結果： <br>
 1. 路網，由稀疏轉為明顯且複雜 <br>
 2. 住宅及建築物，1994多為田地，而2024年大多過去的田地轉變成了各式建築物 <br>
-    </p>
-    """,
-    unsafe_allow_html=True 
-           )
-
+</p>
+""",
+        unsafe_allow_html=True,
+    )
+
+# ✅ 像素級變遷偵測：兩年份分塊下載到磁碟後逐塊計算，需要數十秒，預設不執行
+st.subheader(f"{left_year} → {right_year} 像素變遷偵測")
+if st.checkbox("計算 NDVI / NDBI 差值與土地覆蓋轉移"):
+    # 兩年都使用 Sentinel-2 時才改用 10 m，否則以 Landsat 的 30 m 網格比較
+    sensors = (sensor_for(left_year), sensor_for(right_year))
+    scale = 10 if sensors == ("sentinel2", "sentinel2") else 30
+
+    @st.cache_data(show_spinner=False)
+    def get_change(before_year, after_year, sensors, scale):
+        return detect_change(before_year, after_year, STSP_BBOX, scale, sensors)
+
+    with st.spinner("下載兩年份影像並逐塊計算變遷..."):
+        summary = get_change(left_year, right_year, sensors, scale)
+
+    col_veg, col_built, col_dndvi = st.columns(3)
+    col_veg.metric("植被減少 (ΔNDVI < -0.2)", f"{summary.area(summary.ndvi_loss_pixels):,.0f} 公頃",
+                   f"增加 {summary.area(summary.ndvi_gain_pixels):,.0f} 公頃", delta_color="off")
+    col_built.metric("建成指數上升 (ΔNDBI > 0.1)", f"{summary.area(summary.builtup_gain_pixels):,.0f} 公頃",
+                     f"下降 {summary.area(summary.builtup_loss_pixels):,.0f} 公頃", delta_color="off")
+    col_dndvi.metric("平均 ΔNDVI", f"{summary.mean_dndvi:+.3f}")
+
+    col_preview, col_table = st.columns([1, 1])
+    with col_preview:
+        st.image(preview_rgb(summary.preview), caption="ΔNDVI：紅色為植被減少、綠色為植被增加", width="stretch")
+    with col_table:
+        st.write("土地覆蓋轉移 (面積大於 1 公頃)")
+        st.dataframe(transition_rows(summary, CLASS_NAMES, min_ha=1.0), width="stretch", height=400)
+    st.caption(f"{summary.shape[1]} × {summary.shape[0]} 像素 ({scale} m)，有效面積 {summary.area(summary.valid_pixels):,.0f} 公頃")
+
+# --- 除錯：Earth Engine 呼叫紀錄 (側邊欄勾選或網址加上 ?debug=1) ---
+debug_sidebar()
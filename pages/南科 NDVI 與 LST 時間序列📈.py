@@ -0,0 +1,99 @@
+import streamlit as st
+from datetime import date
+from stsp.bootstrap import init_ee
+from stsp.composites import FIRST_YEAR
+from stsp.tile_proxy import PREFETCH_BBOXES
+from stsp.timelapse import STSP_BBOX
+from stsp.timeseries import annual_means, fetch_series
+from stsp.trace import debug_sidebar, start_rerun
+
+st.set_page_config(layout="wide")
+st.title("南科 NDVI 與 LST 時間序列📈")
+
+st.markdown("""
+以 1984 年至今所有 Landsat 影像，逐月計算 AOI 內的平均 **NDVI** 與 **地表溫度 (LST)**。
+每個月份先做去雲中位數合成，再套用與都市熱區頁相同的 NDVI → 發射率 → LST 流程；
+所有月份在 Earth Engine 伺服器端一次算完、一次取回，已取得的月份存在本機，之後只補新的月份。
+""")
+
+# --- GEE 初始化 (每個行程只做一次) ---
+start_rerun()
+init_ee()
+
+AOIS = {
+    "都市熱區 AOI": PREFETCH_BBOXES["heat_island"],
+    "南科與周圍": STSP_BBOX,
+}
+this_year = date.today().year
+col_aoi, col_years = st.columns([1, 3])
+with col_aoi:
+    aoi_name = st.selectbox("範圍", list(AOIS))
+with col_years:
+    first_year, last_year = st.slider("年份範圍", FIRST_YEAR, this_year, (FIRST_YEAR, this_year))
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_series(bbox, first_year, last_year):
+    return fetch_series(bbox, first_year, last_year)
+
+if st.button("更新最近月份"):
+    get_series.clear()
+
+with st.spinner("計算月平均 NDVI 與 LST (第一次需要數十秒，之後只查詢新的月份)..."):
+    series = get_series(AOIS[aoi_name], first_year, last_year)
+
+if not series:
+    st.warning("所選期間沒有可用的影像。")
+    st.stop()
+
+valid = [row for row in series if row["NDVI"] is not None and row["LST"] is not None]
+st.caption(f"{len(series)} 個有影像的月份，其中 {len(valid)} 個月份在 AOI 內有未被雲遮蔽的像素")
+
+# --- 圖表 ---
+monthly = {
+    "月份": [row["month"] for row in valid],
+    "NDVI": [row["NDVI"] for row in valid],
+    "LST (°C)": [row["LST"] for row in valid],
+}
+col_ndvi, col_lst = st.columns(2)
+with col_ndvi:
+    st.subheader("月平均 NDVI")
+    st.line_chart(monthly, x="月份", y="NDVI")
+with col_lst:
+    st.subheader("月平均 LST (°C)")
+    st.line_chart(monthly, x="月份", y="LST (°C)", color="#d7191c")
+
+# 各月份的影像數與季節不同，年平均較能看出長期趨勢
+st.subheader("年平均")
+yearly = annual_means(valid)
+st.line_chart(
+    {
+        "年份": [row["year"] for row in yearly],
+        "NDVI": [row["NDVI"] for row in yearly],
+        "LST (°C)": [row["LST"] for row in yearly],
+    },
+    x="年份",
+    y=["NDVI", "LST (°C)"],
+)
+st.dataframe(
+    [
+        {"年份": row["year"], "NDVI": round(row["NDVI"], 3), "LST (°C)": round(row["LST"], 2), "月份數": row["months"]}
+        for row in yearly
+    ],
+    width="stretch",
+)
+
+st.download_button(
+    "下載月資料 CSV",
+    "\ufeffmonth,NDVI,LST,images\n" + "".join(
+        f"{row['month']},{row['NDVI']},{row['LST']},{row['images']}\n" for row in series
+    ),
+    file_name=f"stsp_timeseries_{first_year}_{last_year}.csv",
+    mime="text/csv",
+)
+
+st.write("---")
+st.write("數據來源：Landsat 5 / 7 / 8 / 9 Collection 2 Tier 1 Level 2")
+
+# --- 除錯：Earth Engine 呼叫紀錄 (側邊欄勾選或網址加上 ?debug=1) ---
+debug_sidebar()
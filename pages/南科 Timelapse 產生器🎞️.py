@@ -0,0 +1,64 @@
+import streamlit as st
+from datetime import date
+from stsp.bootstrap import init_ee
+from stsp.trace import debug_sidebar, start_rerun
+from stsp.timelapse import SENSORS, make_timelapse
+
+st.set_page_config(layout="wide")
+st.title("南科 Timelapse 產生器🎞️")
+
+st.markdown("""
+以每年去雲後的中位數合成影像製作南科的衛星影像縮時動畫：
+1984–2011 使用 Landsat 5、2012 使用 Landsat 7、2013 之後使用 Landsat 8 / 9，2017 之後也可改用 Sentinel-2。  
+每一格影像會各自快取，調整年份範圍時只需要計算新增的年份。
+""")
+
+# --- GEE 初始化 (每個行程只做一次) ---
+start_rerun()
+init_ee()
+
+# --- 參數 ---
+this_year = date.today().year
+col1, col2, col3, col4 = st.columns(4)
+with col1:
+    start_year, end_year = st.slider("年份範圍", 1984, this_year, (1984, this_year))
+with col2:
+    sensor = st.selectbox(
+        "感測器", SENSORS,
+        format_func=lambda s: {"landsat": "Landsat", "sentinel2": "Sentinel-2 (2017 後)"}[s],
+    )
+with col3:
+    dimensions = st.select_slider("影像大小 (px)", options=[384, 512, 768, 1024], value=768)
+with col4:
+    fmt = st.radio("輸出格式", ["webp", "mp4"], format_func=str.upper, horizontal=True)
+fps = st.slider("每秒格數", 1, 10, 2)
+
+years = list(range(start_year, end_year + 1))
+if sensor == "sentinel2":
+    years = [y for y in years if y >= 2017]
+
+if st.button("產生 Timelapse", type="primary"):
+    try:
+        with st.spinner(f"平行產生 {len(years)} 格影像..."):
+            data, rendered_years = make_timelapse(years, sensor=sensor, dimensions=dimensions, fmt=fmt, fps=fps)
+    except Exception as e:
+        st.error(f"產生 Timelapse 失敗 (Earth Engine 驗證、配額或網路錯誤)：{e}")
+    else:
+        if data is None:
+            st.warning("所選年份沒有可用的影像。")
+        else:
+            skipped = sorted(set(years) - set(rendered_years))
+            if skipped:
+                st.info(f"以下年份沒有可用影像，已略過：{', '.join(map(str, skipped))}")
+            if fmt == "mp4":
+                st.video(data, format="video/mp4")
+            else:
+                st.image(data, caption=f"{rendered_years[0]}–{rendered_years[-1]} 南科衛星影像變化")
+            st.download_button(
+                "下載", data,
+                file_name=f"stsp_{rendered_years[0]}_{rendered_years[-1]}.{fmt}",
+                mime="video/mp4" if fmt == "mp4" else "image/webp",
+            )
+
+# --- 除錯：Earth Engine 呼叫紀錄 (側邊欄勾選或網址加上 ?debug=1) ---
+debug_sidebar()
@@ -0,0 +1,340 @@
+import streamlit as st
+from datetime import date
+from stsp.bootstrap import init_ee, load_geemap
+from stsp.trace import debug_sidebar, start_rerun
+from stsp.ee_cache import cache_stats
+from stsp.heat_island import (
+    FIRST_YEAR, LAYERS, REFINE_SCALES, SEASONS, finest_stats, image_counts, make_periods, period_ttl, refined_lst,
+    stretched_lst_vis, submit_stats,
+)
+from stsp.jobs import COMPLETED, FAILED, get_job, overall_progress, submit
+from stsp.lst import build_lst
+from stsp.maps import (
+    add_aoi_outline, add_ee_layer, add_hotspot_layer, render_map, render_stats, reset_render_stats,
+)
+from stsp.landcover import CLASS_NAMES
+from stsp.uhi import RURAL_CLASSES, URBAN_CLASSES, submit_uhi, uhi_summary
+from stsp.zonal import CELL_SIZES, grid_cells, hot_spots, rows_from_info, to_csv, to_parquet, zonal_graph
+
+# --- Streamlit 應用程式設定 ---
+st.set_page_config(layout="wide")
+st.title("南科周圍都市熱區🌍")
+
+st.markdown("""
+本文應用程式展示了如何利用衛星數據，從**地表植被指數 (NDVI)** 推算**實質地表溫度 (LST)**。
+
+* **NDVI (正規化差異植被指數)**：可反映地表植被的茂密程度。NDVI 值越高，表示植被越茂盛；反之，則可能為裸地、水體或建築物。
+* **LST (地表溫度)**：量測地表發出的實際熱度。
+
+**關聯：** 我們利用 NDVI 估算植被覆蓋率，進而決定地表的熱量發射效率 (發射率)。  
+此發射率是關鍵，用於將衛星熱紅外數據轉換為準確地表溫度。
+
+簡言之，NDVI 幫助我們校正溫度計算並呈現地表熱度，有助於識別都市熱區。
+""")
+# --- GEE 初始化 (每個行程只做一次) ---
+start_rerun()
+init_ee()
+geemap = load_geemap()
+
+# --- 只有當 GEE 初始化成功後，才會執行以下代碼 ---
+
+# --- 定義 AOI 座標和比較期間 ---
+aoi_coords = [120.265429, 23.057127, 120.362146, 23.115991]
+
+# 原本的「2014」頁實際查詢的是 2015-01-01 ~ 2015-04-30，對應這裡的 2015「1–4 月」
+col_years, col_season = st.columns([3, 1])
+with col_years:
+    years = st.multiselect(
+        "選擇比較年份",
+        options=list(range(FIRST_YEAR, date.today().year + 1)),
+        default=[2015, 2024],
+    )
+with col_season:
+    season = st.selectbox("期間", options=list(SEASONS), index=0)
+
+if not years:
+    st.info("請至少選擇一個年份。")
+    st.stop()
+
+periods = make_periods(sorted(years), season)
+
+# 每張 geemap.Map 都會嵌入一份 Leaflet 與一個 iframe；
+# 「單一地圖」把所有圖層放在同一張圖用圖層切換，「逐張檢視」只輸出目前選取的那一張
+render_mode = st.radio(
+    "地圖顯示方式",
+    ["單一地圖 (圖層切換)", "逐張檢視 (只載入選取的地圖)"],
+    horizontal=True,
+)
+reset_render_stats()
+
+
+# --- 各年份統計值 ---
+# 統計值交給背景工作佇列，依 300 → 90 → 30 m 逐步精細化：頁面先依影像數量決定可顯示的期間，
+# 地圖與其他內容不必等統計值算完；最粗的結果幾秒內就會出現，更細的結果回來後再更新數值與 LST 色階
+JOB_POLL_SECONDS = 2
+
+
+@st.cache_data(ttl=3600)
+def get_image_counts(periods, coordinates):
+    return image_counts(periods, coordinates)
+
+counts = get_image_counts(tuple(periods), tuple(aoi_coords))
+ready = [p for p in periods if counts.get(p.label)]
+for period in periods:
+    if period not in ready:
+        st.warning(f"{period.label} 沒有可用的 Landsat 8 影像")
+if not ready:
+    st.stop()
+
+stat_jobs = submit_stats(ready, tuple(aoi_coords))
+
+
+def show_job_progress(jobs, text):
+    finished = sum(1 for job in jobs if job is not None and job.state in (COMPLETED, FAILED))
+    if finished < len(jobs):
+        st.progress(overall_progress(jobs), text=f"{text} ({finished}/{len(jobs)})")
+    return finished == len(jobs)
+
+
+def period_jobs():
+    return {label: {scale: get_job(key) for scale, key in keys.items()} for label, keys in stat_jobs.items()}
+
+
+def scale_label(scale):
+    if scale is None:
+        return "計算中"
+    return f"{scale} m" if scale == min(REFINE_SCALES) else f"{scale} m (精細化中)"
+
+
+# 本次執行時各期間已有的最細統計值；地圖的 FV / EM / LST 與色階以此建立
+shown_stats = {label: finest_stats(jobs) for label, jobs in period_jobs().items()}
+stats_pending = not all(job is not None and job.done for jobs in period_jobs().values() for job in jobs.values())
+
+@st.fragment(run_every=JOB_POLL_SECONDS if stats_pending else None)
+def period_stats_table():
+    st.write("### 各年份統計")
+    current = period_jobs()
+    all_done = show_job_progress(
+        [job for jobs in current.values() for job in jobs.values()],
+        "背景計算各年份 NDVI 與 LST 統計值 (300 → 90 → 30 m)",
+    )
+    rows = []
+    for p in ready:
+        scale, stats = finest_stats(current[p.label])
+        failed = [job for job in current[p.label].values() if job is not None and job.state == FAILED]
+        if failed and scale is None:
+            st.warning(f"{p.label} 統計失敗：{failed[0].error}")
+        rows.append({
+            "期間": p.label,
+            "解析度": "失敗" if failed and scale is None else scale_label(scale),
+            "NDVI 最小值": stats.get("NDVI_min"),
+            "NDVI 最大值": stats.get("NDVI_max"),
+            "LST 平均 (°C)": stats.get("LST_mean"),
+            "LST 最低 (°C)": stats.get("LST_min"),
+            "LST 最高 (°C)": stats.get("LST_max"),
+        })
+    st.dataframe(rows, width="stretch")
+    refined = any(finest_stats(current[label])[0] != shown[0] for label, shown in shown_stats.items())
+    if stats_pending and (refined or all_done):
+        # 有更細的結果時重新執行整頁，更新地圖圖層；全部完成後停止輪詢
+        st.rerun()
+
+period_stats_table()
+
+
+# --- 地圖與說明 ---
+center = [23.0865, 120.3138] # 以aoi的中心點作為範例
+
+st.markdown("""
+1. **真彩色影像 (432)**：Landsat 8 的紅、綠、藍波段合成。
+2. **NDVI (正規化差異植被指數)**：藍色為水體、白色為裸地或建物、綠色為植被。
+3. **植被覆蓋率 (FV) 與地表發射率 (EM)**：由各年份的 NDVI 極值推得，作為 LST 計算的發射率。
+4. **地表溫度 (LST)**：依 FV / EM 校正後的地表溫度。
+""")
+
+# 合成影像、NDVI、FV、EM 與 LST 共用同一張運算圖，只建一次
+results = {p.label: build_lst(p.start, p.end, tuple(aoi_coords)) for p in ready}
+# 地圖上的 LST 使用目前最細的 NDVI 極值與 LST 範圍；分區統計仍用上面完整的 30 m 運算圖
+display = {p.label: refined_lst(p, tuple(aoi_coords), shown_stats[p.label][1]) for p in ready}
+
+
+def layer_vis(period, attr, vis):
+    # LST 色階拉伸到目前最細統計的最低 / 最高溫
+    return stretched_lst_vis(shown_stats[period.label][1]) if attr == "lst" else vis
+
+# 地圖放在分區統計之前顯示，但要等熱點結果算完才能加上熱點圖層
+map_slot = st.container()
+
+# --- 分區統計與熱點分析 ---
+st.write("### 分區統計與熱點分析 (Getis-Ord Gi*)")
+st.write("將 AOI 切成網格，一次求出所有網格的 LST / NDVI 平均、最大與百分位數，再找出統計上顯著的高溫聚集 (熱點) 與低溫聚集 (冷點)。")
+col_zone_period, col_cell = st.columns(2)
+with col_zone_period:
+    zone_period = st.selectbox("分析期間", ready, index=len(ready) - 1, format_func=lambda p: p.label)
+with col_cell:
+    cell_m = st.select_slider("網格大小 (公尺)", options=list(CELL_SIZES), value=500)
+
+# updated 一併當作快取鍵：今年的工作過期重算後鍵不變，但結果不同
+@st.cache_data
+def get_zone_rows(job_key, updated, _info, coordinates, cell_m):
+    cells, shape = grid_cells(coordinates, cell_m)
+    return hot_spots(rows_from_info(_info, cells), shape)
+
+cells, _ = grid_cells(tuple(aoi_coords), cell_m)
+zone_job_key = submit(
+    f"zonal-{zone_period.label}-{cell_m}m",
+    zonal_graph(results[zone_period.label], cells),
+    kind="table",
+    ttl=period_ttl(zone_period),
+)
+zone_job = get_job(zone_job_key)
+zone_rows = None
+if zone_job.state == COMPLETED:
+    zone_rows = get_zone_rows(zone_job_key, zone_job.updated, zone_job.result, tuple(aoi_coords), cell_m)
+elif zone_job.state == FAILED:
+    st.warning(f"分區統計失敗：{zone_job.error}")
+else:
+    # 分區統計算完後重新執行整頁，才能在地圖上加上熱點圖層
+    @st.fragment(run_every=JOB_POLL_SECONDS)
+    def zonal_progress():
+        if show_job_progress([get_job(zone_job_key)], "背景計算分區統計"):
+            st.rerun()
+
+    zonal_progress()
+
+if zone_rows is not None:
+    st.dataframe(
+        [
+            {
+                "網格": r["zone"],
+                "LST 平均": r.get("LST_mean"),
+                "LST 最高": r.get("LST_max"),
+                "LST P90": r.get("LST_p90"),
+                "NDVI 平均": r.get("NDVI_mean"),
+                "Gi* z": r["gi_z"],
+                "p 值": r["gi_p"],
+                "分類": r["hotspot"],
+            }
+            for r in zone_rows
+        ],
+        width="stretch",
+        height=300,
+    )
+    col_csv, col_parquet = st.columns(2)
+    with col_csv:
+        st.download_button("下載 CSV", to_csv(zone_rows), file_name=f"zonal_{zone_period.label}_{cell_m}m.csv", mime="text/csv")
+    with col_parquet:
+        try:
+            st.download_button("下載 Parquet", to_parquet(zone_rows), file_name=f"zonal_{zone_period.label}_{cell_m}m.parquet")
+        except ImportError:
+            st.caption("安裝 pyarrow 後可下載 Parquet")
+
+# --- 都市熱島強度 ---
+st.write("### 都市熱島強度 (UHI)")
+st.write(
+    f"以土地覆蓋分類器將各期間的合成影像分成 {len(CLASS_NAMES)} 類，與 LST 一起做一次分組統計，"
+    f"熱島強度 = 都市 ({'、'.join(URBAN_CLASSES)}) 平均 LST − 鄉村 ({'、'.join(RURAL_CLASSES)}) 平均 LST。"
+)
+if st.checkbox("計算各期間的都市熱島強度"):
+    with st.spinner("訓練土地覆蓋分類器 (第一次需要抽樣)..."):
+        uhi_jobs = submit_uhi(ready, tuple(aoi_coords))
+    uhi_pending = not all(job is not None and job.done for job in map(get_job, uhi_jobs.values()))
+
+    @st.fragment(run_every=JOB_POLL_SECONDS if uhi_pending else None)
+    def uhi_table():
+        current = {label: get_job(key) for label, key in uhi_jobs.items()}
+        if uhi_pending and show_job_progress(list(current.values()), "背景計算 LST × 土地覆蓋分組統計"):
+            # 全部完成後重新執行一次，停止輪詢
+            st.rerun()
+        summaries = {}
+        for p in ready:
+            job = current[p.label]
+            if job is None:
+                continue
+            if job.state == COMPLETED:
+                summaries[p.label] = uhi_summary(job.result)
+            elif job.state == FAILED:
+                st.warning(f"{p.label} 熱島強度計算失敗：{job.error}")
+        if not summaries:
+            return
+        st.dataframe(
+            [
+                {
+                    "期間": label,
+                    "都市 LST 平均 (°C)": s["urban"] and s["urban"]["mean"],
+                    "都市 LST P90 (°C)": s["urban"] and s["urban"]["p90"],
+                    "鄉村 LST 平均 (°C)": s["rural"] and s["rural"]["mean"],
+                    "鄉村 LST P90 (°C)": s["rural"] and s["rural"]["p90"],
+                    "熱島強度 ΔT (°C)": s["intensity"],
+                }
+                for label, s in summaries.items()
+            ],
+            width="stretch",
+        )
+        trend = [(label, s["intensity"]) for label, s in summaries.items() if s["intensity"] is not None]
+        if len(trend) > 1:
+            st.line_chart({"期間": [t[0] for t in trend], "ΔT (°C)": [t[1] for t in trend]}, x="期間", y="ΔT (°C)")
+        # 各類別的 LST 平均與中位數
+        st.dataframe(
+            {
+                label: {
+                    f"{name} {stat}": round(c[key], 2)
+                    for name, c in s["classes"].items()
+                    for stat, key in (("平均", "mean"), ("中位數", "p50"))
+                    if c and c[key] is not None
+                }
+                for label, s in summaries.items()
+            },
+            width="stretch",
+        )
+
+    uhi_table()
+
+with map_slot:
+    st.caption("地圖 LST 依據的統計解析度：" + "、".join(
+        f"{p.label} {scale_label(shown_stats[p.label][0])}" for p in ready
+    ))
+    if render_mode.startswith("單一地圖"):
+        # 預設只開啟最後一年的 LST，其餘圖層可在右上角切換
+        Map = geemap.Map(center=center, zoom=12)
+        for period in ready:
+            result = display[period.label]
+            for layer_name, (attr, vis) in LAYERS.items():
+                shown = period == ready[-1] and attr == "lst"
+                add_ee_layer(Map, getattr(result, attr), layer_vis(period, attr, vis), f"{period.label} {layer_name}", shown=shown)
+        if zone_rows is not None:
+            add_hotspot_layer(Map, zone_rows, f"{zone_period.label} 熱點 (Gi*)", shown=False)
+        add_aoi_outline(Map, aoi_coords)
+        Map.add_layer_control()
+        render_map(Map, height=600, name="combined")
+    else:
+        col_period, col_layer = st.columns(2)
+        with col_period:
+            period = st.selectbox("期間", ready, index=len(ready) - 1, format_func=lambda p: p.label)
+        with col_layer:
+            layer_name = st.radio("圖層", list(LAYERS), index=2, horizontal=True)
+        attr, vis = LAYERS[layer_name]
+        Map_single = geemap.Map(center=center, zoom=12)
+        add_ee_layer(Map_single, getattr(display[period.label], attr), layer_vis(period, attr, vis), f"{period.label} {layer_name}")
+        if period == zone_period and zone_rows is not None:
+            add_hotspot_layer(Map_single, zone_rows, f"{zone_period.label} 熱點 (Gi*)", shown=False)
+        add_aoi_outline(Map_single, aoi_coords)
+        render_map(Map_single, height=600, name=f"{period.label} {layer_name}")
+
+# --- 地圖輸出大小 ---
+map_output = render_stats()
+st.caption(f"本次輸出 {map_output['iframes']} 個地圖 iframe，共 {map_output['bytes'] / 1024:.0f} KB HTML")
+
+# --- 快取命中狀況 ---
+cache_info = cache_stats()
+st.sidebar.caption(
+    f"Earth Engine 快取：命中 {sum(cache_info['hits'].values())} 次、"
+    f"未命中 {sum(cache_info['misses'].values())} 次 (其中 {cache_info['coalesced']} 次與其他請求合併)，"
+    f"共 {cache_info['entries']} 筆 ({cache_info['bytes'] / 1024:.0f} KB)"
+)
+
+st.write("---")
+st.write("數據來源：Landsat 8 Collection 2 Tier 1 Level 2")
+
+# --- 除錯：Earth Engine 呼叫紀錄 (側邊欄勾選或網址加上 ?debug=1) ---
+debug_sidebar()
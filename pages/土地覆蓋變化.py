@@ -1,94 +1,73 @@
 import streamlit as st
-import ee
-from google.oauth2 import service_account
-
-# 替換為你剛下載的金鑰路徑
-SERVICE_ACCOUNT = 'gee-service-account@ee-s1243032.iam.gserviceaccount.com'
-KEY_FILE = 'C:\digital_earth\gold key.json'
-
-# 建立認證物件
-credentials = service_account.Credentials.from_service_account_file(
-    KEY_FILE,
-    scopes=['https://www.googleapis.com/auth/earthengine']
+from datetime import date
+from stsp.bootstrap import init_ee
+from stsp.trace import debug_sidebar, start_rerun
+from stsp.landcover import (
+    CLASS_NAMES, CLASS_VIS, class_areas, classify_years, fetch_thumbnails, scan_years,
 )
 
-# 初始化 Earth Engine
-ee.Initialize(credentials)
-
-
-# 初始化 Google Earth Engine
-try:
-    ee.Initialize(credentials)
-except Exception as e:
-    st.error("未授權，請運行 `earthengine authenticate` 來授權。")
-    st.stop()
-
 st.set_page_config(layout="wide", page_title="台灣土地覆蓋變化", page_icon="🌎")
 
-# 定義函數以獲取 Landsat 影像
-def get_landsat_image(region):
-    # 指定要獲取的年份
-    years = [1994, 2024]
-    images = []
-
-    for year in years:
-        if year < 1994:
-            collection = ee.ImageCollection('LANDSAT/LT04/C01/T1_SR')  # Landsat 4
-            bands = ['B1', 'B2', 'B3', 'B4', 'B5', 'B7']
-        elif year < 2013:
-            collection = ee.ImageCollection('LANDSAT/LT05/C01/T1_SR')  # Landsat 5
-            bands = ['B1', 'B2', 'B3', 'B4', 'B5', 'B7']
-        elif year < 2021:
-            collection = ee.ImageCollection('LANDSAT/LC08/C01/T1_SR')  # Landsat 8
-            bands = ['B2', 'B1', 'B3', 'B4', 'B5', 'B6', 'B7', 'B10', 'B11']
-        else:
-            collection = ee.ImageCollection('LANDSAT/LC09/C02/T1_L2')  # Landsat 9
-            bands = ['B2', 'B1', 'B3', 'B4', 'B5', 'B6', 'B7']
-
-        # 檢查影像集合中是否有影像
-        image_count = collection.filterDate(f'{year}-01-01', f'{year}-12-31') \
-                                 .filterBounds(region) \
-                                 .size().getInfo()
-
-        if image_count == 0:
-            print(f"{year} 年的影像在指定區域內不存在。")
-            continue
+# 初始化 Google Earth Engine（憑證統一由 stsp.bootstrap 處理，每個行程只做一次）
+start_rerun()
+ee = init_ee()
 
-        image = collection.filterDate(f'{year}-01-01', f'{year}-12-31') \
-                          .filterBounds(region) \
-                          .median() \
-                          .clip(region) \
-                          .select(bands)
-
-        images.append(image)
-
-    return images
-
-# 定義區域
-region = ee.Geometry.Polygon([
-    [[120.205, 23.020], [120.205, 22.990], [120.230, 22.990], [120.230, 23.020]]
-])
-
-# 獲取影像
-landsat_images = get_landsat_image(region)
-landsat_1994 = landsat_images[0] if len(landsat_images) > 0 else None
-landsat_2024 = landsat_images[1] if len(landsat_images) > 1 else None
-
-# 定義調色盤
-palette = ['#466b9f', '#d1def8', '#dec5c5', '#d99282', '#eb0000', '#ab0000', '#b3ac9f', '#68ab5f', '#1c5f2c', '#b5c58f', '#ccb879', '#b8d9eb', '#6c9fb8']
+# 定義區域 (west, south, east, north)
+region_bbox = (120.205, 22.990, 120.230, 23.020)
 
 # Streamlit 應用程式
 st.title("南部科技園區土地使用分類衛星影像比較")
 
-# 創建左右分割圖
-col1, col2 = st.columns(2)
-
-with col1:
-    st.subheader("1994 年土地使用分類")
-    if landsat_1994 is not None:
-        st.image(landsat_1994.getThumbUrl({'min': 0, 'max': 0.3, 'palette': palette}), use_column_width=True)
+# 選擇年份：1984 (Landsat 5) 至今的任意年份
+this_year = date.today().year
+start_year, end_year = st.slider("年份範圍", 1984, this_year, (1994, 2024))
+step = st.select_slider("間隔 (年)", options=[1, 2, 5, 10], value=10)
+years = list(range(start_year, end_year + 1, step))
+if years[-1] != end_year:
+    years.append(end_year)
+
+# 所有年份的影像數量一次取回，縮圖網址平行取得
+available, composites = scan_years(years, region_bbox)
+missing = [year for year in years if year not in composites]
+if missing:
+    st.info(f"以下年份在指定區域內沒有影像：{', '.join(map(str, missing))}")
+
+thumbnails = fetch_thumbnails(composites, {'min': 0, 'max': 0.3}, region_bbox)
+
+# 監督式分類：分類器只訓練一次，所有年份共用
+with st.spinner("進行監督式分類..."):
+    classified = classify_years(composites)
+    class_thumbnails = fetch_thumbnails(classified, CLASS_VIS, region_bbox, bands=('class',))
+    areas = class_areas(classified, region_bbox)
+
+# 圖例
+st.markdown(
+    " ".join(
+        f'<span style="background:#{color};padding:0 0.6em;margin-right:0.3em"></span>{name}'
+        for color, name in zip(CLASS_VIS['palette'], CLASS_NAMES)
+    ),
+    unsafe_allow_html=True,
+)
 
-with col2:
-    st.subheader("2024 年土地使用分類")
-    if landsat_2024 is not None:
-        st.image(landsat_2024.getThumbUrl({'min': 0, 'max': 0.3, 'palette': palette}), use_column_width=True)
+# 每列四張：上方為真色影像，下方為分類結果
+columns_per_row = 4
+shown = [year for year in years if year in thumbnails]
+for i in range(0, len(shown), columns_per_row):
+    cols = st.columns(columns_per_row)
+    for col, year in zip(cols, shown[i:i + columns_per_row]):
+        with col:
+            st.subheader(f"{year} 年")
+            st.image(thumbnails[year], caption=f"{available[str(year)]} 張影像的中位數合成", width="stretch")
+            st.image(class_thumbnails[year], caption=f"{year} 年土地使用分類", width="stretch")
+
+# 各類別面積 (公頃)
+st.subheader("各類別面積變化 (公頃)")
+area_table = {
+    str(year): {name: round(areas[year].get(name, 0.0), 1) for name in CLASS_NAMES}
+    for year in shown
+}
+st.dataframe(area_table, width="stretch")
+st.bar_chart(area_table)
+
+# --- 除錯：Earth Engine 呼叫紀錄 (側邊欄勾選或網址加上 ?debug=1) ---
+debug_sidebar()
@@ -1,36 +1,70 @@
 import streamlit as st
+from stsp.assets import show_image
+from stsp.historic_map import available_maps
 
 st.set_page_config(layout="wide")
 st.title("南科發展歷程說明")
 
+# 🔸 台灣堡圖疊加 (需先以 python -m stsp.historic_map build 產生圖磚金字塔)
+historic_maps = available_maps()
+if historic_maps:
+    st.subheader("台灣堡圖 × 1994 Landsat")
+    st.markdown("""
+掃描圖事先依控制點對位並切成圖磚，地圖只載入目前畫面需要的圖磚，不再整張載入。
+""")
+    # 沒有圖磚金字塔時本頁只有文字與圖片，ee / folium 只在這裡才載入
+    from stsp.bootstrap import init_ee, load_geemap
+    from stsp.composites import TRUE_COLOR_VIS, composite
+    from stsp.historic_map import overlay_layer
+    from stsp.maps import add_ee_layer, render_map
+    from stsp.timelapse import STSP_BBOX
+
+    init_ee()
+    geemap = load_geemap()
+    col_sheet, col_opacity = st.columns([2, 1])
+    with col_sheet:
+        sheet = st.selectbox("圖幅", list(historic_maps))
+    with col_opacity:
+        opacity = st.slider("堡圖透明度", 0.0, 1.0, 0.7)
+    metadata = historic_maps[sheet]
+    west, south, east, north = metadata["bounds"]
+    Map = geemap.Map(center=[(south + north) / 2, (west + east) / 2], zoom=metadata["min_zoom"] + 2)
+    add_ee_layer(Map, composite(1994, STSP_BBOX), TRUE_COLOR_VIS, "1994 Landsat 真色")
+    overlay_layer(metadata, opacity).add_to(Map)
+    Map.add_layer_control()
+    render_map(Map, height=600, name="historic_map")
+    st.caption(f"控制點 {len(metadata['gcps'])} 個，對位 RMSE {metadata['rmse_m']:.1f} m；"
+               f"z{metadata['min_zoom']}–{metadata['max_zoom']} 共 {sum(metadata['tiles'].values())} 張圖磚")
+    st.markdown("---")
+    st.subheader("過去的嘗試")
+
 # 🔸 圖片 1：QGIS 中失敗的台灣堡圖樣貌
 st.markdown("""
 這張圖展示 QGIS 中失敗的台灣堡圖樣貌：
 """)
-st.image(
-    "https://raw.githubusercontent.com/yarungrung/finalreport/main/messageImage_1748418519805.jpg",
+show_image(
+    "messageImage_1748418519805.jpg",
     caption="圖：在 QGIS 中失敗的台灣堡圖樣貌",
-    use_container_width=True
 )
 
 # 🔸 圖片 2：Colab 中失敗的台灣堡圖樣貌
 st.markdown("""
 這張圖展示 Colab 中失敗的台灣堡圖樣貌：
 """)
-st.image(
-    "https://raw.githubusercontent.com/yarungrung/finalreport/main/messageImage_1749027154085.jpg",
+show_image(
+    "messageImage_1749027154085.jpg",
     caption="圖：在 Colab 中失敗的台灣堡圖樣貌",
-    use_container_width=True
+    lazy=True,
 )
 
 # 🔸 圖片 3：不斷失敗的樣貌截圖
 st.markdown("""
 這張圖展示多次嘗試後仍不成功的樣貌：
 """)
-st.image(
-    "https://raw.githubusercontent.com/yarungrung/finalreport/main/%E8%9E%A2%E5%B9%95%E6%93%B7%E5%8F%96%E7%95%AB%E9%9D%A2%202025-06-04%20201032.png",
+show_image(
+    "螢幕擷取畫面 2025-06-04 201032.png",
     caption="圖：不斷失敗的樣貌（2025-06-04 擷取）",
-    use_container_width=True
+    lazy=True,
 )
 
 # 🔸 最後補充說明
@@ -0,0 +1,143 @@
+import json
+import time
+
+import streamlit as st
+from datetime import date
+from stsp.aoi import (
+    MAX_TILES, aoi_lst, aoi_lst_stats, bbox_geometry, geometry_bbox, histogram_bins, parse_geojson, split_tiles,
+    to_ee,
+)
+from stsp.bootstrap import init_ee, load_geemap
+from stsp.heat_island import FIRST_YEAR, LST_VIS, NDVI_VIS, SEASONS, make_periods
+from stsp.maps import add_aoi_geometry, add_ee_layer, render_map
+from stsp.trace import debug_sidebar, start_rerun
+
+st.set_page_config(layout="wide")
+st.title("自訂範圍 NDVI 與 LST 統計🧭")
+
+st.markdown("""
+上傳 GeoJSON 或在地圖上繪製任意範圍 (例如整個台南市)，計算範圍內的 **NDVI** 與 **地表溫度 (LST)** 統計。
+大範圍會自動切成多個區塊平行計算，再把各區塊的像素數、總和、極值與直方圖合併成整個範圍的統計值，
+結果與一次計算整個範圍相同，但不會超過 Earth Engine 的像素上限，也不必等待單一個很慢的呼叫。
+""")
+
+# --- GEE 初始化 (每個行程只做一次) ---
+start_rerun()
+init_ee()
+geemap = load_geemap()
+
+PRESETS = {
+    "南科周圍 (都市熱區 AOI)": (120.265429, 23.057127, 120.362146, 23.115991),
+    "台南市 (外接矩形)": (120.03, 22.88, 120.66, 23.42),
+}
+source = st.radio("範圍來源", [*PRESETS, "上傳 GeoJSON", "在地圖上繪製"], horizontal=True)
+
+geometry = None
+if source in PRESETS:
+    geometry = bbox_geometry(PRESETS[source])
+elif source == "上傳 GeoJSON":
+    uploaded = st.file_uploader("GeoJSON 檔 (Polygon / MultiPolygon，WGS84 經緯度)", type=["geojson", "json"])
+    if uploaded is not None:
+        try:
+            geometry = parse_geojson(uploaded.getvalue())
+        except ValueError as e:
+            st.error(f"無法讀取 GeoJSON：{e}")
+else:
+    try:
+        from folium.plugins import Draw
+        from streamlit_folium import st_folium
+    except ImportError:
+        st.info("在地圖上繪製需要安裝 streamlit-folium；也可以改用上傳 GeoJSON。")
+    else:
+        draw_map = geemap.Map(center=[23.0, 120.3], zoom=10)
+        Draw(draw_options={"polyline": False, "circle": False, "marker": False, "circlemarker": False}).add_to(draw_map)
+        drawn = st_folium(draw_map, height=450, use_container_width=True, returned_objects=["all_drawings"])
+        features = (drawn or {}).get("all_drawings") or []
+        if features:
+            geometry = parse_geojson({"type": "FeatureCollection", "features": features})
+
+if geometry is None:
+    st.stop()
+
+col_year, col_season, col_scale = st.columns(3)
+with col_year:
+    year = st.selectbox("年份", list(range(date.today().year, FIRST_YEAR - 1, -1)), index=1)
+with col_season:
+    season = st.selectbox("期間", list(SEASONS))
+with col_scale:
+    scale = st.select_slider("解析度 (公尺)", options=[30, 60, 90], value=30)
+
+period = make_periods([year], season)[0]
+bbox = geometry_bbox(geometry)
+tiles = split_tiles(bbox, scale)
+st.caption(f"範圍 {bbox[0]:.3f}, {bbox[1]:.3f} – {bbox[2]:.3f}, {bbox[3]:.3f}，在 {scale} m 下切成 {len(tiles)} 個區塊")
+if len(tiles) > MAX_TILES:
+    st.warning(f"範圍太大 (超過 {MAX_TILES} 個區塊)，請縮小範圍或改用較粗的解析度。")
+    st.stop()
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_aoi_stats(geometry_json, start, end, scale):
+    return aoi_lst_stats(json.loads(geometry_json), start, end, scale)
+
+started = time.perf_counter()
+with st.spinner(f"平行計算 {len(tiles)} 個區塊的 NDVI 與 LST..."):
+    stats = get_aoi_stats(json.dumps(geometry, sort_keys=True), period.start, period.end, scale)
+elapsed = time.perf_counter() - started
+
+if not stats:
+    st.warning(f"{period.label} 在此範圍內沒有未被雲遮蔽的 Landsat 8 像素。")
+    st.stop()
+
+# --- 統計表 ---
+st.write(f"### {period.label} 統計")
+st.caption(f"{len(tiles)} 個區塊合併，耗時 {elapsed:.1f} 秒 (快取命中時幾乎為零)")
+names = {"NDVI": "NDVI", "LST": "LST (°C)"}
+st.dataframe(
+    [
+        {
+            "指標": names[band],
+            "像素數": summary["count"],
+            "平均": summary["mean"],
+            "最小值": summary["min"],
+            "P10": summary["p10"],
+            "中位數": summary["p50"],
+            "P90": summary["p90"],
+            "最大值": summary["max"],
+        }
+        for band, summary in stats.items()
+    ],
+    width="stretch",
+)
+
+col_ndvi, col_lst = st.columns(2)
+for col, band, (low, high) in ((col_ndvi, "NDVI", (-0.2, 1.0)), (col_lst, "LST", (10.0, 55.0))):
+    summary = stats[band]
+    if not summary["histogram"]:
+        continue
+    # 只畫常見的數值範圍，兩端幾乎沒有像素的分箱省略
+    shown = [(round(e, 3), n) for e, n in zip(histogram_bins(band), summary["histogram"]) if low <= e < high]
+    with col:
+        st.write(f"**{names[band]} 直方圖**")
+        st.bar_chart({"值": [e for e, _ in shown], "像素數": [n for _, n in shown]}, x="值", y="像素數")
+
+# --- 地圖 ---
+# 圖磚由 Earth Engine 依畫面範圍產生，不受 AOI 大小影響；FV / EM 使用上面合併出的 NDVI 極值
+aoi = to_ee(geometry)
+result = aoi_lst(geometry, period.start, period.end, stats["NDVI"]["min"], stats["NDVI"]["max"], scale)
+center = [(bbox[1] + bbox[3]) / 2, (bbox[0] + bbox[2]) / 2]
+Map = geemap.Map(center=center, zoom=10)
+add_ee_layer(Map, result.ndvi.clip(aoi), NDVI_VIS, f"{period.label} NDVI", shown=False)
+# 色階依此範圍的 LST P10 / P90 拉伸
+lst_low, lst_high = stats["LST"]["p10"], stats["LST"]["p90"]
+lst_vis = dict(LST_VIS, min=round(lst_low, 1), max=round(lst_high, 1)) if lst_low is not None else LST_VIS
+add_ee_layer(Map, result.lst.clip(aoi), lst_vis, f"{period.label} 地表溫度 (LST)")
+add_aoi_geometry(Map, geometry)
+Map.add_layer_control()
+render_map(Map, height=600, name="aoi")
+
+st.write("---")
+st.write("數據來源：Landsat 8 Collection 2 Tier 1 Level 2")
+
+# --- 除錯：Earth Engine 呼叫紀錄 (側邊欄勾選或網址加上 ?debug=1) ---
+debug_sidebar()
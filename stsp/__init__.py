@@ -0,0 +1,2 @@
+# 南科專題共用模組：各頁面共用的 Earth Engine 處理流程放在這裡，
+# 頁面本身只負責版面與顯示。
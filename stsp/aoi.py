@@ -0,0 +1,221 @@
+import json
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+import ee
+
+from stsp.ee_cache import get_info
+from stsp.lst import build_composite, derive_lst
+
+# --- 使用者自訂 AOI 的分塊平行統計 ---
+# 各頁面的 AOI 都是寫死的小矩形，所有統計都是單一 reduceRegion (scale=30, maxPixels=1e9)；
+# 把範圍放大到整個台南市時，不是超過 maxPixels，就是一個跑很久的序列呼叫。
+# 這裡把任意 AOI (上傳或繪製的 GeoJSON) 依像素數自動切成子區塊，各區塊各送一次
+# reduceRegion 平行計算，回傳可合併的部分結果 (像素數、總和、最小 / 最大值、固定分箱直方圖)，
+# 在本機合併成整個 AOI 的統計值。
+#
+# 合併結果與單次計算完全相同的條件：
+#   - 區塊邊界對齊像素格線 (EPSG:4326，crsTransform 以 AOI 西北角為原點)，
+#     每個像素的中心只會落在一個區塊內，不會重複或遺漏
+#   - 總和與直方圖使用 unweighted，不依像素被邊界切到的比例加權
+# 百分位數由合併後的直方圖內插，精度為一個分箱寬度 (NDVI 0.01、LST 0.25 °C)。
+
+# 每個區塊 TILE_PX × TILE_PX 個像素 (30 m 時約 30 km 見方)
+TILE_PX = 1024
+# 超過此數量的區塊請改用較粗的解析度
+MAX_TILES = 64
+MAX_WORKERS = 8
+# 波段 -> (直方圖下限, 上限, 分箱數)；超出範圍的像素不列入直方圖
+HISTOGRAMS = {
+    "NDVI": (-1.0, 1.0, 200),
+    "LST": (-20.0, 80.0, 400),
+}
+PERCENTILES = (10, 50, 90)
+METRES_PER_DEGREE = 111320.0
+
+
+# --- AOI 解析 ---
+def parse_geojson(text):
+    # 接受 FeatureCollection / Feature / Polygon / MultiPolygon，合併成一個 MultiPolygon
+    data = json.loads(text) if isinstance(text, (str, bytes)) else text
+    if data.get("type") == "FeatureCollection":
+        geometries = [f.get("geometry") for f in data.get("features", [])]
+    elif data.get("type") == "Feature":
+        geometries = [data.get("geometry")]
+    else:
+        geometries = [data]
+    polygons = []
+    for geometry in geometries:
+        if not geometry:
+            continue
+        if geometry.get("type") == "Polygon":
+            polygons.append(geometry["coordinates"])
+        elif geometry.get("type") == "MultiPolygon":
+            polygons.extend(geometry["coordinates"])
+    if not polygons:
+        raise ValueError("GeoJSON 中沒有多邊形 (Polygon / MultiPolygon)")
+    return {"type": "MultiPolygon", "coordinates": polygons}
+
+
+def bbox_geometry(bbox):
+    west, south, east, north = bbox
+    ring = [[west, south], [east, south], [east, north], [west, north], [west, south]]
+    return {"type": "MultiPolygon", "coordinates": [[ring]]}
+
+
+def geometry_bbox(geometry):
+    points = [p for polygon in geometry["coordinates"] for ring in polygon for p in ring]
+    lons = [p[0] for p in points]
+    lats = [p[1] for p in points]
+    return (min(lons), min(lats), max(lons), max(lats))
+
+
+def to_ee(geometry):
+    # 平面 (非測地線) 邊，與對齊格線的矩形區塊一致
+    return ee.Geometry(geometry, None, False)
+
+
+# --- 分塊 ---
+def pixel_size(bbox, scale):
+    # AOI 中心緯度下，scale 公尺對應的經緯度像素大小
+    lat = math.radians((bbox[1] + bbox[3]) / 2)
+    dy = scale / METRES_PER_DEGREE
+    return dy / math.cos(lat), dy
+
+
+def crs_transform(bbox, scale):
+    dx, dy = pixel_size(bbox, scale)
+    return [dx, 0, bbox[0], 0, -dy, bbox[3]]
+
+
+def split_tiles(bbox, scale, tile_px=TILE_PX):
+    # 以像素為單位切塊，區塊邊界落在像素邊緣上
+    west, south, east, north = bbox
+    dx, dy = pixel_size(bbox, scale)
+    cols = math.ceil((east - west) / dx)
+    rows = math.ceil((north - south) / dy)
+    tiles = []
+    for row in range(0, rows, tile_px):
+        for col in range(0, cols, tile_px):
+            tiles.append((
+                west + col * dx,
+                north - min(row + tile_px, rows) * dy,
+                west + min(col + tile_px, cols) * dx,
+                north - row * dy,
+            ))
+    return tiles
+
+
+# --- 可合併的部分結果 ---
+def partial_reducer(low, high, bins):
+    return (
+        ee.Reducer.count()
+        .combine(ee.Reducer.sum().unweighted(), sharedInputs=True)
+        .combine(ee.Reducer.minMax(), sharedInputs=True)
+        .combine(ee.Reducer.fixedHistogram(low, high, bins).unweighted(), sharedInputs=True)
+    )
+
+
+def tile_graph(images, aoi, tile, transform):
+    # images: 波段名稱 -> 單波段 ee.Image；各波段的直方圖範圍不同，分別 reduce 後合併成一個字典
+    region = ee.Geometry.Rectangle(list(tile), None, False).intersection(aoi, ee.ErrorMargin(1))
+    stats = None
+    for band, image in images.items():
+        part = image.rename(band).reduceRegion(
+            reducer=partial_reducer(*HISTOGRAMS[band]),
+            geometry=region,
+            crs="EPSG:4326",
+            crsTransform=transform,
+            maxPixels=1e9,
+            tileScale=4,
+        )
+        stats = part if stats is None else stats.combine(part)
+    return stats
+
+
+def reduce_tiles(images, aoi, tiles, transform, max_workers=MAX_WORKERS):
+    # 各區塊的 getInfo 屬於 I/O 等待，以執行緒池同時送出；
+    # 跨 session 的併發上限與配額錯誤重試由 ee_cache 的協調器處理
+    graphs = [tile_graph(images, aoi, tile, transform) for tile in tiles]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(graphs))) as pool:
+        return list(pool.map(get_info, graphs))
+
+
+def merge_partials(partials, band):
+    count, total, low, high, histogram = 0, 0.0, None, None, None
+    for partial in partials:
+        n = partial.get(f"{band}_count") or 0
+        if not n:
+            # 區塊與 AOI 沒有交集，或整塊被雲遮住
+            continue
+        count += n
+        total += partial[f"{band}_sum"]
+        low = partial[f"{band}_min"] if low is None else min(low, partial[f"{band}_min"])
+        high = partial[f"{band}_max"] if high is None else max(high, partial[f"{band}_max"])
+        counts = [row[1] for row in partial.get(f"{band}_histogram") or []]
+        if counts:
+            histogram = counts if histogram is None else [a + b for a, b in zip(histogram, counts)]
+    return {"count": count, "sum": total, "min": low, "max": high, "histogram": histogram}
+
+
+def histogram_percentile(counts, low, high, q):
+    total = sum(counts)
+    if not total:
+        return None
+    width = (high - low) / len(counts)
+    target = total * q / 100
+    seen = 0
+    for i, n in enumerate(counts):
+        if n and seen + n >= target:
+            return low + width * (i + (target - seen) / n)
+        seen += n
+    return high
+
+
+def summarize(merged, band):
+    low, high, _ = HISTOGRAMS[band]
+    summary = {
+        "count": merged["count"],
+        "mean": merged["sum"] / merged["count"] if merged["count"] else None,
+        "min": merged["min"],
+        "max": merged["max"],
+    }
+    for q in PERCENTILES:
+        summary[f"p{q}"] = histogram_percentile(merged["histogram"], low, high, q) if merged["histogram"] else None
+    summary["histogram"] = merged["histogram"]
+    return summary
+
+
+# --- NDVI / LST ---
+def aoi_lst(geometry, start_date, end_date, ndvi_min, ndvi_max, scale=30):
+    # 以已知的 NDVI 極值建 LST 運算圖；地圖圖層與第二輪統計共用
+    _, composite = build_composite(start_date, end_date, geometry_bbox(geometry))
+    return derive_lst(to_ee(geometry), composite, scale, ndvi_stats={"NDVI_min": ndvi_min, "NDVI_max": ndvi_max})
+
+
+def aoi_lst_stats(geometry, start_date, end_date, scale=30, max_workers=MAX_WORKERS):
+    # 兩輪平行計算：
+    #   1. 各區塊的 NDVI 部分結果，合併出整個 AOI 的 NDVI 極值 (最小 / 最大值的合併是精確的)
+    #   2. 以這組極值推算 FV / EM / LST，再算各區塊的 LST 部分結果
+    # 若直接使用 derive_lst 的伺服器端極值，每個區塊都會重算一次整個 AOI 的 reduceRegion
+    bbox = geometry_bbox(geometry)
+    tiles = split_tiles(bbox, scale)
+    if len(tiles) > MAX_TILES:
+        raise ValueError(f"AOI 在 {scale} m 解析度下需要 {len(tiles)} 個區塊，請縮小範圍或改用較粗的解析度")
+    transform = crs_transform(bbox, scale)
+    aoi = to_ee(geometry)
+    _, composite = build_composite(start_date, end_date, bbox)
+    ndvi = composite.normalizedDifference(['nir', 'red'])
+
+    ndvi_stats = merge_partials(reduce_tiles({"NDVI": ndvi}, aoi, tiles, transform, max_workers), "NDVI")
+    if not ndvi_stats["count"]:
+        return {}
+    result = aoi_lst(geometry, start_date, end_date, ndvi_stats["min"], ndvi_stats["max"], scale)
+    lst_stats = merge_partials(reduce_tiles({"LST": result.lst}, aoi, tiles, transform, max_workers), "LST")
+    return {"NDVI": summarize(ndvi_stats, "NDVI"), "LST": summarize(lst_stats, "LST")}
+
+
+def histogram_bins(band):
+    low, high, bins = HISTOGRAMS[band]
+    width = (high - low) / bins
+    return [low + i * width for i in range(bins)]
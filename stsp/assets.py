@@ -0,0 +1,164 @@
+import argparse
+import hashlib
+import html
+import json
+import re
+from pathlib import Path
+
+# --- 靜態圖片資產 ---
+# 頁面原本把數 MB 的 PNG / GIF 直接丟給 st.image，或每次從 raw.githubusercontent.com 熱連結截圖。
+# build 步驟為每張被引用的圖片產生多種寬度、以內容雜湊命名的 WebP / JPEG，
+# 放在 static/assets/ 由 Streamlit 靜態服務 (enableStaticServing) 提供；
+# 頁面改用 show_image()，依欄寬挑選尺寸，折疊線以下的圖片延遲載入。
+#
+#   python -m stsp.assets build      產生縮圖與 manifest.json
+#   python -m stsp.assets check      檢查頁面引用的圖片是否都存在
+
+ROOT = Path(__file__).resolve().parent.parent
+STATIC_DIR = ROOT / "static" / "assets"
+STATIC_URL = "app/static/assets"
+MANIFEST = STATIC_DIR / "manifest.json"
+WIDTHS = (480, 960, 1600)
+SOURCES = [ROOT / "app.py", *sorted((ROOT / "pages").glob("*.py"))]
+
+# show_image("檔名", ...) 與 st.image("檔名", ...) 的第一個字串參數
+IMAGE_REF = re.compile(r"""(?:show_image|st\.image)\(\s*["']([^"']+)["']""")
+
+
+def referenced_images(sources=SOURCES):
+    refs = {}
+    for source in sources:
+        for name in IMAGE_REF.findall(source.read_text(encoding="utf-8")):
+            if not name.startswith(("http://", "https://")):
+                refs.setdefault(name, []).append(source.name)
+    return refs
+
+
+def validate(sources=SOURCES):
+    # 回傳 {檔名: 問題}；檔案不存在或內容不是圖片 (例如 2 bytes 的空檔) 都算
+    problems = {}
+    for name, pages in referenced_images(sources).items():
+        path = ROOT / name
+        if not path.exists():
+            problems[name] = f"檔案不存在 (引用於 {', '.join(pages)})"
+        elif path.stat().st_size < 64:
+            problems[name] = f"檔案只有 {path.stat().st_size} bytes (引用於 {', '.join(pages)})"
+    return problems
+
+
+def content_hash(path):
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()[:10]
+
+
+def build_variants(name, widths=WIDTHS, out_dir=STATIC_DIR):
+    from PIL import Image, ImageSequence
+
+    path = ROOT / name
+    digest = content_hash(path)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with Image.open(path) as img:
+        animated = getattr(img, "is_animated", False)
+        src_w, src_h = img.size
+        targets = sorted({w for w in widths if w < src_w} | {min(src_w, max(widths))})
+        variants = []
+        for width in targets:
+            height = round(src_h * width / src_w)
+            entry = {"width": width, "height": height}
+            webp = out_dir / f"{digest}-{width}.webp"
+            if animated:
+                # 動態 GIF 轉為動態 WebP，保留每格的顯示時間
+                frames = [f.convert("RGBA").resize((width, height), Image.LANCZOS)
+                          for f in ImageSequence.Iterator(img)]
+                if not webp.exists():
+                    frames[0].save(webp, save_all=True, append_images=frames[1:],
+                                   duration=img.info.get("duration", 100),
+                                   loop=img.info.get("loop", 0), quality=80)
+            else:
+                frame = img.convert("RGB").resize((width, height), Image.LANCZOS)
+                if not webp.exists():
+                    frame.save(webp, quality=82, method=6)
+                jpeg = out_dir / f"{digest}-{width}.jpg"
+                if not jpeg.exists():
+                    frame.save(jpeg, quality=82, optimize=True, progressive=True)
+                entry["jpeg"] = jpeg.name
+            entry["webp"] = webp.name
+            variants.append(entry)
+    return {"hash": digest, "animated": animated, "variants": variants}
+
+
+def build(widths=WIDTHS):
+    manifest = {}
+    for name in referenced_images():
+        path = ROOT / name
+        if path.exists() and path.stat().st_size >= 64:
+            manifest[name] = build_variants(name, widths)
+    STATIC_DIR.mkdir(parents=True, exist_ok=True)
+    MANIFEST.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    return manifest
+
+
+def load_manifest():
+    if not MANIFEST.exists():
+        return {}
+    return json.loads(MANIFEST.read_text(encoding="utf-8"))
+
+
+# --- 頁面輔助函數 ---
+def image_html(entry, caption="", display_width=None, lazy=False):
+    variants = entry["variants"]
+    largest = variants[-1]
+    sizes = f"{display_width}px" if display_width else "100vw"
+    style = f"max-width:{display_width}px;width:100%" if display_width else "width:100%"
+    webp_set = ", ".join(f"{STATIC_URL}/{v['webp']} {v['width']}w" for v in variants)
+    fallback = largest.get("jpeg", largest["webp"])
+    if "jpeg" in largest:
+        jpeg_set = ", ".join(f"{STATIC_URL}/{v['jpeg']} {v['width']}w" for v in variants)
+        jpeg_source = f'<source type="image/jpeg" srcset="{jpeg_set}" sizes="{sizes}">'
+    else:
+        jpeg_source = ""
+    alt = html.escape(caption)
+    return (
+        "<figure style=\"margin:0\"><picture>"
+        f'<source type="image/webp" srcset="{webp_set}" sizes="{sizes}">'
+        f"{jpeg_source}"
+        f'<img src="{STATIC_URL}/{fallback}" alt="{alt}" style="{style};height:auto" '
+        f'width="{largest["width"]}" height="{largest["height"]}" '
+        f'loading="{"lazy" if lazy else "eager"}" decoding="async">'
+        "</picture>"
+        + (f'<figcaption style="text-align:center;color:gray;font-size:0.9em">{alt}</figcaption>' if caption else "")
+        + "</figure>"
+    )
+
+
+def show_image(name, caption="", width=None, lazy=False):
+    import streamlit as st
+
+    entry = load_manifest().get(name)
+    if entry is not None:
+        st.markdown(image_html(entry, caption, width, lazy), unsafe_allow_html=True)
+        return
+    path = ROOT / name
+    if not path.exists() or path.stat().st_size < 64:
+        st.warning(f"找不到圖片：{name}")
+        return
+    # 尚未執行 build 時退回原始檔
+    st.image(str(path), caption=caption or None, width=width if width is not None else "stretch")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="南科頁面圖片資產")
+    parser.add_argument("command", choices=["build", "check"])
+    args = parser.parse_args(argv)
+
+    problems = validate()
+    for name, problem in problems.items():
+        print(f"[missing] {name}: {problem}")
+    if args.command == "build":
+        for name, entry in build().items():
+            widths = ", ".join(str(v["width"]) for v in entry["variants"])
+            print(f"[built] {name} -> {entry['hash']} ({widths})")
+    raise SystemExit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import streamlit as st
+
+# --- Earth Engine 共用啟動 ---
+# 原本每個地圖頁在模組頂層各自解析憑證並呼叫 ee.Initialize，每次 rerun 都重跑一次，
+# 土地覆蓋頁甚至初始化兩次並讀取寫死的 Windows 金鑰路徑。這裡改為每個行程只初始化一次
+# (st.cache_resource)，憑證來源統一為：
+#   1. st.secrets["GEE_SERVICE_ACCOUNT"] (JSON 字串或 TOML 表格)
+#   2. 環境變數 GEE_SERVICE_ACCOUNT (JSON 字串) 或 GOOGLE_APPLICATION_CREDENTIALS (金鑰檔路徑)
+#   3. `earthengine authenticate` 產生的本機預設憑證
+# ee / geemap / folium 只在地圖頁呼叫 init_ee() 時才載入，純文字頁不付出匯入成本。
+
+EE_SCOPES = ["https://www.googleapis.com/auth/earthengine"]
+
+_timings = {}
+
+
+def service_account_info():
+    try:
+        raw = st.secrets["GEE_SERVICE_ACCOUNT"]
+    except (KeyError, FileNotFoundError):
+        raw = os.environ.get("GEE_SERVICE_ACCOUNT")
+    if raw is None:
+        return None
+    # 嘗試將其解析為 JSON，如果失敗，則假設它已經是字典 (AttrDict)
+    if isinstance(raw, str):
+        return json.loads(raw)
+    return dict(raw)
+
+
+def load_credentials():
+    from google.oauth2 import service_account
+
+    info = service_account_info()
+    if info is not None:
+        return service_account.Credentials.from_service_account_info(info, scopes=EE_SCOPES)
+    key_file = os.environ.get("GOOGLE_APPLICATION_CREDENTIALS")
+    if key_file:
+        return service_account.Credentials.from_service_account_file(key_file, scopes=EE_SCOPES)
+    return None
+
+
+@st.cache_resource(show_spinner=False)
+def _initialize():
+    start = time.perf_counter()
+    import ee
+    _timings["import_ee"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    credentials = load_credentials()
+    if credentials is None:
+        ee.Initialize()
+    else:
+        ee.Initialize(credentials)
+    _timings["initialize"] = time.perf_counter() - start
+    return ee
+
+
+def init_ee():
+    start = time.perf_counter()
+    try:
+        ee = _initialize()
+    except Exception as e:
+        st.error(f"初始化 Google Earth Engine 失敗: {e}")
+        st.info("請確認你的 Streamlit Secrets 中已正確設定 'GEE_SERVICE_ACCOUNT'，並確認其為有效的 JSON 格式或已正確載入。")
+        st.stop()
+    # 第一次之後只剩查快取的時間
+    _timings["last_rerun"] = time.perf_counter() - start
+    return ee
+
+
+def load_geemap():
+    start = time.perf_counter()
+    import geemap.foliumap as geemap
+    _timings.setdefault("import_geemap", time.perf_counter() - start)
+    return geemap
+
+
+def bootstrap_timings():
+    return dict(_timings)
+
+
+# --- 冷啟動量測 ---
+# 每個模組在全新的 Python 行程中匯入，量測實際的冷啟動成本
+MEASURED_IMPORTS = ["streamlit", "ee", "folium", "geemap.foliumap"]
+
+
+def measure_imports(modules=MEASURED_IMPORTS, repeat=3):
+    results = {}
+    for module in modules:
+        code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+        samples = []
+        for _ in range(repeat):
+            out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+            if out.returncode != 0:
+                samples = None
+                break
+            samples.append(float(out.stdout.strip()))
+        results[module] = min(samples) if samples else None
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="量測地圖頁相依套件的冷啟動匯入時間")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+    for module, seconds in measure_imports(repeat=args.repeat).items():
+        print(f"{module:20s} {'not installed' if seconds is None else f'{seconds * 1000:8.1f} ms'}")
+
+
+if __name__ == "__main__":
+    main()
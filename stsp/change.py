@@ -0,0 +1,296 @@
+import argparse
+import io
+import json
+import math
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from stsp.ee_cache import CACHE_DIR, download_url
+
+# --- 兩年份的像素級變遷偵測 ---
+# 比較頁原本只有左右滑動，路網與建物的結論是目視判斷。這裡把兩個年份的合成影像
+# 以固定的像素網格分塊下載到磁碟 (np.memmap)，再逐塊以 NumPy 計算 NDVI / NDBI 差值
+# 與分類轉移矩陣。任一時刻記憶體中只有一塊資料，AOI 變大或改用 10 m 的 Sentinel-2
+# 時只會多幾塊，不需要把整張影像載入 RAM。
+
+CHANGE_DIR = CACHE_DIR / "change"
+DOWNLOAD_BANDS = ['green', 'red', 'nir', 'swir1']
+# 每次 getDownloadURL 的圖塊大小 (像素)，需低於 Earth Engine 的下載上限
+TILE_PX = 512
+# 本機處理時每塊的列數；記憶體用量約為 CHUNK_ROWS × 寬度 × 波段數 × 4 bytes
+CHUNK_ROWS = 256
+MAX_WORKERS = 4
+# |ΔNDVI| / |ΔNDBI| 超過門檻才視為變化
+NDVI_THRESHOLD = 0.2
+NDBI_THRESHOLD = 0.1
+PREVIEW_PX = 512
+# 下載時被遮罩的像素填入此值，寫入磁碟時改為 NaN
+NODATA = -9999.0
+
+
+# --- 像素網格 ---
+# 兩個年份都下載到同一個網格上，逐像素相減時不需要重新取樣
+@dataclass(frozen=True)
+class PixelGrid:
+    bbox: tuple
+    scale: int
+    rows: int
+    cols: int
+    dlon: float
+    dlat: float
+
+    def window_bbox(self, r0, c0, r1, c1):
+        west, _, _, north = self.bbox
+        return (west + c0 * self.dlon, north - r1 * self.dlat,
+                west + c1 * self.dlon, north - r0 * self.dlat)
+
+    @property
+    def pixel_area_ha(self):
+        return self.scale * self.scale / 10000
+
+
+def pixel_grid(bbox, scale=30):
+    west, south, east, north = bbox
+    mid_lat = math.radians((south + north) / 2)
+    dlat = scale / 110574.0
+    dlon = scale / (111320.0 * math.cos(mid_lat))
+    rows = max(1, math.ceil((north - south) / dlat))
+    cols = max(1, math.ceil((east - west) / dlon))
+    return PixelGrid(tuple(bbox), scale, rows, cols, dlon, dlat)
+
+
+def tile_windows(grid, tile=TILE_PX):
+    return [
+        (r0, c0, min(r0 + tile, grid.rows), min(c0 + tile, grid.cols))
+        for r0 in range(0, grid.rows, tile)
+        for c0 in range(0, grid.cols, tile)
+    ]
+
+
+# --- 分塊下載到磁碟 ---
+def raster_dir(year, grid, sensor):
+    west, south, east, north = grid.bbox
+    return CHANGE_DIR / f"{year}_{sensor}_{grid.scale}m_{west:.4f}_{south:.4f}_{east:.4f}_{north:.4f}"
+
+
+def open_raster(directory, bands, mode="r"):
+    directory = Path(directory)
+    return {band: np.load(directory / f"{band}.npy", mmap_mode=mode) for band in bands}
+
+
+def download_raster(image, bands, grid, directory, max_workers=MAX_WORKERS):
+    import ee
+
+    directory = Path(directory)
+    if (directory / "complete.json").exists():
+        return directory
+    directory.mkdir(parents=True, exist_ok=True)
+    for band in bands:
+        out = np.lib.format.open_memmap(
+            directory / f"{band}.npy", mode="w+", dtype=np.float32, shape=(grid.rows, grid.cols)
+        )
+        out[:] = np.nan
+        out.flush()
+        del out
+    targets = open_raster(directory, bands, mode="r+")
+    image = image.select(list(bands)).toFloat().unmask(NODATA)
+
+    def fetch(window):
+        r0, c0, r1, c1 = window
+        url = download_url(image, {
+            'format': 'NPY',
+            'region': ee.Geometry.Rectangle(list(grid.window_bbox(r0, c0, r1, c1)), None, False),
+            'dimensions': f"{c1 - c0}x{r1 - r0}",
+            'crs': 'EPSG:4326',
+        })
+        with urllib.request.urlopen(url) as resp:
+            data = np.load(io.BytesIO(resp.read()))
+        # 每個圖塊各寫入自己的視窗，不同執行緒不會寫到同一塊
+        for band in bands:
+            values = np.asarray(data[band], dtype=np.float32)[: r1 - r0, : c1 - c0]
+            values[values == NODATA] = np.nan
+            targets[band][r0:r0 + values.shape[0], c0:c0 + values.shape[1]] = values
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        list(pool.map(fetch, tile_windows(grid)))
+    for array in targets.values():
+        array.flush()
+    (directory / "complete.json").write_text(json.dumps({
+        "bbox": grid.bbox, "scale": grid.scale, "rows": grid.rows, "cols": grid.cols, "bands": list(bands),
+    }))
+    return directory
+
+
+def fetch_year(year, grid, sensor="landsat", classify=True):
+    from stsp.composites import composite
+    from stsp.landcover import classify_years
+
+    image = composite(year, grid.bbox, sensor=sensor)
+    bands = list(DOWNLOAD_BANDS)
+    if classify:
+        image = image.addBands(classify_years({year: image})[year])
+        bands.append('class')
+    return download_raster(image, bands, grid, raster_dir(year, grid, sensor))
+
+
+# --- 逐塊計算 ---
+def normalized_difference(a, b):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (a - b) / (a + b)
+
+
+@dataclass
+class ChangeSummary:
+    shape: tuple
+    pixel_area_ha: float
+    valid_pixels: int
+    # transitions[i, j]：前一年為類別 i、後一年為類別 j 的像素數
+    transitions: np.ndarray
+    ndvi_gain_pixels: int
+    ndvi_loss_pixels: int
+    builtup_gain_pixels: int
+    builtup_loss_pixels: int
+    mean_dndvi: float
+    mean_dndbi: float
+    # 抽樣後的 ΔNDVI，供頁面預覽
+    preview: np.ndarray
+
+    def area(self, pixels):
+        return pixels * self.pixel_area_ha
+
+    @property
+    def transition_areas(self):
+        return self.transitions * self.pixel_area_ha
+
+
+def change_summary(before, after, n_classes=0, chunk_rows=CHUNK_ROWS, pixel_area_ha=0.09,
+                   preview_px=PREVIEW_PX):
+    # before / after 為 {波段: 2D 陣列}，通常是 open_raster 的 memmap；逐列分塊讀取
+    rows, cols = before['red'].shape
+    stride = max(1, math.ceil(max(rows, cols) / preview_px))
+    transitions = np.zeros((n_classes, n_classes), dtype=np.int64)
+    counts = {"valid": 0, "ndvi_gain": 0, "ndvi_loss": 0, "builtup_gain": 0, "builtup_loss": 0}
+    sum_dndvi = 0.0
+    sum_dndbi = 0.0
+    preview = []
+    for r0 in range(0, rows, chunk_rows):
+        r1 = min(r0 + chunk_rows, rows)
+        a = {band: np.asarray(before[band][r0:r1], dtype=np.float32) for band in DOWNLOAD_BANDS}
+        b = {band: np.asarray(after[band][r0:r1], dtype=np.float32) for band in DOWNLOAD_BANDS}
+        dndvi = normalized_difference(b['nir'], b['red']) - normalized_difference(a['nir'], a['red'])
+        dndbi = normalized_difference(b['swir1'], b['nir']) - normalized_difference(a['swir1'], a['nir'])
+        valid = np.isfinite(dndvi) & np.isfinite(dndbi)
+
+        counts["valid"] += int(valid.sum())
+        counts["ndvi_gain"] += int((valid & (dndvi > NDVI_THRESHOLD)).sum())
+        counts["ndvi_loss"] += int((valid & (dndvi < -NDVI_THRESHOLD)).sum())
+        counts["builtup_gain"] += int((valid & (dndbi > NDBI_THRESHOLD)).sum())
+        counts["builtup_loss"] += int((valid & (dndbi < -NDBI_THRESHOLD)).sum())
+        sum_dndvi += float(dndvi[valid].sum())
+        sum_dndbi += float(dndbi[valid].sum())
+
+        if n_classes:
+            ca = np.asarray(before['class'][r0:r1])
+            cb = np.asarray(after['class'][r0:r1])
+            both = np.isfinite(ca) & np.isfinite(cb)
+            pairs = ca[both].astype(np.int64) * n_classes + cb[both].astype(np.int64)
+            transitions += np.bincount(pairs, minlength=n_classes * n_classes).reshape(n_classes, n_classes)
+
+        # 預覽只保留每 stride 列 / 行的一個像素，列的相位以整張影像為準
+        preview.append(dndvi[(-r0) % stride::stride, ::stride])
+
+    valid = max(counts["valid"], 1)
+    return ChangeSummary(
+        shape=(rows, cols),
+        pixel_area_ha=pixel_area_ha,
+        valid_pixels=counts["valid"],
+        transitions=transitions,
+        ndvi_gain_pixels=counts["ndvi_gain"],
+        ndvi_loss_pixels=counts["ndvi_loss"],
+        builtup_gain_pixels=counts["builtup_gain"],
+        builtup_loss_pixels=counts["builtup_loss"],
+        mean_dndvi=sum_dndvi / valid,
+        mean_dndbi=sum_dndbi / valid,
+        preview=np.concatenate(preview) if preview else np.empty((0, 0), dtype=np.float32),
+    )
+
+
+def detect_change(before_year, after_year, bbox, scale=30, sensors=("landsat", "landsat"),
+                  classify=True, chunk_rows=CHUNK_ROWS):
+    from stsp.landcover import CLASSES
+
+    grid = pixel_grid(bbox, scale)
+    # 兩年份同時下載，彼此獨立
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        dirs = list(pool.map(
+            lambda year, sensor: fetch_year(year, grid, sensor, classify),
+            (before_year, after_year),
+            sensors,
+        ))
+    bands = DOWNLOAD_BANDS + (['class'] if classify else [])
+    return change_summary(
+        open_raster(dirs[0], bands),
+        open_raster(dirs[1], bands),
+        n_classes=len(CLASSES) if classify else 0,
+        chunk_rows=chunk_rows,
+        pixel_area_ha=grid.pixel_area_ha,
+    )
+
+
+# --- 輸出 ---
+def transition_rows(summary, class_names, min_ha=0.0):
+    # 只列出類別有改變、且面積超過 min_ha 的轉移，依面積排序
+    areas = summary.transition_areas
+    rows = [
+        {"原類別": class_names[i], "新類別": class_names[j], "面積 (公頃)": float(areas[i, j])}
+        for i in range(len(class_names))
+        for j in range(len(class_names))
+        if i != j and areas[i, j] > min_ha
+    ]
+    return sorted(rows, key=lambda r: r["面積 (公頃)"], reverse=True)
+
+
+def preview_rgb(dndvi, limit=0.5):
+    # ΔNDVI 上色：紅色為植被減少、綠色為植被增加、白色為無變化、灰色為無資料
+    t = np.clip(np.nan_to_num(dndvi, nan=0.0) / limit, -1.0, 1.0)
+    rgb = np.empty(t.shape + (3,), dtype=np.float32)
+    rgb[..., 0] = np.where(t < 0, 1.0, 1.0 - t)
+    rgb[..., 1] = np.where(t < 0, 1.0 + t, 1.0)
+    rgb[..., 2] = 1.0 - np.abs(t)
+    rgb[~np.isfinite(dndvi)] = 0.6
+    return (rgb * 255).astype(np.uint8)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="兩年份的像素級變遷偵測")
+    parser.add_argument("before", type=int)
+    parser.add_argument("after", type=int)
+    parser.add_argument("--scale", type=int, default=30)
+    parser.add_argument("--sensor", choices=["landsat", "sentinel2"], default="landsat")
+    parser.add_argument("--no-classify", action="store_true", help="只計算 NDVI / NDBI 差值")
+    args = parser.parse_args(argv)
+
+    import ee
+    from stsp.landcover import CLASS_NAMES
+    from stsp.timelapse import STSP_BBOX
+    ee.Initialize()
+    summary = detect_change(
+        args.before, args.after, STSP_BBOX, args.scale,
+        (args.sensor, args.sensor), classify=not args.no_classify,
+    )
+    print(json.dumps({
+        "valid_ha": summary.area(summary.valid_pixels),
+        "ndvi_gain_ha": summary.area(summary.ndvi_gain_pixels),
+        "ndvi_loss_ha": summary.area(summary.ndvi_loss_pixels),
+        "builtup_gain_ha": summary.area(summary.builtup_gain_pixels),
+        "builtup_loss_ha": summary.area(summary.builtup_loss_pixels),
+        "transitions": transition_rows(summary, CLASS_NAMES) if not args.no_classify else [],
+    }, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
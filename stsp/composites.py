@@ -0,0 +1,121 @@
+from functools import lru_cache
+
+import ee
+
+# --- 跨感測器的年度合成影像服務 ---
+# 比較頁、土地覆蓋頁、熱區頁與 timelapse 原本各自挑選感測器、處理比例係數與雲遮罩，
+# 波段名稱也不一致。這裡統一：
+#   - 依年份選擇感測器 (Landsat 5 / 7 / 8 / 9，或 2017 後的 Sentinel-2)
+#   - 套用比例係數與雲遮罩
+#   - 波段改名為 blue / green / red / nir / swir1 / swir2 (+ Landsat 的 thermal，單位 K)
+#   - 以 (年份, AOI, 季節, 感測器) 記憶合成影像，各頁面共用同一張運算圖
+
+COMMON_BANDS = ['blue', 'green', 'red', 'nir', 'swir1', 'swir2']
+TM_BANDS = ['SR_B1', 'SR_B2', 'SR_B3', 'SR_B4', 'SR_B5', 'SR_B7']
+OLI_BANDS = ['SR_B2', 'SR_B3', 'SR_B4', 'SR_B5', 'SR_B6', 'SR_B7']
+
+# 季節名稱 -> (起始月日, 結束月日)
+SEASONS = {
+    "全年": ("01-01", "12-31"),
+    "1–4 月 (乾季)": ("01-01", "04-30"),
+    "5–10 月 (雨季)": ("05-01", "10-31"),
+}
+
+SENSORS = ("landsat", "sentinel2")
+# 共同波段的真色顯示參數 (反射率 0–0.3)
+TRUE_COLOR_VIS = {'bands': ['red', 'green', 'blue'], 'min': 0.0, 'max': 0.3}
+FIRST_YEAR = 1984
+SENTINEL2_FIRST_YEAR = 2017
+
+
+def applyScaleFactors(image):
+    opticalBands = image.select('SR_B.').multiply(0.0000275).add(-0.2)
+    thermalBands = image.select('ST_B.*').multiply(0.00341802).add(149.0)
+    image = image.addBands(opticalBands, overwrite=True)
+    image = image.addBands(thermalBands, overwrite=True)
+    return image
+
+
+def cloudMask(image):
+    cloud_shadow_bitmask = (1 << 3)
+    cloud_bitmask = (1 << 5)
+    qa = image.select('QA_PIXEL')
+    mask = qa.bitwiseAnd(cloud_shadow_bitmask).eq(0).And(qa.bitwiseAnd(cloud_bitmask).eq(0))
+    return image.updateMask(mask)
+
+
+def landsat(collection_id, optical, thermal):
+    def harmonize(image):
+        image = cloudMask(applyScaleFactors(image))
+        return image.select(optical + [thermal], COMMON_BANDS + ['thermal'])
+
+    def build(start, end, region):
+        return (ee.ImageCollection(collection_id)
+                .filterBounds(region)
+                .filterDate(start, end)
+                .map(harmonize))
+    return build
+
+
+def sentinel2(start, end, region):
+    def harmonize(image):
+        scl = image.select('SCL')
+        # 3: 雲影、8/9: 雲、10: 卷雲
+        mask = scl.neq(3).And(scl.neq(8)).And(scl.neq(9)).And(scl.neq(10))
+        return (image.updateMask(mask)
+                .select(['B2', 'B3', 'B4', 'B8', 'B11', 'B12'], COMMON_BANDS)
+                .divide(10000))
+    return (ee.ImageCollection('COPERNICUS/S2_SR_HARMONIZED')
+            .filterBounds(region)
+            .filterDate(start, end)
+            .map(harmonize))
+
+
+L5 = landsat('LANDSAT/LT05/C02/T1_L2', TM_BANDS, 'ST_B6')
+L7 = landsat('LANDSAT/LE07/C02/T1_L2', TM_BANDS, 'ST_B6')
+L8 = landsat('LANDSAT/LC08/C02/T1_L2', OLI_BANDS, 'ST_B10')
+L9 = landsat('LANDSAT/LC09/C02/T1_L2', OLI_BANDS, 'ST_B10')
+BUILDERS = {"L5": L5, "L7": L7, "L8": L8, "L9": L9, "S2": sentinel2}
+
+
+def sensors_for(year, sensor="landsat"):
+    if sensor == "sentinel2" and year >= SENTINEL2_FIRST_YEAR:
+        return ("S2",)
+    if year <= 2011:
+        return ("L5",)
+    if year == 2012:
+        # Landsat 5 已停止、Landsat 8 尚未發射，只能用 SLC-off 的 Landsat 7
+        return ("L7",)
+    if year <= 2021:
+        return ("L8",)
+    return ("L8", "L9")
+
+
+def season_range(year, season="全年"):
+    start, end = SEASONS[season]
+    return f"{year}-{start}", f"{year}-{end}"
+
+
+@lru_cache(maxsize=256)
+def collection(start, end, bbox, sensors):
+    region = ee.Geometry.Rectangle(list(bbox))
+    merged = None
+    for name in sensors:
+        part = BUILDERS[name](start, end, region)
+        merged = part if merged is None else merged.merge(part)
+    return merged
+
+
+@lru_cache(maxsize=256)
+def range_composite(start, end, bbox, sensors):
+    return collection(start, end, bbox, sensors).median().clip(ee.Geometry.Rectangle(list(bbox)))
+
+
+def year_collection(year, bbox, season="全年", sensor="landsat"):
+    start, end = season_range(year, season)
+    return collection(start, end, tuple(bbox), sensors_for(year, sensor))
+
+
+def composite(year, bbox, season="全年", sensor="landsat"):
+    start, end = season_range(year, season)
+    return range_composite(start, end, tuple(bbox), sensors_for(year, sensor))
@@ -0,0 +1,203 @@
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+# --- Earth Engine 呼叫協調 ---
+# 多位觀看者同時開啟熱區頁時，每個 session 都會各自送出相同的 getInfo；st.cache_data 與
+# ee_cache 要等第一個呼叫完成後才有用，同時發生的未命中全部打到 Earth Engine，容易觸發配額錯誤。
+# 這裡提供跨 session、跨行程的協調 (狀態放在 SQLite，同一台主機上的多個 Streamlit 行程共用)：
+#   - single-flight：相同的運算圖同時只有一個呼叫在執行，其他請求等它寫入快取後直接讀取
+#   - 併發上限：同時進行中的 Earth Engine 呼叫不超過 STSP_EE_CONCURRENCY 個
+#   - 429 / 配額錯誤以指數退避加隨機抖動重試
+
+# lookup() 找不到快取時回傳此值；快取中的 None 是合法的結果
+MISS = object()
+
+MAX_CONCURRENT = int(os.environ.get("STSP_EE_CONCURRENCY", "8"))
+# 呼叫端當機時，租約過期後由其他請求接手
+LEASE_SECONDS = 300
+WAIT_POLL = 0.25
+MAX_ATTEMPTS = 6
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 30.0
+RETRYABLE = (
+    "429",
+    "too many requests",
+    "quota exceeded",
+    "too many concurrent",
+    "rate limit",
+    "resource_exhausted",
+)
+
+
+def is_retryable(error):
+    status = getattr(getattr(error, "resp", None), "status", None)
+    if status == 429:
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in RETRYABLE)
+
+
+def backoff(attempt, base=BACKOFF_BASE, cap=BACKOFF_CAP, rng=random):
+    # full jitter：0 到 min(cap, base·2^attempt) 之間的隨機秒數，避免所有請求同時重試
+    return rng.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class Coordinator:
+    def __init__(self, path, max_concurrent=MAX_CONCURRENT, lease=LEASE_SECONDS,
+                 max_attempts=MAX_ATTEMPTS, sleep=time.sleep):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_concurrent = max_concurrent
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.sleep = sleep
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.coalesced = 0
+        self.retries = 0
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._semaphore = threading.BoundedSemaphore(max_concurrent)
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        with self._db_lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS leases ("
+                " key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS slots ("
+                " slot INTEGER PRIMARY KEY, owner TEXT, expires REAL)"
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO slots (slot) VALUES (?)",
+                [(i,) for i in range(max_concurrent)],
+            )
+
+    # --- 跨行程租約 ---
+    def _acquire_lease(self, key):
+        now = time.time()
+        with self._db_lock, self._conn:
+            inserted = self._conn.execute(
+                "INSERT OR IGNORE INTO leases VALUES (?, ?, ?)",
+                (key, self.owner, now + self.lease),
+            ).rowcount
+            if inserted:
+                return True
+            # 原持有者的租約已過期 (例如行程當機)，接手
+            return self._conn.execute(
+                "UPDATE leases SET owner = ?, expires = ? WHERE key = ? AND expires < ?",
+                (self.owner, now + self.lease, key, now),
+            ).rowcount == 1
+
+    def _release_lease(self, key):
+        with self._db_lock, self._conn:
+            self._conn.execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, self.owner))
+
+    def _acquire_slot(self, token):
+        now = time.time()
+        with self._db_lock, self._conn:
+            row = self._conn.execute(
+                "SELECT slot FROM slots WHERE slot < ? AND (owner IS NULL OR expires < ?) LIMIT 1",
+                (self.max_concurrent, now),
+            ).fetchone()
+            if row is None:
+                return None
+            taken = self._conn.execute(
+                "UPDATE slots SET owner = ?, expires = ? WHERE slot = ? AND (owner IS NULL OR expires < ?)",
+                (token, now + self.lease, row[0], now),
+            ).rowcount
+        return row[0] if taken else None
+
+    def _release_slot(self, slot, token):
+        with self._db_lock, self._conn:
+            self._conn.execute(
+                "UPDATE slots SET owner = NULL, expires = NULL WHERE slot = ? AND owner = ?",
+                (slot, token),
+            )
+
+    @contextmanager
+    def slot(self):
+        # 先取得行程內的名額，再取得跨行程的名額
+        with self._semaphore:
+            token = f"{self.owner}-{threading.get_ident()}"
+            slot = self._acquire_slot(token)
+            while slot is None:
+                self.sleep(WAIT_POLL)
+                slot = self._acquire_slot(token)
+            try:
+                yield
+            finally:
+                self._release_slot(slot, token)
+
+    # --- 呼叫 ---
+    def call(self, compute):
+        # 限制併發並重試配額錯誤
+        for attempt in range(self.max_attempts):
+            with self.slot():
+                try:
+                    return compute()
+                except Exception as e:
+                    if not is_retryable(e) or attempt == self.max_attempts - 1:
+                        raise
+            self.retries += 1
+            self.sleep(backoff(attempt))
+
+    def single_flight(self, key, lookup, compute):
+        # lookup() 讀取快取 (MISS 表示沒有)；compute() 呼叫 Earth Engine 並寫入快取。
+        # 回傳 (值, 來源)，來源為 "hit"、"miss" 或 "coalesced" (等待其他請求的結果)
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = {"done": threading.Event(), "error": None}
+        if not leader:
+            # 同一行程內已有相同的呼叫，等它完成；失敗時拋出相同的錯誤
+            flight["done"].wait(self.lease)
+            if flight["error"] is not None:
+                raise flight["error"]
+            value = lookup()
+            if value is not MISS:
+                self.coalesced += 1
+                return value, "coalesced"
+            return self.single_flight(key, lookup, compute)
+        try:
+            return self._lead(key, lookup, compute)
+        except Exception as e:
+            flight["error"] = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight["done"].set()
+
+    def _lead(self, key, lookup, compute):
+        while not self._acquire_lease(key):
+            # 其他行程正在計算相同的運算圖
+            self.sleep(WAIT_POLL)
+            value = lookup()
+            if value is not MISS:
+                self.coalesced += 1
+                return value, "coalesced"
+        try:
+            # 取得租約前，其他行程可能剛好寫入結果
+            value = lookup()
+            if value is not MISS:
+                return value, "hit"
+            return self.call(compute), "miss"
+        finally:
+            self._release_lease(key)
+
+    def stats(self):
+        with self._db_lock:
+            busy = self._conn.execute(
+                "SELECT COUNT(*) FROM slots WHERE slot < ? AND owner IS NOT NULL AND expires >= ?",
+                (self.max_concurrent, time.time()),
+            ).fetchone()[0]
+        return {"coalesced": self.coalesced, "retries": self.retries, "busy_slots": busy}
+
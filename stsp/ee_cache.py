@@ -0,0 +1,213 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from stsp.coordinator import MISS, Coordinator
+
+# --- Earth Engine 結果的持久化快取 ---
+# st.cache_data 只存在單一行程內，重新部署後全部失效；而且快取 ee.Image
+# 代理物件並不會省下伺服器端的運算。這裡只快取「已取回」的結果：
+# getInfo 的值、getMapId 的圖磚網址、getThumbUrl 的縮圖網址與 getDownloadURL 的下載網址，
+# 以序列化後的 ee 運算圖雜湊作為鍵，存放在本機 SQLite 檔案中，
+# 並依 TTL 過期、依總大小以 LRU 淘汰。
+
+CACHE_DIR = Path(os.environ.get("STSP_CACHE_DIR", ".cache"))
+
+# 數值結果不會變動，保留較久；圖磚、縮圖與下載網址會在伺服器端過期，只保留數小時
+DEFAULT_TTL = {
+    "info": 30 * 24 * 3600,
+    "map": 4 * 3600,
+    "thumb": 4 * 3600,
+    "download": 4 * 3600,
+}
+MAX_BYTES = 64 * 1024 * 1024
+# 追蹤紀錄中使用的呼叫名稱
+TRACE_KINDS = {"info": "getInfo", "map": "getMapId", "thumb": "getThumbURL", "download": "getDownloadURL"}
+
+
+def _encode(value):
+    # params 中的 ee 物件 (例如縮圖的 region Geometry) 以運算圖序列化，
+    # 不依賴 str() 的輸出，相同的幾何在每次 rerun 都得到相同的鍵
+    serialize = getattr(value, "serialize", None)
+    return serialize() if callable(serialize) else str(value)
+
+
+def graph_key(kind, obj, params=None):
+    payload = json.dumps(
+        [kind, obj.serialize(), params],
+        sort_keys=True,
+        ensure_ascii=False,
+        default=_encode,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class EECache:
+    def __init__(self, path=None, max_bytes=MAX_BYTES, ttl=None, coordinator=None):
+        self.path = Path(path) if path else CACHE_DIR / "ee_cache.sqlite"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # 未命中時經由 coordinator 呼叫：相同運算圖只算一次、限制併發、重試配額錯誤
+        self.coordinator = coordinator or Coordinator(self.path.with_name("coordinator.sqlite"))
+        self.max_bytes = max_bytes
+        self.ttl = {**DEFAULT_TTL, **(ttl or {})}
+        self.hits = {kind: 0 for kind in self.ttl}
+        self.misses = {kind: 0 for kind in self.ttl}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY,"
+                " kind TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " expires REAL NOT NULL,"
+                " accessed REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)"
+            )
+
+    # --- 低階存取 ---
+    # 找不到或已過期時回傳 MISS，與快取中的 null (例如對空字典 .get() 的結果) 區分
+    def get(self, key, kind="info"):
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, expires FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] < now:
+                if row is not None:
+                    self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self.misses[kind] = self.misses.get(kind, 0) + 1
+                return MISS
+            self._conn.execute(
+                "UPDATE entries SET accessed = ? WHERE key = ?", (now, key)
+            )
+        self.hits[kind] = self.hits.get(kind, 0) + 1
+        return json.loads(row[0])
+
+    def peek(self, key):
+        # 不計入命中統計，供等待其他請求時輪詢
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] < time.time():
+            return MISS
+        return json.loads(row[0])
+
+    def put(self, key, value, kind="info", ttl=None):
+        now = time.time()
+        data = json.dumps(value, ensure_ascii=False)
+        ttl = self.ttl.get(kind, DEFAULT_TTL["info"]) if ttl is None else ttl
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                (key, kind, data, len(data), now + ttl, now),
+            )
+            self._evict()
+
+    def _evict(self):
+        self._conn.execute("DELETE FROM entries WHERE expires < ?", (time.time(),))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # 依最後存取時間由舊到新淘汰，直到低於上限
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM entries ORDER BY accessed"
+        ).fetchall():
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def _cached(self, kind, key, compute, ttl):
+        from stsp.trace import traced
+
+        with traced(TRACE_KINDS[kind], key=key[:16]) as record:
+            value = self.get(key, kind)
+            record["cache"] = "hit"
+            if value is MISS:
+                def fetch():
+                    result = compute()
+                    self.put(key, result, kind, ttl)
+                    return result
+                value, record["cache"] = self.coordinator.single_flight(
+                    key, lambda: self.peek(key), fetch
+                )
+            record["bytes"] = len(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+        return value
+
+    # --- 四種會阻塞的 Earth Engine 呼叫 ---
+    def get_info(self, obj, ttl=None):
+        return self._cached("info", graph_key("info", obj), obj.getInfo, ttl)
+
+    def map_url(self, image, vis_params=None, ttl=None):
+        def compute():
+            return image.getMapId(vis_params)["tile_fetcher"].url_format
+        return self._cached("map", graph_key("map", image, vis_params), compute, ttl)
+
+    def thumb_url(self, image, params=None, ttl=None):
+        def compute():
+            return image.getThumbURL(params)
+        return self._cached("thumb", graph_key("thumb", image, params), compute, ttl)
+
+    def download_url(self, image, params=None, ttl=None):
+        def compute():
+            return image.getDownloadURL(params)
+        return self._cached("download", graph_key("download", image, params), compute, ttl)
+
+    # --- 狀態 ---
+    def stats(self):
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        return {
+            "hits": dict(self.hits),
+            "misses": dict(self.misses),
+            "entries": entries,
+            "bytes": size,
+            **self.coordinator.stats(),
+        }
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM entries")
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_cache():
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = EECache()
+        return _default
+
+
+def get_info(obj, ttl=None):
+    return default_cache().get_info(obj, ttl)
+
+
+def map_url(image, vis_params=None, ttl=None):
+    return default_cache().map_url(image, vis_params, ttl)
+
+
+def thumb_url(image, params=None, ttl=None):
+    return default_cache().thumb_url(image, params, ttl)
+
+
+def download_url(image, params=None, ttl=None):
+    return default_cache().download_url(image, params, ttl)
+
+
+def cache_stats():
+    return default_cache().stats()
@@ -0,0 +1,145 @@
+import ee
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+
+from stsp import jobs
+from stsp.composites import SEASONS, TRUE_COLOR_VIS, collection, season_range
+from stsp.ee_cache import get_info
+from stsp.lst import LST_SENSORS, build_composite, build_lst, derive_lst
+
+# --- 多年份都市熱區引擎 ---
+# 原本 2014 / 2024 兩頁是同一支程式只換日期，這裡改為輸入任意年份或季節清單，
+# 各年份的 getInfo 屬於 I/O 等待，因此以有上限的執行緒池同時送出。
+
+# Landsat 8 於 2013 年 4 月開始提供資料
+FIRST_YEAR = 2013
+
+MAX_WORKERS = 4
+# 統計值由粗到細的解析度 (公尺)：300 m 幾秒內就能先顯示，90 m 與 30 m 在背景接著算
+REFINE_SCALES = (300, 90, 30)
+
+NDVI_VIS = {
+    'min': -1,
+    'max': 1,
+    'palette': ['blue', 'white', 'green']
+}
+LST_VIS = {
+    'min': 18.47,
+    'max': 42.86,
+    'palette': [
+        '040274', '040281', '0502a3', '0502b8', '0502ce', '0502e6',
+        '0602ff', '235cb1', '307ef3', '269db1', '30c8e2', '32d3ef',
+        '3be285', '3ff38f', '86e26f', '3ae237', 'b5e22e', 'd6e21f',
+        'fff705', 'ffd611', 'ffb613', 'ff8b13', 'ff6e08', 'ff500d',
+        'ff0000', 'de0101', 'c21301', 'a71001', '911003'
+    ]
+}
+# 圖層名稱 -> (LSTResult 屬性, 顯示參數)；頁面與靜態網站輸出共用
+LAYERS = {
+    "真彩色影像": ("composite", TRUE_COLOR_VIS),
+    "NDVI": ("ndvi", NDVI_VIS),
+    "地表溫度 (LST)": ("lst", LST_VIS),
+}
+
+
+@dataclass(frozen=True)
+class Period:
+    label: str
+    start: str
+    end: str
+
+
+def make_periods(years, season="全年"):
+    suffix = "" if season == "全年" else f" {season}"
+    return [Period(f"{year}{suffix}", *season_range(year, season)) for year in years]
+
+
+def period_ttl(period):
+    # 背景工作結果的有效期限：今年的期間仍會增加影像，過去的期間不會再變
+    return jobs.CURRENT_TTL if int(period.end[:4]) >= date.today().year else None
+
+
+def stats_graph(result, scale=30):
+    # NDVI 極值與 LST 統計放在同一個 ee.Dictionary，一個年份只需一次 getInfo
+    lst_stats = result.lst.rename('LST').reduceRegion(
+        reducer=ee.Reducer.mean().combine(ee.Reducer.minMax(), sharedInputs=True),
+        geometry=result.aoi,
+        scale=scale,
+        maxPixels=1e9
+    )
+    return result.ndvi_range.combine(lst_stats)
+
+
+def resolve_stats(result):
+    try:
+        return get_info(stats_graph(result))
+    except ee.EEException as e:
+        # 該期間沒有可用影像時，合成影像沒有波段，reduceRegion 會失敗
+        return {"error": str(e)}
+
+
+def resolve_all(results, max_workers=MAX_WORKERS):
+    if not results:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(results))) as pool:
+        return list(pool.map(resolve_stats, results))
+
+
+def fetch_stats(periods, coordinates, max_workers=MAX_WORKERS):
+    # 靜態網站輸出 (stsp.site_export) 需要同步取得所有期間的統計值；頁面改用下方的背景工作
+    results = [build_lst(p.start, p.end, coordinates) for p in periods]
+    stats = resolve_all(results, max_workers)
+    return {p.label: s for p, s in zip(periods, stats)}
+
+
+# --- 背景工作 ---
+# 統計值改由 stsp.jobs 在背景計算，頁面先用一次便宜的影像數量查詢決定哪些期間可以顯示，
+# 不必等最重的 reduceRegion 算完。
+def image_counts(periods, coordinates):
+    bbox = tuple(coordinates)
+    counts = ee.Dictionary.fromLists(
+        [p.label for p in periods],
+        [collection(p.start, p.end, bbox, LST_SENSORS).size() for p in periods],
+    )
+    return get_info(counts)
+
+
+def submit_stats(periods, coordinates, scales=REFINE_SCALES):
+    # 每個期間、每個解析度各一個工作，回傳 {期間: {解析度: 工作鍵}}；
+    # 整條 LST 流程 (含 NDVI 極值) 都在該解析度下計算，粗略的工作不會被 30 m 的 minMax 拖慢
+    keys = {}
+    for p in periods:
+        keys[p.label] = {
+            scale: jobs.submit(
+                f"stats-{p.label}-{scale}m",
+                stats_graph(build_lst(p.start, p.end, coordinates, scale), scale),
+                ttl=period_ttl(p),
+            )
+            for scale in scales
+        }
+    return keys
+
+
+def finest_stats(scale_jobs):
+    # 已完成的工作中解析度最細的一個，回傳 (解析度, 統計值)；都還沒完成時為 (None, {})
+    for scale in sorted(scale_jobs):
+        job = scale_jobs[scale]
+        if job is not None and job.state == jobs.COMPLETED:
+            return scale, job.result
+    return None, {}
+
+
+def refined_lst(period, coordinates, stats):
+    # 以已取回的 NDVI 極值建圖層：地圖圖磚不必再於伺服器端重算 minMax，
+    # 更細的統計值回來後，FV / EM / LST 與色階都跟著更新
+    if stats.get("NDVI_min") is None or stats.get("NDVI_max") is None:
+        return build_lst(period.start, period.end, coordinates)
+    aoi, composite = build_composite(period.start, period.end, coordinates)
+    return derive_lst(aoi, composite, ndvi_stats={"NDVI_min": stats["NDVI_min"], "NDVI_max": stats["NDVI_max"]})
+
+
+def stretched_lst_vis(stats):
+    if stats.get("LST_min") is None or stats.get("LST_max") is None:
+        return LST_VIS
+    return dict(LST_VIS, min=round(stats["LST_min"], 2), max=round(stats["LST_max"], 2))
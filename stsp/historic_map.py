@@ -0,0 +1,88 @@
+import argparse
+import json
+
+from stsp.assets import ROOT
+
+# --- 台灣堡圖掃描圖的圖磚金字塔 ---
+# 原本把整張掃描圖丟進 QGIS / Colab 顯示都失敗，掃描檔太大無法一次載入。這裡改為事先處理：
+#   1. 依控制點 (掃描圖像素 ↔ 經緯度) 以最小平方法求仿射轉換
+#   2. 掃描圖只轉檔一次成 .npy，之後都以 memory-map 依視窗讀取，記憶體用量與圖檔大小無關
+#   3. 最高層級的每張圖磚只讀取其涵蓋的視窗並重新取樣；各層級以多個行程平行產生，
+#      較低層級由下一層的四張圖磚縮小而成
+#   4. 輸出 static/historic/<名稱>/{z}/{x}/{y}.png，由 Streamlit 靜態服務提供，
+#      在 geemap 地圖上作為疊加圖層
+#
+# 產生圖磚的程式 (需要 numpy) 在 stsp.historic_pyramid，頁面只載入這個模組。
+#
+#   python -m stsp.historic_map build 掃描圖.tif --gcps 控制點.csv --name taiwan_baotu
+#   python -m stsp.historic_map info taiwan_baotu
+
+HISTORIC_DIR = ROOT / "static" / "historic"
+HISTORIC_URL = "app/static/historic"
+TILE_SIZE = 256
+MIN_ZOOM = 10
+
+
+# --- 頁面使用 ---
+def available_maps():
+    if not HISTORIC_DIR.exists():
+        return {}
+    maps = {}
+    for meta in sorted(HISTORIC_DIR.glob("*/metadata.json")):
+        data = json.loads(meta.read_text(encoding="utf-8"))
+        maps[data["name"]] = data
+    return maps
+
+
+def tile_url(name):
+    return f"{HISTORIC_URL}/{name}/{{z}}/{{x}}/{{y}}.png"
+
+
+def overlay_layer(metadata, opacity=0.7, shown=True, label="台灣堡圖"):
+    import folium
+
+    west, south, east, north = metadata["bounds"]
+    return folium.TileLayer(
+        tiles=tile_url(metadata["name"]),
+        attr="臺灣堡圖 (中央研究院人社中心 GIS 專題中心)",
+        name=label,
+        overlay=True,
+        control=True,
+        show=shown,
+        opacity=opacity,
+        min_zoom=metadata["min_zoom"],
+        max_native_zoom=metadata["max_zoom"],
+        max_zoom=18,
+        bounds=[[south, west], [north, east]],
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="台灣堡圖掃描圖轉成地理對位的圖磚金字塔")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="依控制點對位並切成圖磚")
+    build.add_argument("scan", help="掃描圖 (GeoTIFF / JPEG / PNG / .npy)")
+    build.add_argument("--gcps", required=True, help="控制點 CSV：col,row,lon,lat")
+    build.add_argument("--name", required=True)
+    build.add_argument("--min-zoom", type=int, default=MIN_ZOOM)
+    build.add_argument("--max-zoom", type=int, default=None, help="預設依掃描圖解析度決定")
+    build.add_argument("--workers", type=int, default=None)
+    info = sub.add_parser("info", help="顯示已產生的圖磚金字塔")
+    info.add_argument("name", nargs="?")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        from stsp.historic_pyramid import build_pyramid, read_gcps
+
+        metadata = build_pyramid(args.scan, read_gcps(args.gcps), args.name,
+                                 args.min_zoom, args.max_zoom, args.workers)
+        print(f"z{metadata['min_zoom']}–{metadata['max_zoom']}: {sum(metadata['tiles'].values())} tiles, "
+              f"控制點 RMSE {metadata['rmse_m']:.1f} m")
+    else:
+        for name, metadata in available_maps().items():
+            if args.name in (None, name):
+                print(json.dumps(metadata, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+import csv
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from stsp.ee_cache import CACHE_DIR
+from stsp.historic_map import HISTORIC_DIR, MIN_ZOOM, TILE_SIZE
+from stsp.tile_proxy import tiles_for_bbox
+
+# --- 台灣堡圖圖磚金字塔的產生 (需要 numpy) ---
+# 對位、轉檔與切圖磚只在命令列 python -m stsp.historic_map build 時執行；
+# 頁面只需要 stsp.historic_map 的 available_maps / overlay_layer，不必載入 numpy。
+
+# 轉檔後的 .npy 來源影像
+WORK_DIR = CACHE_DIR / "historic"
+# 轉檔時每次讀取的列數
+STRIP_ROWS = 512
+
+
+# --- 控制點與仿射轉換 ---
+def read_gcps(path):
+    # CSV 欄位：col,row,lon,lat (掃描圖的像素座標與對應經緯度)
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return [
+            (float(r["col"]), float(r["row"]), float(r["lon"]), float(r["lat"]))
+            for r in csv.DictReader(f)
+        ]
+
+
+def fit_affine(gcps):
+    # lon = a0 + a1*col + a2*row、lat = b0 + b1*col + b2*row，至少需要三個不共線的控制點
+    if len(gcps) < 3:
+        raise ValueError("仿射轉換至少需要三個控制點")
+    points = np.asarray(gcps, dtype=float)
+    design = np.column_stack([np.ones(len(points)), points[:, 0], points[:, 1]])
+    coef_lon, *_ = np.linalg.lstsq(design, points[:, 2], rcond=None)
+    coef_lat, *_ = np.linalg.lstsq(design, points[:, 3], rcond=None)
+    forward = np.array([coef_lon, coef_lat])
+    residuals = design @ forward.T - points[:, 2:]
+    # 殘差以公尺表示，方便判斷控制點品質
+    mid_lat = math.radians(points[:, 3].mean())
+    meters = residuals * [111320.0 * math.cos(mid_lat), 110574.0]
+    rmse = float(np.sqrt((meters ** 2).sum(axis=1).mean()))
+    return forward, rmse
+
+
+def invert_affine(forward):
+    # 回傳 (col, row) = inverse @ [1, lon, lat]
+    linear = forward[:, 1:]
+    inverse = np.linalg.inv(linear)
+    offset = -inverse @ forward[:, 0]
+    return np.column_stack([offset, inverse])
+
+
+def pixel_to_lonlat(forward, col, row):
+    return forward @ np.array([1.0, col, row])
+
+
+def scan_bounds(forward, shape):
+    rows, cols = shape[:2]
+    corners = np.array([pixel_to_lonlat(forward, c, r) for c in (0, cols) for r in (0, rows)])
+    west, south = corners.min(axis=0)
+    east, north = corners.max(axis=0)
+    return float(west), float(south), float(east), float(north)
+
+
+def native_zoom(forward, bounds):
+    # 掃描圖解析度 (公尺/像素) 對應的 Web Mercator 層級
+    mid_lat = math.radians((bounds[1] + bounds[3]) / 2)
+    deg_per_px = math.hypot(forward[0, 1], forward[1, 1])
+    meters_per_px = deg_per_px * 111320.0 * math.cos(mid_lat)
+    return max(MIN_ZOOM, math.ceil(math.log2(156543.03 * math.cos(mid_lat) / meters_per_px)))
+
+
+# --- 來源影像 ---
+def prepare_source(path, work_dir):
+    # 轉成 (rows, cols, 4) uint8 的 .npy，之後以 memory-map 讀取
+    path = Path(path)
+    if path.suffix == ".npy":
+        return path
+    target = Path(work_dir) / "source.npy"
+    if target.exists() and target.stat().st_mtime >= path.stat().st_mtime:
+        return target
+    target.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        import rasterio
+        from rasterio.windows import Window
+    except ImportError:
+        rasterio = None
+
+    if rasterio is not None:
+        # GeoTIFF 等格式以視窗逐段讀取，不需要整張載入
+        with rasterio.open(path) as src:
+            out = np.lib.format.open_memmap(target, mode="w+", dtype=np.uint8,
+                                            shape=(src.height, src.width, 4))
+            for r0 in range(0, src.height, STRIP_ROWS):
+                h = min(STRIP_ROWS, src.height - r0)
+                strip = src.read(window=Window(0, r0, src.width, h))
+                if strip.shape[0] < 3:
+                    # 灰階掃描圖
+                    strip = np.repeat(strip[:1], 3, axis=0)
+                out[r0:r0 + h, :, :3] = np.moveaxis(strip[:3], 0, -1)
+                out[r0:r0 + h, :, 3] = 255
+            out.flush()
+        return target
+
+    # 沒有 rasterio 時以 Pillow 轉檔；JPEG / PNG 無法部分解碼，轉檔時仍需整張解碼一次
+    from PIL import Image
+
+    Image.MAX_IMAGE_PIXELS = None
+    with Image.open(path) as img:
+        width, height = img.size
+        out = np.lib.format.open_memmap(target, mode="w+", dtype=np.uint8, shape=(height, width, 4))
+        for r0 in range(0, height, STRIP_ROWS):
+            h = min(STRIP_ROWS, height - r0)
+            out[r0:r0 + h] = np.asarray(img.crop((0, r0, width, r0 + h)).convert("RGBA"))
+        out.flush()
+    return target
+
+
+# --- 圖磚 ---
+def tile_lonlat(z, x, y, size=TILE_SIZE):
+    # 圖磚內每個像素中心的經緯度 (Web Mercator)
+    n = size * 2 ** z
+    px = (x * size + np.arange(size) + 0.5) / n
+    py = (y * size + np.arange(size) + 0.5) / n
+    lon = px * 360.0 - 180.0
+    lat = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * py))))
+    return np.meshgrid(lon, lat)
+
+
+def render_tile(source, inverse, z, x, y, out_dir):
+    # 只讀取這張圖磚涵蓋的來源視窗，以最近鄰取樣
+    from PIL import Image
+
+    lon, lat = tile_lonlat(z, x, y)
+    col = inverse[0, 0] + inverse[0, 1] * lon + inverse[0, 2] * lat
+    row = inverse[1, 0] + inverse[1, 1] * lon + inverse[1, 2] * lat
+    src = np.load(source, mmap_mode="r")
+    rows, cols = src.shape[:2]
+    inside = (col >= 0) & (col < cols) & (row >= 0) & (row < rows)
+    if not inside.any():
+        return 0
+    ci = np.clip(col.astype(np.int64), 0, cols - 1)
+    ri = np.clip(row.astype(np.int64), 0, rows - 1)
+    r0, r1 = ri[inside].min(), ri[inside].max() + 1
+    c0, c1 = ci[inside].min(), ci[inside].max() + 1
+    window = np.asarray(src[r0:r1, c0:c1])
+    tile = np.zeros((TILE_SIZE, TILE_SIZE, 4), dtype=np.uint8)
+    tile[inside] = window[ri[inside] - r0, ci[inside] - c0]
+    path = Path(out_dir) / str(z) / str(x) / f"{y}.png"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    Image.fromarray(tile, "RGBA").save(path, optimize=True)
+    return 1
+
+
+def render_overview(out_dir, z, x, y):
+    # 由下一層的四張圖磚拼成 512×512 再縮成 256×256
+    from PIL import Image
+
+    mosaic = Image.new("RGBA", (TILE_SIZE * 2, TILE_SIZE * 2))
+    found = False
+    for dx in (0, 1):
+        for dy in (0, 1):
+            child = Path(out_dir) / str(z + 1) / str(2 * x + dx) / f"{2 * y + dy}.png"
+            if child.exists():
+                with Image.open(child) as img:
+                    mosaic.paste(img, (dx * TILE_SIZE, dy * TILE_SIZE))
+                found = True
+    if not found:
+        return 0
+    path = Path(out_dir) / str(z) / str(x) / f"{y}.png"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    mosaic.resize((TILE_SIZE, TILE_SIZE), Image.LANCZOS).save(path, optimize=True)
+    return 1
+
+
+def _render_tile(args):
+    return render_tile(*args)
+
+
+def _render_overview(args):
+    return render_overview(*args)
+
+
+def build_pyramid(scan, gcps, name, min_zoom=MIN_ZOOM, max_zoom=None, workers=None):
+    out_dir = HISTORIC_DIR / name
+    source = prepare_source(scan, WORK_DIR / name)
+    shape = np.load(source, mmap_mode="r").shape
+    forward, rmse = fit_affine(gcps)
+    inverse = invert_affine(forward)
+    bounds = scan_bounds(forward, shape)
+    max_zoom = max_zoom or native_zoom(forward, bounds)
+    workers = workers or os.cpu_count() or 1
+    counts = {}
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # 最高層級：每張圖磚各自從 memmap 讀取視窗
+        tiles = [(str(source), inverse, z, x, y, str(out_dir))
+                 for z, x, y in tiles_for_bbox(bounds, [max_zoom])]
+        counts[max_zoom] = sum(pool.map(_render_tile, tiles, chunksize=16))
+        # 較低層級：依賴上一層的結果，層級之間依序、層級內平行
+        for z in range(max_zoom - 1, min_zoom - 1, -1):
+            if not (out_dir / str(z + 1)).exists():
+                break
+            parents = sorted({
+                (x // 2, y // 2)
+                for x_dir in (out_dir / str(z + 1)).iterdir()
+                for x in [int(x_dir.name)]
+                for y in (int(p.stem) for p in x_dir.glob("*.png"))
+            })
+            counts[z] = sum(pool.map(_render_overview, [(str(out_dir), z, x, y) for x, y in parents],
+                                     chunksize=16))
+
+    metadata = {
+        "name": name,
+        "bounds": bounds,
+        "min_zoom": min_zoom,
+        "max_zoom": max_zoom,
+        "shape": list(shape),
+        "gcps": [list(g) for g in gcps],
+        "rmse_m": rmse,
+        "tiles": counts,
+    }
+    (out_dir / "metadata.json").write_text(json.dumps(metadata, ensure_ascii=False, indent=2), encoding="utf-8")
+    return metadata
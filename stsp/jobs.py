@@ -0,0 +1,306 @@
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from stsp.ee_cache import CACHE_DIR, graph_key
+
+# --- 背景運算工作佇列 ---
+# 整年、30 m、maxPixels=1e9 的 reduceRegion 若在 rerun 中直接 getInfo，整頁都要等它算完，
+# 範圍一大就會逾時。這裡把這類統計改為背景工作：送出後由 asyncio 事件迴圈定期輪詢狀態，
+# 完成的結果存在本機 SQLite，頁面只讀取目前狀態並顯示進度，其餘內容照常輸出。
+#
+# 實際執行工作的後端抽象為 BatchBackend：
+#   EEBatchBackend  以 ee.batch.Export.table.toAsset 送出匯出工作 (設定 STSP_EXPORT_FOLDER 時使用)
+#   LocalBackend    在本機執行緒中直接 getInfo，未設定匯出資料夾或測試時使用；
+#                   完成時由 future 的 done callback 直接通知，不等待輪詢間隔
+
+# 例如 projects/<project>/assets/stsp-jobs；資料夾需事先建立
+EXPORT_FOLDER = os.environ.get("STSP_EXPORT_FOLDER", "")
+POLL_INTERVAL = float(os.environ.get("STSP_JOB_POLL", "5"))
+
+PENDING = "PENDING"
+RUNNING = "RUNNING"
+COMPLETED = "COMPLETED"
+FAILED = "FAILED"
+FINISHED = (COMPLETED, FAILED)
+# 本機後端在行程重新啟動後找不到原本的工作
+LOST = "lost"
+# 失敗的工作過一段時間才允許重新送出，避免每次 rerun 都重送同一個必定失敗的運算
+RETRY_AFTER = 300
+# 包含今年的期間仍會有新影像進來，完成的結果只沿用一天 (送出時指定 ttl)；過去的期間永久有效
+CURRENT_TTL = 24 * 3600
+
+
+@dataclass
+class Job:
+    key: str
+    name: str
+    state: str
+    progress: float
+    result: object = None
+    error: str = None
+    updated: float = 0.0
+
+    @property
+    def done(self):
+        return self.state in FINISHED
+
+
+# --- 後端 ---
+# obj 是 ee.Dictionary (kind="dict") 或 ee.FeatureCollection (kind="table")；
+# handle 為可序列化成 JSON 的 dict，存在資料庫中，重新啟動後仍能繼續輪詢。
+class BatchBackend:
+    def start(self, name, obj, kind):
+        raise NotImplementedError
+
+    def status(self, handle):
+        # 回傳 (state, progress, error)
+        raise NotImplementedError
+
+    def result(self, handle):
+        raise NotImplementedError
+
+    def future(self, handle):
+        # 可等待完成的 concurrent.futures.Future；回傳 None 時佇列改為每 POLL_INTERVAL 秒輪詢
+        return None
+
+
+class EEBatchBackend(BatchBackend):
+    # Earth Engine 的工作狀態沒有提供百分比，這裡依狀態給一個大約的進度
+    STATE_PROGRESS = {"UNSUBMITTED": 0.0, "READY": 0.1, "RUNNING": 0.5, "COMPLETED": 1.0}
+
+    def __init__(self, folder=EXPORT_FOLDER):
+        self.folder = folder.rstrip("/")
+
+    def start(self, name, obj, kind):
+        import ee
+
+        if kind == "dict":
+            obj = ee.FeatureCollection([ee.Feature(None, ee.Dictionary(obj))])
+        # 資產 ID 只接受英數字、底線與連字號
+        safe = re.sub(r"[^A-Za-z0-9_-]", "_", name)
+        asset_id = f"{self.folder}/{safe}-{uuid.uuid4().hex[:8]}"
+        task = ee.batch.Export.table.toAsset(
+            collection=obj,
+            description=safe[:100],
+            assetId=asset_id,
+        )
+        task.start()
+        return {"task": task.id, "asset": asset_id, "kind": kind}
+
+    def status(self, handle):
+        import ee
+
+        status = ee.data.getTaskStatus(handle["task"])[0]
+        state = status.get("state", "UNKNOWN")
+        if state == "COMPLETED":
+            return COMPLETED, 1.0, None
+        if state in ("FAILED", "CANCELLED", "CANCEL_REQUESTED", "UNKNOWN"):
+            return FAILED, 1.0, status.get("error_message", state)
+        return RUNNING, self.STATE_PROGRESS.get(state, 0.0), None
+
+    def result(self, handle):
+        import ee
+
+        info = ee.FeatureCollection(handle["asset"]).getInfo()
+        # 結果已存在本機，刪掉暫存的資產
+        ee.data.deleteAsset(handle["asset"])
+        rows = [f["properties"] for f in info["features"]]
+        if handle["kind"] == "dict":
+            return rows[0] if rows else {}
+        return info
+
+
+class LocalBackend(BatchBackend):
+    # 本機替代品：在執行緒池中 resolve (預設為 ee_cache.get_info)；測試時可傳入假的 resolve。
+    # 工作只存在這個行程中，重新啟動後找不到的 handle 會視為失敗並重新送出。
+    def __init__(self, resolve=None, max_workers=4):
+        if resolve is None:
+            from stsp.ee_cache import get_info as resolve
+        self.resolve = resolve
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stsp-job")
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def start(self, name, obj, kind):
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._futures[job_id] = self._executor.submit(self.resolve, obj)
+        return {"local": job_id}
+
+    def status(self, handle):
+        with self._lock:
+            future = self._futures.get(handle["local"])
+        if future is None:
+            return FAILED, 1.0, LOST
+        if not future.done():
+            return RUNNING, 0.5, None
+        error = future.exception()
+        if error is not None:
+            return FAILED, 1.0, str(error)
+        return COMPLETED, 1.0, None
+
+    def result(self, handle):
+        with self._lock:
+            future = self._futures.pop(handle["local"])
+        return future.result()
+
+    def future(self, handle):
+        # 本機工作完成時立即通知佇列，不必等下一次輪詢
+        with self._lock:
+            return self._futures.get(handle["local"])
+
+
+def default_backend():
+    return EEBatchBackend() if EXPORT_FOLDER else LocalBackend()
+
+
+# --- 佇列 ---
+class JobQueue:
+    def __init__(self, backend=None, path=None, poll_interval=POLL_INTERVAL):
+        self.backend = backend or default_backend()
+        self.poll_interval = poll_interval
+        self.path = Path(path) if path else CACHE_DIR / "jobs.sqlite"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " key TEXT PRIMARY KEY,"
+                " name TEXT NOT NULL,"
+                " state TEXT NOT NULL,"
+                " progress REAL NOT NULL,"
+                " handle TEXT,"
+                " result TEXT,"
+                " error TEXT,"
+                " updated REAL NOT NULL)"
+            )
+        self._watching = set()
+        # 所有輪詢都在同一個背景事件迴圈中進行，不佔用 Streamlit 的腳本執行緒
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="stsp-jobs", daemon=True).start()
+
+    # --- 狀態存取 ---
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT key, name, state, progress, result, error, updated FROM jobs WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        key, name, state, progress, result, error, updated = row
+        return Job(key, name, state, progress, json.loads(result) if result else None, error, updated)
+
+    def _handle(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT handle FROM jobs WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def _save(self, key, **fields):
+        fields["updated"] = time.time()
+        for column in ("handle", "result"):
+            if column in fields:
+                fields[column] = json.dumps(fields[column], ensure_ascii=False)
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE key = ?", (*fields.values(), key)
+            )
+
+    # --- 送出 ---
+    def submit(self, name, obj, kind="dict", ttl=None):
+        # 以運算圖雜湊當鍵：同一個統計不論哪個 session 送出都只算一次；
+        # 指定 ttl 時，完成超過 ttl 秒的結果視為過期，重新計算
+        key = graph_key("job", obj, kind)
+        job = self.get(key)
+        with self._lock:
+            if key in self._watching:
+                return key
+            if job is not None and job.state == COMPLETED and (ttl is None or time.time() - job.updated < ttl):
+                return key
+            if job is not None and job.state == FAILED and time.time() - job.updated < RETRY_AFTER:
+                return key
+            self._watching.add(key)
+        handle = self._handle(key) if job is not None and job.state == RUNNING else None
+        if handle is None:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, NULL, NULL, NULL, ?)",
+                    (key, name, PENDING, 0.0, time.time()),
+                )
+        asyncio.run_coroutine_threadsafe(self._run(key, name, obj, kind, handle), self._loop)
+        return key
+
+    async def _run(self, key, name, obj, kind, handle):
+        loop = asyncio.get_running_loop()
+        try:
+            if handle is None:
+                handle = await loop.run_in_executor(None, self.backend.start, name, obj, kind)
+                self._save(key, state=RUNNING, progress=0.0, handle=handle)
+            while True:
+                state, progress, error = await loop.run_in_executor(None, self.backend.status, handle)
+                if state == COMPLETED:
+                    result = await loop.run_in_executor(None, self.backend.result, handle)
+                    self._save(key, state=COMPLETED, progress=1.0, result=result)
+                    return
+                if state == FAILED and error == LOST:
+                    handle = await loop.run_in_executor(None, self.backend.start, name, obj, kind)
+                    self._save(key, state=RUNNING, progress=0.0, handle=handle)
+                    continue
+                if state == FAILED:
+                    self._save(key, state=FAILED, progress=1.0, error=error)
+                    return
+                self._save(key, state=RUNNING, progress=progress)
+                await self._wait(handle)
+        except Exception as e:
+            self._save(key, state=FAILED, progress=1.0, error=str(e))
+        finally:
+            with self._lock:
+                self._watching.discard(key)
+
+    async def _wait(self, handle):
+        future = self.backend.future(handle)
+        if future is None:
+            await asyncio.sleep(self.poll_interval)
+        else:
+            # wrap_future 以 done callback 喚醒事件迴圈；成功或失敗都交給下一次 status() 判斷
+            wrapped = asyncio.wrap_future(future)
+            await asyncio.wait([wrapped])
+            wrapped.exception()
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_queue():
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = JobQueue()
+        return _default
+
+
+def submit(name, obj, kind="dict", ttl=None):
+    return default_queue().submit(name, obj, kind, ttl)
+
+
+def get_job(key):
+    return default_queue().get(key)
+
+
+def overall_progress(jobs):
+    jobs = [job for job in jobs if job is not None]
+    if not jobs:
+        return 0.0
+    return sum(1.0 if job.done else job.progress for job in jobs) / len(jobs)
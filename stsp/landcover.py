@@ -0,0 +1,137 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import ee
+
+from stsp.ee_cache import get_info, thumb_url
+from stsp.composites import COMMON_BANDS, composite, year_collection
+
+# --- 土地覆蓋頁的年份掃描 ---
+# 原本每一年先 size().getInfo() 檢查有無影像、再重建一次相同的集合做 median，
+# 最後逐張同步呼叫 getThumbUrl。這裡改為：所有年份的影像數量以一個
+# ee.Dictionary 一次取回，合成影像由 stsp.composites 共用，縮圖網址平行取得。
+
+MAX_WORKERS = 6
+
+
+def scan_years(years, bbox):
+    # {年份: 影像數}，全部年份在伺服器端組成一個字典，只需一次 getInfo
+    collections = {year: year_collection(year, bbox) for year in years}
+    counts = ee.Dictionary.fromLists(
+        [str(year) for year in collections],
+        [c.size() for c in collections.values()],
+    )
+    available = get_info(counts)
+    composites = {
+        year: composite(year, bbox)
+        for year in years
+        if available.get(str(year), 0) > 0
+    }
+    return available, composites
+
+
+def fetch_thumbnails(composites, vis_params, bbox, bands=('red', 'green', 'blue'),
+                     max_workers=MAX_WORKERS):
+    if not composites:
+        return {}
+    params = {**vis_params, 'region': ee.Geometry.Rectangle(list(bbox)), 'dimensions': 512}
+
+    def one(item):
+        year, image = item
+        return year, thumb_url(image.select(list(bands)), params)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(composites))) as pool:
+        return dict(pool.map(one, composites.items()))
+
+
+# --- 監督式分類 ---
+# 以 ESA WorldCover 2021 (10 m) 作為參考標籤，在 2021 年的 Landsat 合成影像上
+# 抽樣訓練隨機森林，再套用到所有年份。訓練樣本取回後存在磁碟快取，
+# 分類器在同一行程內共用，切換年份不需要重新抽樣或重新訓練。
+
+TRAINING_YEAR = 2021
+TRAINING_BBOX = (120.15, 22.95, 120.40, 23.16)
+TRAINING_POINTS_PER_CLASS = 150
+CLASSIFY_SCALE = 30
+
+# WorldCover 代碼 -> (名稱, 顏色)；分類結果使用清單中的索引 0..n-1
+CLASSES = [
+    (10, "樹林", "006400"),
+    (20, "灌木", "ffbb22"),
+    (30, "草地", "ffff4c"),
+    (40, "農地", "f096ff"),
+    (50, "建成區", "fa0000"),
+    (60, "裸露地", "b4b4b4"),
+    (80, "水體", "0064c8"),
+    (90, "草本濕地", "0096a0"),
+    (95, "紅樹林", "00cf75"),
+]
+CLASS_NAMES = [name for _, name, _ in CLASSES]
+CLASS_VIS = {'min': 0, 'max': len(CLASSES) - 1, 'palette': [color for *_, color in CLASSES]}
+
+_classifier = None
+_classifier_lock = threading.Lock()
+
+
+def reference_labels():
+    codes = [code for code, *_ in CLASSES]
+    return (ee.ImageCollection('ESA/WorldCover/v200').first()
+            .remap(codes, list(range(len(codes))))
+            .rename('class'))
+
+
+def training_samples():
+    region = ee.Geometry.Rectangle(list(TRAINING_BBOX))
+    samples = composite(TRAINING_YEAR, TRAINING_BBOX).addBands(reference_labels()).stratifiedSample(
+        numPoints=TRAINING_POINTS_PER_CLASS,
+        classBand='class',
+        region=region,
+        scale=CLASSIFY_SCALE,
+        seed=42,
+        geometries=False,
+    )
+    # 取回後以 FeatureCollection 重建，之後的 session 不必再到伺服器抽樣
+    features = get_info(samples)['features']
+    return ee.FeatureCollection([ee.Feature(None, f['properties']) for f in features])
+
+
+def trained_classifier():
+    global _classifier
+    with _classifier_lock:
+        if _classifier is None:
+            _classifier = ee.Classifier.smileRandomForest(50).train(
+                features=training_samples(),
+                classProperty='class',
+                inputProperties=COMMON_BANDS,
+            )
+        return _classifier
+
+
+def classify_years(composites):
+    classifier = trained_classifier()
+    return {
+        year: image.select(COMMON_BANDS).classify(classifier).rename('class')
+        for year, image in composites.items()
+    }
+
+
+def class_areas(classified, bbox, scale=CLASSIFY_SCALE):
+    # 各年份的分類結果疊成多波段影像 (波段名稱為年份)，
+    # 以一次 frequencyHistogram 取得所有年份、所有類別的像素數
+    if not classified:
+        return {}
+    stacked = ee.Image.cat([image.rename(str(year)) for year, image in classified.items()])
+    histograms = get_info(stacked.reduceRegion(
+        reducer=ee.Reducer.frequencyHistogram(),
+        geometry=ee.Geometry.Rectangle(list(bbox)),
+        scale=scale,
+        maxPixels=1e9,
+    ))
+    hectares_per_pixel = scale * scale / 10000
+    return {
+        year: {
+            CLASS_NAMES[int(float(cls))]: count * hectares_per_pixel
+            for cls, count in (histograms.get(str(year)) or {}).items()
+        }
+        for year in classified
+    }
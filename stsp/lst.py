@@ -0,0 +1,80 @@
+import ee
+from dataclasses import dataclass
+
+from stsp.composites import range_composite
+
+# --- 地表溫度 (LST) 共用處理流程 ---
+# 熱區頁面原本在 get_processed_image / get_ndvi_stats / calculate_lst 中
+# 各自重建一次相同的 Landsat 8 合成影像，這裡改成只建一次影像運算圖，
+# NDVI 最小 / 最大值也以同一次 reduceRegion 在伺服器端求得。
+
+LANDSAT8_COLLECTION = "LANDSAT/LC08/C02/T1_L2"
+# 熱區頁的資料來源維持只用 Landsat 8
+LST_SENSORS = ("L8",)
+
+
+@dataclass
+class LSTResult:
+    aoi: ee.Geometry
+    composite: ee.Image
+    ndvi: ee.Image
+    fv: ee.Image
+    em: ee.Image
+    lst: ee.Image
+    # 伺服器端的 NDVI 極值 (ee.Dictionary，鍵為 NDVI_min / NDVI_max)，尚未取回
+    ndvi_range: ee.Dictionary
+
+
+def build_composite(start_date, end_date, coordinates):
+    # 比例係數、雲遮罩與波段改名由 stsp.composites 處理，並與其他頁面共用記憶的合成影像
+    aoi = ee.Geometry.Rectangle(list(coordinates))
+    composite = range_composite(start_date, end_date, tuple(coordinates), LST_SENSORS)
+    return aoi, composite
+
+
+def ndvi_range(ndvi, aoi, scale=30):
+    # minMax 一次求出最小與最大值，取代原本兩次 reduceRegion
+    return ndvi.reduceRegion(
+        reducer=ee.Reducer.minMax(),
+        geometry=aoi,
+        scale=scale,
+        maxPixels=1e9
+    )
+
+
+def build_lst(start_date, end_date, coordinates, scale=30):
+    aoi, composite = build_composite(start_date, end_date, coordinates)
+    return derive_lst(aoi, composite, scale)
+
+
+def derive_lst(aoi, composite, scale=30, ndvi_stats=None):
+    # 只使用伺服器端運算，也可以放在 ImageCollection.map / ee.List.map 中對每個月份各做一次
+    ndvi = composite.normalizedDifference(['nir', 'red']).rename('NDVI')
+
+    # FV / EM / LST 直接使用伺服器端的 NDVI 極值，不需要先 getInfo 才能建圖層；
+    # 大範圍 AOI 的極值已由分塊計算求得 (stsp.aoi)，以 ndvi_stats 傳入
+    stats = ndvi_range(ndvi, aoi, scale) if ndvi_stats is None else ee.Dictionary(ndvi_stats)
+    ndvi_min = ee.Number(stats.get('NDVI_min'))
+    ndvi_max = ee.Number(stats.get('NDVI_max'))
+
+    fv = ndvi.subtract(ndvi_min).divide(ndvi_max.subtract(ndvi_min)).pow(2).rename("FV")
+    em = fv.multiply(0.004).add(0.986).rename("EM")
+
+    thermal = composite.select('thermal')
+    lst = thermal.expression(
+        '(TB / (1 + (0.00115 * (TB / 1.438)) * log(em))) - 273.15',
+        {
+            'TB': thermal.select('thermal'),
+            'em': em
+        }
+    ).rename('LST TAINAN')
+
+    return LSTResult(
+        aoi=aoi,
+        composite=composite,
+        ndvi=ndvi,
+        fv=fv,
+        em=em,
+        lst=lst,
+        ndvi_range=stats,
+    )
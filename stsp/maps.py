@@ -0,0 +1,134 @@
+import folium
+
+from stsp import tile_proxy
+from stsp.ee_cache import graph_key, map_url
+from stsp.trace import traced
+
+# --- 地圖圖層輔助函數 ---
+# 圖磚網址經由 ee_cache 取得，重新部署後相同的影像與視覺化參數不必再呼叫 getMapId。
+# 設定 STSP_TILE_PROXY_URL 時，圖磚改由本機 tile_proxy 提供並快取。
+
+EE_ATTRIBUTION = "Google Earth Engine"
+
+
+def ee_tiles(image, vis_params):
+    url = map_url(image, vis_params)
+    if not tile_proxy.PROXY_URL:
+        return url
+    if tile_proxy.PROXY_PORT:
+        tile_proxy.ensure_server()
+    # 以運算圖雜湊當圖層名稱，Earth Engine 重新發出的 mapid 仍對應到同一批快取圖磚
+    layer = graph_key("map", image, vis_params)[:16]
+    tile_proxy.default_store().register_layer(layer, url)
+    return tile_proxy.proxied_url(layer)
+
+
+def ee_tile_layer(image, vis_params, name, shown=True, opacity=1.0):
+    return folium.TileLayer(
+        tiles=ee_tiles(image, vis_params),
+        attr=EE_ATTRIBUTION,
+        name=name,
+        overlay=True,
+        control=True,
+        show=shown,
+        opacity=opacity,
+    )
+
+
+def add_ee_layer(m, image, vis_params, name, shown=True, opacity=1.0):
+    ee_tile_layer(image, vis_params, name, shown, opacity).add_to(m)
+    return m
+
+
+# --- 地圖輸出 ---
+# 每個 geemap.Map 都會帶一份 Leaflet 與一個 iframe；這裡統一輸出並記錄每張地圖的 HTML 大小，
+# 讓頁面可以量測一次 rerun 送出了多少 iframe / bytes。
+
+RENDER_STATS_KEY = "_stsp_map_renders"
+
+
+def add_aoi_outline(m, coordinates, name='AOI - TAINAN'):
+    # 直接在前端畫矩形，不需要向 Earth Engine 要圖磚
+    west, south, east, north = coordinates
+    group = folium.FeatureGroup(name=name)
+    folium.Rectangle(
+        bounds=[[south, west], [north, east]],
+        color="#3388ff",
+        weight=2,
+        fill=False,
+        tooltip=name,
+    ).add_to(group)
+    group.add_to(m)
+    return m
+
+
+def add_aoi_geometry(m, geometry, name='AOI'):
+    # 上傳或繪製的 AOI (GeoJSON) 也直接在前端畫出，不經過 Earth Engine
+    folium.GeoJson(
+        geometry,
+        name=name,
+        style_function=lambda feature: {"color": "#3388ff", "weight": 2, "fill": False},
+        tooltip=name,
+    ).add_to(m)
+    return m
+
+
+def reset_render_stats():
+    import streamlit as st
+    st.session_state[RENDER_STATS_KEY] = []
+
+
+def render_map(m, height=500, name=None):
+    import streamlit as st
+
+    with traced("map_render", map=name) as record:
+        html = m.get_root().render()
+        record["bytes"] = len(html.encode("utf-8"))
+    st.session_state.setdefault(RENDER_STATS_KEY, []).append(
+        {"map": name, "bytes": len(html.encode("utf-8"))}
+    )
+    # components.html 已停止維護，st.iframe 直接接受 HTML 字串
+    st.iframe(html, height=height)
+
+
+def render_stats():
+    import streamlit as st
+    renders = st.session_state.get(RENDER_STATS_KEY, [])
+    return {"iframes": len(renders), "bytes": sum(r["bytes"] for r in renders), "maps": renders}
+
+
+# 熱點分析結果的顏色 (依 ArcGIS Hot Spot Analysis 的慣例)
+HOTSPOT_COLORS = {
+    "熱點 99%": "#d7191c",
+    "熱點 95%": "#fd8d3c",
+    "熱點 90%": "#fdd0a2",
+    "冷點 90%": "#c6dbef",
+    "冷點 95%": "#6baed6",
+    "冷點 99%": "#2c7bb6",
+}
+
+
+def hotspot_label(row):
+    # 0.0 °C 是合法的平均值，只有缺值時才顯示「無資料」；靜態網站匯出共用同一段文字
+    mean = row.get('LST_mean')
+    return f"{row['hotspot']}：LST 平均 {'無資料' if mean is None else f'{mean:.1f} °C'}"
+
+
+def add_hotspot_layer(m, rows, name, shown=True):
+    group = folium.FeatureGroup(name=name, show=shown)
+    for row in rows:
+        color = HOTSPOT_COLORS.get(row["hotspot"])
+        if color is None:
+            continue
+        west, south, east, north = row["bbox"]
+        folium.Rectangle(
+            bounds=[[south, west], [north, east]],
+            color=color,
+            weight=0,
+            fill=True,
+            fill_color=color,
+            fill_opacity=0.55,
+            tooltip=hotspot_label(row),
+        ).add_to(group)
+    group.add_to(m)
+    return m
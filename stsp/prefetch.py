@@ -0,0 +1,41 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# --- 背景預先取得 ---
+# 使用者看完一組年份後，通常會往前或往後一年；在背景執行緒先把相鄰年份的圖層
+# (getMapId) 解析好並寫入 ee_cache，切換年份時就不必在 rerun 中等待 Earth Engine。
+
+MAX_WORKERS = 4
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="stsp-prefetch")
+_pending = {}
+_lock = threading.Lock()
+
+
+def submit(key, fn, *args, **kwargs):
+    # 相同的 key 正在執行時不重複送出
+    with _lock:
+        future = _pending.get(key)
+        if future is not None and not future.done():
+            return future
+        future = _executor.submit(fn, *args, **kwargs)
+        _pending[key] = future
+    future.add_done_callback(lambda f: _forget(key, f))
+    return future
+
+
+def _forget(key, future):
+    with _lock:
+        if _pending.get(key) is future:
+            del _pending[key]
+
+
+def neighbour_years(years, first, last, distance=1):
+    shown = set(years)
+    around = {
+        year + step
+        for year in years
+        for step in range(-distance, distance + 1)
+        if step
+    }
+    return sorted(y for y in around - shown if first <= y <= last)
@@ -0,0 +1,211 @@
+import argparse
+import io
+import urllib.request
+import warnings
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from stsp.ee_cache import CACHE_DIR, download_url
+
+# --- 本機 NumPy 影像後端 ---
+# 與 stsp.lst 相同的 Landsat 8 流程 (比例係數、QA_PIXEL 雲遮罩、逐像素中位數合成、
+# NDVI → FV → EM → LST)，改在本機以向量化 NumPy 計算。
+# 波段以 <資料夾>/<影像 ID>/<波段>.npy (或 .tif) 存放，讀取時使用 memory-map。
+# 固定的 ~10×6 km AOI 只需下載一次，之後計算不必連線，也不需要憑證。
+
+SCENE_DIR = CACHE_DIR / "scenes"
+BANDS = ['SR_B2', 'SR_B3', 'SR_B4', 'SR_B5', 'ST_B10', 'QA_PIXEL']
+# 影像本身的遮罩 (1 = 有效)，下載時另存成一個波段；舊的下載沒有這個波段
+VALID_BAND = 'VALID'
+# 與都市熱區頁相同的 aoi_coords
+AOI_COORDS = (120.265429, 23.057127, 120.362146, 23.115991)
+
+
+# --- 讀取 ---
+def load_band(path):
+    path = Path(path)
+    if path.suffix == ".npy":
+        return np.load(path, mmap_mode="r")
+    try:
+        import rasterio
+    except ImportError as e:
+        raise ImportError("讀取 GeoTIFF 需要安裝 rasterio，或先轉成 .npy") from e
+    with rasterio.open(path) as src:
+        return src.read(1)
+
+
+def find_band(scene, band):
+    for suffix in (".npy", ".tif", ".tiff"):
+        path = Path(scene) / f"{band}{suffix}"
+        if path.exists():
+            return path
+    raise FileNotFoundError(f"{scene} 缺少波段 {band}")
+
+
+def load_scenes(directory, bands=BANDS):
+    scenes = sorted(p for p in Path(directory).iterdir() if p.is_dir())
+    if not scenes:
+        raise FileNotFoundError(f"{directory} 中沒有影像，請先執行 download")
+    loaded = {band: [load_band(find_band(s, band)) for s in scenes] for band in bands}
+    if all((s / f"{VALID_BAND}.npy").exists() for s in scenes):
+        loaded[VALID_BAND] = [load_band(s / f"{VALID_BAND}.npy") for s in scenes]
+    shapes = {a.shape for arrays in loaded.values() for a in arrays}
+    if len(shapes) > 1:
+        raise ValueError(f"{directory} 中的影像大小不一致 {sorted(shapes)}，請刪除後重新下載")
+    return loaded
+
+
+# --- 與 Earth Engine 相同的公式 ---
+def apply_scale_factors(band, values):
+    values = np.asarray(values, dtype=np.float32)
+    if band.startswith('SR_B'):
+        return values * np.float32(0.0000275) + np.float32(-0.2)
+    if band.startswith('ST_B'):
+        return values * np.float32(0.00341802) + np.float32(149.0)
+    return values
+
+
+def cloud_mask(qa, valid=None):
+    # EE 端的填充像素 (QA_PIXEL 第 0 位元) 與影像遮罩外的像素本來就被遮罩，
+    # 本機也要排除，否則 SR=0 (縮放後為 -0.2) 會進入中位數
+    qa = np.asarray(qa).astype(np.uint16, copy=False)
+    fill_bitmask = (1 << 0)
+    cloud_shadow_bitmask = (1 << 3)
+    cloud_bitmask = (1 << 5)
+    mask = ((qa & fill_bitmask) == 0) & ((qa & cloud_shadow_bitmask) == 0) & ((qa & cloud_bitmask) == 0)
+    if valid is not None:
+        mask &= np.asarray(valid) != 0
+    return mask
+
+
+def median_composite(scenes, masks):
+    # 被遮罩的像素設為 NaN，逐像素取中位數；全被遮罩的像素保持 NaN (相當於 EE 的遮罩)
+    stack = np.stack([np.where(m, s, np.nan) for s, m in zip(scenes, masks)])
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return np.nanmedian(stack, axis=0)
+
+
+def normalized_difference(a, b):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (a - b) / (a + b)
+
+
+def fraction_vegetation(ndvi, ndvi_min, ndvi_max):
+    return ((ndvi - ndvi_min) / (ndvi_max - ndvi_min)) ** 2
+
+
+def emissivity(fv):
+    return fv * 0.004 + 0.986
+
+
+def land_surface_temperature(tb, em):
+    # '(TB / (1 + (0.00115 * (TB / 1.438)) * log(em))) - 273.15'
+    return (tb / (1 + (0.00115 * (tb / 1.438)) * np.log(em))) - 273.15
+
+
+@dataclass
+class LocalLSTResult:
+    composite: dict
+    ndvi: np.ndarray
+    fv: np.ndarray
+    em: np.ndarray
+    lst: np.ndarray
+    ndvi_min: float
+    ndvi_max: float
+
+
+def build_lst_local(bands):
+    valid = bands.get(VALID_BAND) or [None] * len(bands['QA_PIXEL'])
+    masks = [cloud_mask(qa, v) for qa, v in zip(bands['QA_PIXEL'], valid)]
+    composite = {
+        band: median_composite([apply_scale_factors(band, s) for s in scenes], masks)
+        for band, scenes in bands.items()
+        if band not in ('QA_PIXEL', VALID_BAND)
+    }
+    ndvi = normalized_difference(composite['SR_B5'], composite['SR_B4'])
+    ndvi_min = float(np.nanmin(ndvi))
+    ndvi_max = float(np.nanmax(ndvi))
+    fv = fraction_vegetation(ndvi, ndvi_min, ndvi_max)
+    em = emissivity(fv)
+    lst = land_surface_temperature(composite['ST_B10'], em)
+    return LocalLSTResult(composite, ndvi, fv, em, lst, ndvi_min, ndvi_max)
+
+
+def local_stats(result):
+    # 與 stsp.heat_island.stats_graph 相同的鍵，兩種後端可互換
+    return {
+        "NDVI_min": result.ndvi_min,
+        "NDVI_max": result.ndvi_max,
+        "LST_min": float(np.nanmin(result.lst)),
+        "LST_max": float(np.nanmax(result.lst)),
+        "LST_mean": float(np.nanmean(result.lst)),
+    }
+
+
+# --- 一次性下載 ---
+def scene_dir_for(start_date, end_date):
+    return SCENE_DIR / f"{start_date}_{end_date}"
+
+
+def download_scenes(start_date, end_date, coordinates=AOI_COORDS, directory=None, scale=30):
+    import ee
+    from stsp.change import pixel_grid
+    from stsp.lst import LANDSAT8_COLLECTION
+
+    aoi = ee.Geometry.Rectangle(list(coordinates))
+    collection = (ee.ImageCollection(LANDSAT8_COLLECTION)
+                  .filterBounds(aoi)
+                  .filterDate(start_date, end_date))
+    directory = Path(directory or scene_dir_for(start_date, end_date))
+    # 所有影像都下載到同一個像素網格 (與 stsp.change 相同)，各景陣列大小一致才能逐像素疊合
+    grid = pixel_grid(coordinates, scale)
+    west, _, _, north = grid.bbox
+    saved = []
+    for scene_id in collection.aggregate_array('system:index').getInfo():
+        scene_dir = directory / scene_id
+        if scene_dir.exists():
+            continue
+        image = ee.Image(f"{LANDSAT8_COLLECTION}/{scene_id}").select(BANDS)
+        image = image.addBands(image.mask().reduce(ee.Reducer.min()).rename(VALID_BAND)).unmask(0)
+        url = download_url(image, {
+            'format': 'NPY',
+            'crs': 'EPSG:4326',
+            'crs_transform': [grid.dlon, 0, west, 0, -grid.dlat, north],
+            'dimensions': f"{grid.cols}x{grid.rows}",
+        })
+        with urllib.request.urlopen(url) as resp:
+            data = np.load(io.BytesIO(resp.read()))
+        scene_dir.mkdir(parents=True, exist_ok=True)
+        # NPY 格式為結構化陣列，每個欄位是一個波段
+        for band in [*BANDS, VALID_BAND]:
+            np.save(scene_dir / f"{band}.npy", np.asarray(data[band])[:grid.rows, :grid.cols])
+        saved.append(scene_id)
+    return saved
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="本機 NumPy 版 LST 計算")
+    sub = parser.add_subparsers(dest="command", required=True)
+    dl = sub.add_parser("download", help="下載 AOI 內的 Landsat 8 波段 (需 Earth Engine 憑證)")
+    dl.add_argument("start")
+    dl.add_argument("end")
+    stats = sub.add_parser("stats", help="以本機波段計算 NDVI / LST 統計值")
+    stats.add_argument("start")
+    stats.add_argument("end")
+    args = parser.parse_args(argv)
+
+    if args.command == "download":
+        import ee
+        ee.Initialize()
+        saved = download_scenes(args.start, args.end)
+        print(f"downloaded {len(saved)} scenes to {scene_dir_for(args.start, args.end)}")
+    else:
+        bands = load_scenes(scene_dir_for(args.start, args.end))
+        print(local_stats(build_lst_local(bands)))
+
+
+if __name__ == "__main__":
+    main()
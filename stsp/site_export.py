@@ -0,0 +1,382 @@
+import argparse
+import html
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from pathlib import Path
+
+from stsp.ee_cache import graph_key, map_url
+from stsp.tile_proxy import PREFETCH_BBOXES, TileStore, fetch_url, tiles_for_bbox
+
+# --- 靜態網站輸出 ---
+# NDVI_my_map.html 是 1.7 MB 的 ipywidgets 狀態傾印，開啟時還要從 CDN 載入 require.js 與
+# widget manager；各頁面則在每次觀看時都需要 Earth Engine 憑證。這裡把各頁面預先算好：
+#   - 地圖圖層輸出成 tiles/<圖層>/{z}/{x}/{y}.png 圖磚金字塔 (經 tile_proxy 的 MBTiles 快取，
+#     全透明的圖磚不輸出)，以一支輕量的 Leaflet viewer.js 顯示
+#   - 統計數字直接寫進 HTML
+#   - 土地覆蓋縮圖與 timelapse 存成圖片檔
+# 輸出的資料夾可直接放到任何靜態主機，觀看時完全不經過 Earth Engine。
+#
+#   python -m stsp.site_export --out site
+
+SITE_DIR = Path("site")
+EXPORT_ZOOMS = range(11, 16)
+MAX_WORKERS = 8
+LEAFLET = "https://unpkg.com/leaflet@1.9.4/dist/leaflet"
+SIDE_BY_SIDE = "https://unpkg.com/leaflet-side-by-side@2.2.0/leaflet-side-by-side.min.js"
+BASEMAP = "https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png"
+
+PAGES = [
+    ("heat_island.html", "南科周圍都市熱區"),
+    ("split_map.html", "南科 1994 vs 2024 衛星影像變遷比較"),
+    ("landcover.html", "南部科技園區土地使用分類"),
+    ("timelapse.html", "南科 Timelapse"),
+]
+
+# 讀取頁面中 <script type="application/json" class="stsp-map"> 的設定並建立地圖
+VIEWER_JS = """
+document.querySelectorAll('script.stsp-map').forEach(function (node) {
+  var spec = JSON.parse(node.textContent);
+  var el = document.getElementById(spec.id);
+  var map = L.map(el).fitBounds(spec.bounds);
+  L.tileLayer(spec.basemap, {attribution: '&copy; OpenStreetMap', maxZoom: 19}).addTo(map);
+  var overlays = {};
+  var tiles = spec.layers.map(function (layer) {
+    var t = L.tileLayer(layer.url, {
+      minZoom: spec.minZoom, maxNativeZoom: spec.maxZoom, maxZoom: 18,
+      opacity: layer.opacity, bounds: spec.bounds, attribution: 'Google Earth Engine'
+    });
+    if (layer.shown) { t.addTo(map); }
+    overlays[layer.name] = t;
+    return t;
+  });
+  (spec.geojson || []).forEach(function (group) {
+    var g = L.geoJSON(group.data, {
+      style: function (f) { return {color: f.properties.color, weight: 0, fillOpacity: 0.55}; },
+      onEachFeature: function (f, l) { if (f.properties.label) { l.bindTooltip(f.properties.label); } }
+    });
+    if (group.shown) { g.addTo(map); }
+    overlays[group.name] = g;
+  });
+  if (spec.outline) {
+    overlays[spec.outline.name] = L.rectangle(spec.outline.bounds, {color: '#3388ff', weight: 2, fill: false}).addTo(map);
+  }
+  if (spec.split) {
+    L.control.sideBySide(tiles[spec.split[0]].addTo(map), tiles[spec.split[1]].addTo(map)).addTo(map);
+  } else {
+    L.control.layers(null, overlays, {collapsed: false}).addTo(map);
+  }
+});
+"""
+
+STYLE = """
+body { font-family: system-ui, "Noto Sans TC", sans-serif; margin: 0 auto; max-width: 1200px; padding: 1rem 2rem; }
+nav a { margin-right: 1rem; }
+.map { height: 600px; margin: 1rem 0; }
+table { border-collapse: collapse; margin: 1rem 0; }
+th, td { border: 1px solid #ddd; padding: 0.3rem 0.6rem; text-align: right; }
+th:first-child, td:first-child { text-align: left; }
+.grid { display: grid; grid-template-columns: repeat(4, 1fr); gap: 1rem; }
+.grid img { width: 100%; }
+.legend span { display: inline-block; width: 1.2em; height: 1em; margin: 0 0.3em 0 0.8em; vertical-align: middle; }
+footer { color: #888; font-size: 0.85rem; margin-top: 2rem; }
+"""
+
+
+def table_html(rows, digits=2):
+    if not rows:
+        return ""
+
+    def cell(value):
+        if isinstance(value, float):
+            return f"{value:,.{digits}f}"
+        return html.escape("" if value is None else str(value))
+
+    columns = list(rows[0])
+    head = "".join(f"<th>{html.escape(c)}</th>" for c in columns)
+    body = "".join(
+        "<tr>" + "".join(f"<td>{cell(row.get(c))}</td>" for c in columns) + "</tr>"
+        for row in rows
+    )
+    return f"<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>"
+
+
+def bbox_bounds(bbox):
+    west, south, east, north = bbox
+    return [[south, west], [north, east]]
+
+
+def is_blank(data):
+    # Earth Engine 在影像範圍外回傳全透明圖磚；沒有 Pillow 時全部保留
+    try:
+        from PIL import Image
+    except ImportError:
+        return False
+    with Image.open(io.BytesIO(data)) as tile:
+        if tile.mode != "RGBA":
+            return False
+        return tile.getchannel("A").getextrema() == (0, 0)
+
+
+class SiteExporter:
+    def __init__(self, out=SITE_DIR, zooms=EXPORT_ZOOMS, store=None, max_workers=MAX_WORKERS):
+        self.out = Path(out)
+        self.zooms = zooms
+        self.store = store or TileStore()
+        self.max_workers = max_workers
+        self.tile_count = 0
+        self.out.mkdir(parents=True, exist_ok=True)
+
+    def save(self, relpath, data):
+        path = self.out / relpath
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if isinstance(data, str):
+            path.write_text(data, encoding="utf-8")
+        else:
+            path.write_bytes(data)
+        return relpath
+
+    def tile_pyramid(self, image, vis_params, bbox):
+        # 圖層名稱與 maps.ee_tiles 相同 (運算圖雜湊)，已由代理快取的圖磚不會再向 Earth Engine 要
+        layer = graph_key("map", image, vis_params)[:16]
+        self.store.register_layer(layer, map_url(image, vis_params))
+
+        def one(tile):
+            z, x, y = tile
+            path = self.out / "tiles" / layer / str(z) / str(x) / f"{y}.png"
+            if path.exists():
+                return 1
+            data = self.store.get_tile(layer, z, x, y)
+            if data is None or is_blank(data):
+                return 0
+            self.save(path.relative_to(self.out), data)
+            return 1
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            self.tile_count += sum(pool.map(one, tiles_for_bbox(bbox, self.zooms)))
+        return f"tiles/{layer}/{{z}}/{{x}}/{{y}}.png"
+
+    def map_html(self, map_id, bbox, layers, geojson=None, outline=None, split=None):
+        spec = {
+            "id": map_id,
+            "bounds": bbox_bounds(bbox),
+            "basemap": BASEMAP,
+            "minZoom": min(self.zooms),
+            "maxZoom": max(self.zooms),
+            "layers": layers,
+            "geojson": geojson or [],
+            "outline": outline,
+            "split": split,
+        }
+        data = json.dumps(spec, ensure_ascii=False).replace("</", "<\\/")
+        return (f'<div id="{map_id}" class="map"></div>\n'
+                f'<script type="application/json" class="stsp-map">{data}</script>')
+
+    def page(self, filename, title, body, split=False):
+        nav = " ".join(f'<a href="{name}">{html.escape(t)}</a>' for name, t in PAGES)
+        scripts = [f"{LEAFLET}.js"] + ([SIDE_BY_SIDE] if split else []) + ["viewer.js"]
+        script_tags = "\n".join(f'<script src="{src}"></script>' for src in scripts)
+        self.save(filename, f"""<!DOCTYPE html>
+<html lang="zh-Hant">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{html.escape(title)}</title>
+<link rel="stylesheet" href="{LEAFLET}.css">
+<link rel="stylesheet" href="style.css">
+</head>
+<body>
+<nav><a href="index.html">首頁</a> {nav}</nav>
+<h1>{html.escape(title)}</h1>
+{body}
+<footer>預先輸出於 {datetime.now():%Y-%m-%d %H:%M}，資料來源：Google Earth Engine</footer>
+{script_tags}
+</body>
+</html>
+""")
+        return filename
+
+
+# --- 各頁面 ---
+def export_heat_island(site, years=(2015, 2024), cell_m=500):
+    from stsp.heat_island import LAYERS, fetch_stats, make_periods
+    from stsp.lst import build_lst
+    from stsp.maps import HOTSPOT_COLORS, hotspot_label
+    from stsp.zonal import grid_cells, hot_spots, zonal_stats
+
+    bbox = PREFETCH_BBOXES["heat_island"]
+    periods = make_periods(years)
+    stats = fetch_stats(periods, bbox)
+    ready = [p for p in periods if "error" not in stats[p.label]]
+    rows = [
+        {
+            "期間": p.label,
+            "NDVI 最小值": stats[p.label].get("NDVI_min"),
+            "NDVI 最大值": stats[p.label].get("NDVI_max"),
+            "LST 平均 (°C)": stats[p.label].get("LST_mean"),
+            "LST 最低 (°C)": stats[p.label].get("LST_min"),
+            "LST 最高 (°C)": stats[p.label].get("LST_max"),
+        }
+        for p in ready
+    ]
+    results = {p.label: build_lst(p.start, p.end, bbox) for p in ready}
+    layers = [
+        {
+            "name": f"{p.label} {name}",
+            "url": site.tile_pyramid(getattr(results[p.label], attr), vis, bbox),
+            "shown": p == ready[-1] and attr == "lst",
+            "opacity": 1.0,
+        }
+        for p in ready
+        for name, (attr, vis) in LAYERS.items()
+    ]
+
+    # 最後一年的熱點分析以 GeoJSON 寫入頁面
+    geojson = []
+    if ready:
+        cells, shape = grid_cells(bbox, cell_m)
+        zone_rows = hot_spots(zonal_stats(results[ready[-1].label], cells), shape)
+        features = []
+        for row in zone_rows:
+            color = HOTSPOT_COLORS.get(row["hotspot"])
+            if color is None:
+                continue
+            west, south, east, north = row["bbox"]
+            features.append({
+                "type": "Feature",
+                "geometry": {"type": "Polygon", "coordinates": [[
+                    [west, south], [east, south], [east, north], [west, north], [west, south],
+                ]]},
+                "properties": {
+                    "color": color,
+                    "label": hotspot_label(row),
+                },
+            })
+        geojson.append({
+            "name": f"{ready[-1].label} 熱點 (Gi*)",
+            "shown": False,
+            "data": {"type": "FeatureCollection", "features": features},
+        })
+
+    body = (
+        "<p>由 NDVI 估算植被覆蓋率與地表發射率，再以 Landsat 8 熱紅外波段推算地表溫度 (LST)。</p>"
+        "<h2>各年份統計</h2>" + table_html(rows)
+        + site.map_html("heat-map", bbox, layers, geojson,
+                        outline={"name": "AOI - TAINAN", "bounds": bbox_bounds(bbox)})
+    )
+    return site.page("heat_island.html", "南科周圍都市熱區", body)
+
+
+def export_split_map(site, left_year=1994, right_year=2024):
+    from stsp.composites import SENTINEL2_FIRST_YEAR, TRUE_COLOR_VIS, composite
+    from stsp.timelapse import STSP_BBOX
+
+    bbox = PREFETCH_BBOXES["split_map"]
+    layers = []
+    for year in (left_year, right_year):
+        # 與比較頁的預設相同：2017 之後使用 Sentinel-2
+        sensor = "sentinel2" if year >= SENTINEL2_FIRST_YEAR else "landsat"
+        layers.append({
+            "name": f"{year} 真色",
+            "url": site.tile_pyramid(composite(year, STSP_BBOX, sensor=sensor), TRUE_COLOR_VIS, bbox),
+            "shown": False,
+            "opacity": 1.0,
+        })
+    body = (
+        f"<p>左側為 {left_year} 年、右側為 {right_year} 年的去雲中位數合成影像，拖曳中線比較。</p>"
+        + site.map_html("split-map", bbox, layers, split=[0, 1])
+    )
+    return site.page("split_map.html", f"南科 {left_year} vs {right_year} 衛星影像變遷比較", body, split=True)
+
+
+def export_landcover(site, years=(1994, 2004, 2014, 2024),
+                     bbox=(120.205, 22.990, 120.230, 23.020)):
+    from stsp.landcover import (
+        CLASS_NAMES, CLASS_VIS, class_areas, classify_years, fetch_thumbnails, scan_years,
+    )
+
+    available, composites = scan_years(list(years), bbox)
+    thumbnails = fetch_thumbnails(composites, {'min': 0, 'max': 0.3}, bbox)
+    classified = classify_years(composites)
+    class_thumbnails = fetch_thumbnails(classified, CLASS_VIS, bbox, bands=('class',))
+    areas = class_areas(classified, bbox)
+
+    shown = [year for year in years if year in thumbnails]
+    with ThreadPoolExecutor(max_workers=site.max_workers) as pool:
+        images = dict(zip(
+            [(year, kind) for year in shown for kind in ("rgb", "class")],
+            pool.map(fetch_url, [u for year in shown for u in (thumbnails[year], class_thumbnails[year])]),
+        ))
+    cards = []
+    for year in shown:
+        rgb = site.save(f"img/landcover/{year}.png", images[(year, "rgb")])
+        cls = site.save(f"img/landcover/{year}_class.png", images[(year, "class")])
+        cards.append(
+            f'<div><h3>{year} 年</h3>'
+            f'<img src="{rgb}" alt="{year} 真色" loading="lazy"><p>{available[str(year)]} 張影像的中位數合成</p>'
+            f'<img src="{cls}" alt="{year} 分類" loading="lazy"><p>{year} 年土地使用分類</p></div>'
+        )
+    legend = "".join(
+        f'<span style="background:#{color}"></span>{html.escape(name)}'
+        for color, name in zip(CLASS_VIS['palette'], CLASS_NAMES)
+    )
+    rows = [
+        {"類別": name, **{str(year): areas[year].get(name, 0.0) for year in shown}}
+        for name in CLASS_NAMES
+    ]
+    body = (
+        f'<p class="legend">{legend}</p>'
+        f'<div class="grid">{"".join(cards)}</div>'
+        "<h2>各類別面積變化 (公頃)</h2>" + table_html(rows, digits=1)
+    )
+    return site.page("landcover.html", "南部科技園區土地使用分類衛星影像比較", body)
+
+
+def export_timelapse(site, first_year=1984, last_year=None):
+    from stsp.timelapse import make_timelapse
+
+    last_year = last_year or date.today().year - 1
+    data, rendered = make_timelapse(list(range(first_year, last_year + 1)), fmt="webp")
+    if data is None:
+        body = "<p>所選年份沒有可用的影像。</p>"
+    else:
+        src = site.save("img/timelapse.webp", data)
+        body = (f'<img src="{src}" alt="南科 timelapse" style="max-width:100%">'
+                f"<p>{rendered[0]}–{rendered[-1]} 年，每年一格去雲中位數合成影像。</p>")
+    return site.page("timelapse.html", "南科 Timelapse", body)
+
+
+EXPORTERS = {
+    "heat_island": export_heat_island,
+    "split_map": export_split_map,
+    "landcover": export_landcover,
+    "timelapse": export_timelapse,
+}
+
+
+def export_site(out=SITE_DIR, pages=tuple(EXPORTERS), zooms=EXPORT_ZOOMS):
+    site = SiteExporter(out, zooms)
+    site.save("viewer.js", VIEWER_JS)
+    site.save("style.css", STYLE)
+    written = [EXPORTERS[name](site) for name in pages]
+    links = "".join(f'<li><a href="{name}">{html.escape(title)}</a></li>' for name, title in PAGES)
+    site.page("index.html", "南科衛星影像報告", f"<ul>{links}</ul>")
+    return written, site.tile_count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="把各頁面預先輸出成靜態網站")
+    parser.add_argument("--out", default=str(SITE_DIR))
+    parser.add_argument("--pages", nargs="+", choices=list(EXPORTERS), default=list(EXPORTERS))
+    parser.add_argument("--max-zoom", type=int, default=max(EXPORT_ZOOMS))
+    args = parser.parse_args(argv)
+
+    import ee
+    ee.Initialize()
+    written, tiles = export_site(Path(args.out), args.pages, range(min(EXPORT_ZOOMS), args.max_zoom + 1))
+    print(f"wrote {len(written)} pages and {tiles} tiles to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
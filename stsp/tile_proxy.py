@@ -0,0 +1,237 @@
+import argparse
+import math
+import os
+import sqlite3
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from stsp.ee_cache import CACHE_DIR
+
+# --- 本機圖磚快取代理 ---
+# 地圖每次平移、縮放都會直接向 Earth Engine 取圖磚。這裡提供一個本機 HTTP 代理：
+# 頁面把 Earth Engine 圖層登記到 SQLite (MBTiles 格式的 tiles 資料表)，
+# 地圖改向代理要圖磚，未命中時才向上游取得並寫入，之後的觀看者不再打到 Earth Engine。
+#
+#   python -m stsp.tile_proxy serve --port 8765
+#   python -m stsp.tile_proxy prefetch
+#
+# 頁面端設定 STSP_TILE_PROXY_URL (瀏覽器可連到的代理網址) 後才會改走代理；
+# 另外設定 STSP_TILE_PROXY_PORT 則由 Streamlit 行程自行啟動代理，預設只綁定 127.0.0.1；
+# 需要讓其他機器連線時再以 STSP_TILE_PROXY_HOST 指定 (例如 0.0.0.0)。
+
+TILE_DB = CACHE_DIR / "tiles.mbtiles"
+PROXY_URL = os.environ.get("STSP_TILE_PROXY_URL")
+PROXY_PORT = os.environ.get("STSP_TILE_PROXY_PORT")
+PROXY_HOST = os.environ.get("STSP_TILE_PROXY_HOST", "127.0.0.1")
+
+# 各頁面固定的 AOI (west, south, east, north)
+PREFETCH_BBOXES = {
+    # 衛星影像變遷比較頁：center_point.buffer(3000)，中心 [120.271552, 23.106393]
+    "split_map": (120.242254, 23.079443, 120.300850, 23.133343),
+    # 都市熱區頁：aoi_coords
+    "heat_island": (120.265429, 23.057127, 120.362146, 23.115991),
+}
+PREFETCH_ZOOMS = range(12, 16)
+
+
+def fetch_url(url, timeout=30):
+    with urllib.request.urlopen(url, timeout=timeout) as resp:
+        return resp.read()
+
+
+# --- 圖磚座標 ---
+def lonlat_to_tile(lon, lat, zoom):
+    n = 2 ** zoom
+    x = int((lon + 180.0) / 360.0 * n)
+    lat_rad = math.radians(lat)
+    y = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tiles_for_bbox(bbox, zooms):
+    west, south, east, north = bbox
+    for z in zooms:
+        x0, y0 = lonlat_to_tile(west, north, z)
+        x1, y1 = lonlat_to_tile(east, south, z)
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                yield z, x, y
+
+
+class TileStore:
+    def __init__(self, path=TILE_DB, fetcher=fetch_url):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.fetcher = fetcher
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS layers ("
+                " name TEXT PRIMARY KEY, url_template TEXT NOT NULL, updated REAL NOT NULL)"
+            )
+            # MBTiles 規格的欄位，tile_row 為 TMS (南方為 0)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tiles ("
+                " layer TEXT NOT NULL, zoom_level INTEGER, tile_column INTEGER,"
+                " tile_row INTEGER, tile_data BLOB, fetched REAL,"
+                " PRIMARY KEY (layer, zoom_level, tile_column, tile_row))"
+            )
+
+    def _conn(self):
+        # sqlite 連線不能跨執行緒共用，每個執行緒各開一條
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            self._local.conn = conn
+        return conn
+
+    def register_layer(self, name, url_template):
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO layers VALUES (?, ?, ?)",
+                (name, url_template, time.time()),
+            )
+
+    def layers(self):
+        return dict(self._conn().execute("SELECT name, url_template FROM layers"))
+
+    def get_tile(self, layer, z, x, y):
+        tms_y = (2 ** z) - 1 - y
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT tile_data FROM tiles WHERE layer = ? AND zoom_level = ?"
+            " AND tile_column = ? AND tile_row = ?",
+            (layer, z, x, tms_y),
+        ).fetchone()
+        if row is not None:
+            self.hits += 1
+            return row[0]
+
+        template = conn.execute(
+            "SELECT url_template FROM layers WHERE name = ?", (layer,)
+        ).fetchone()
+        if template is None:
+            return None
+        self.misses += 1
+        data = self.fetcher(template[0].format(z=z, x=x, y=y))
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?, ?, ?)",
+                (layer, z, x, tms_y, data, time.time()),
+            )
+        return data
+
+    def prefetch(self, layer, bbox, zooms=PREFETCH_ZOOMS, max_workers=8):
+        tiles = list(tiles_for_bbox(bbox, zooms))
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            list(pool.map(lambda t: self.get_tile(layer, *t), tiles))
+        return len(tiles)
+
+
+# --- HTTP 代理 ---
+class TileHandler(BaseHTTPRequestHandler):
+    store = None
+
+    def do_GET(self):
+        # /tiles/<layer>/<z>/<x>/<y>
+        parts = self.path.strip("/").split("?")[0].split("/")
+        if len(parts) != 5 or parts[0] != "tiles":
+            self.send_error(404)
+            return
+        try:
+            z, x, y = (int(p.split(".")[0]) for p in parts[2:])
+            data = self.store.get_tile(parts[1], z, x, y)
+        except ValueError:
+            self.send_error(400)
+            return
+        except Exception as e:
+            self.send_error(502, str(e))
+            return
+        if data is None:
+            self.send_error(404, "unknown layer")
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Cache-Control", "public, max-age=86400")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(store, host="127.0.0.1", port=8765):
+    handler = type("BoundTileHandler", (TileHandler,), {"store": store})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+# --- 行程內共用的圖磚庫與代理 ---
+# 每個圖層各建一個 TileStore 會重跑建表 SQL，並讓每個執行緒多開一條連線
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_store():
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = TileStore()
+        return _default
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def ensure_server(port=None, host=None):
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = make_server(default_store(), host or PROXY_HOST, int(port or PROXY_PORT))
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+        return _server
+
+
+def proxied_url(layer):
+    return f"{PROXY_URL.rstrip('/')}/tiles/{layer}/{{z}}/{{x}}/{{y}}"
+
+
+def prefetch_all(store, bboxes=PREFETCH_BBOXES, zooms=PREFETCH_ZOOMS, max_workers=8):
+    counts = {}
+    for layer in store.layers():
+        counts[layer] = sum(
+            store.prefetch(layer, bbox, zooms, max_workers) for bbox in bboxes.values()
+        )
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="南科地圖圖磚快取代理")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="啟動圖磚代理")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    warm = sub.add_parser("prefetch", help="預先取得固定 AOI 在 z12–15 的所有已登記圖層圖磚")
+    warm.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    store = TileStore()
+    if args.command == "serve":
+        print(f"tile proxy on http://{args.host}:{args.port}/tiles/<layer>/<z>/<x>/<y>")
+        make_server(store, args.host, args.port).serve_forever()
+    else:
+        for layer, count in prefetch_all(store, max_workers=args.workers).items():
+            print(f"{layer}: {count} tiles")
+        print(f"fetched {store.misses}, already cached {store.hits}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import hashlib
+import io
+import json
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import ee
+
+from stsp.composites import SENSORS, composite
+from stsp.ee_cache import CACHE_DIR, thumb_url
+
+# --- 南科 timelapse 產生器 ---
+# 原本頁面只能顯示在 App 外手工做好的 GIF / PNG。這裡使用 stsp.composites 的年度合成影像
+# (Landsat 5 / 7 / 8 / 9 與 Sentinel-2)，每一格以 getThumbURL 平行取得並各自快取在磁碟，
+# 新增一年只需要多算一格；最後組成動態 WebP 或 MP4。
+
+FRAME_DIR = CACHE_DIR / "frames"
+# 涵蓋南科園區與周圍都市熱區的範圍 (west, south, east, north)
+STSP_BBOX = (120.22, 23.05, 120.37, 23.14)
+MAX_WORKERS = 6
+# 當年的影像仍會增加，當年度的影格只保留一天
+CURRENT_YEAR_TTL = 24 * 3600
+
+
+def annual_composite(year, bbox=STSP_BBOX, sensor="landsat"):
+    return composite(year, bbox, "全年", sensor)
+
+
+def frame_key(year, bbox, sensor, dimensions, vis_params):
+    payload = json.dumps([year, list(bbox), sensor, dimensions, vis_params], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def render_frame(year, bbox=STSP_BBOX, sensor="landsat", dimensions=768, vis_params=None):
+    vis_params = vis_params or {'min': 0.0, 'max': 0.3, 'gamma': 1.2}
+    path = FRAME_DIR / f"{frame_key(year, bbox, sensor, dimensions, vis_params)}.png"
+    fresh = path.exists() and (
+        year < date.today().year or time.time() - path.stat().st_mtime < CURRENT_YEAR_TTL
+    )
+    if fresh:
+        return path
+
+    image = annual_composite(year, bbox, sensor).visualize(
+        bands=['red', 'green', 'blue'], **vis_params
+    )
+    url = thumb_url(image, {
+        'region': ee.Geometry.Rectangle(list(bbox)),
+        'dimensions': dimensions,
+        'format': 'png',
+    })
+    with urllib.request.urlopen(url, timeout=120) as resp:
+        data = resp.read()
+    FRAME_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_bytes(data)
+    tmp.replace(path)
+    return path
+
+
+def render_frames(years, bbox=STSP_BBOX, sensor="landsat", dimensions=768,
+                  vis_params=None, max_workers=MAX_WORKERS):
+    def one(year):
+        try:
+            return year, render_frame(year, bbox, sensor, dimensions, vis_params)
+        except ee.EEException:
+            # 該年沒有可用影像 (例如雲量過多)，略過這一格；
+            # 驗證、配額與網路錯誤不是「沒有影像」，照常拋出
+            return year, None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return [(y, p) for y, p in pool.map(one, years) if p is not None]
+
+
+def labelled(path, year):
+    from PIL import Image, ImageDraw, ImageFont
+
+    frame = Image.open(path).convert("RGB")
+    draw = ImageDraw.Draw(frame)
+    size = max(frame.width // 20, 12)
+    try:
+        font = ImageFont.load_default(size=size)
+    except TypeError:
+        # Pillow < 10.1 的預設字型無法指定大小
+        font = ImageFont.load_default()
+    draw.rectangle([0, 0, size * 3, int(size * 1.5)], fill=(0, 0, 0))
+    draw.text((size // 4, size // 4), str(year), fill=(255, 255, 255), font=font)
+    return frame
+
+
+def encode_webp(frames, fps=2):
+    buf = io.BytesIO()
+    frames[0].save(buf, format="WEBP", save_all=True, append_images=frames[1:],
+                   duration=int(1000 / fps), loop=0, quality=80)
+    return buf.getvalue()
+
+
+def encode_mp4(frames, fps=2):
+    import imageio.v3 as iio
+    import numpy as np
+
+    # H.264 需要偶數寬高
+    w, h = frames[0].width // 2 * 2, frames[0].height // 2 * 2
+    stack = np.stack([np.asarray(f.crop((0, 0, w, h))) for f in frames])
+    return iio.imwrite("<bytes>", stack, extension=".mp4", fps=fps, codec="libx264")
+
+
+def make_timelapse(years, bbox=STSP_BBOX, sensor="landsat", dimensions=768,
+                   fmt="webp", fps=2, vis_params=None):
+    rendered = render_frames(years, bbox, sensor, dimensions, vis_params)
+    if not rendered:
+        return None, []
+    frames = [labelled(path, year) for year, path in rendered]
+    encode = encode_mp4 if fmt == "mp4" else encode_webp
+    return encode(frames, fps), [year for year, _ in rendered]
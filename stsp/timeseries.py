@@ -0,0 +1,188 @@
+import json
+import sqlite3
+import threading
+import time
+from datetime import date
+
+import ee
+
+from stsp.composites import FIRST_YEAR, collection, sensors_for
+from stsp.ee_cache import CACHE_DIR, get_info
+from stsp.lst import derive_lst, ndvi_range
+
+# --- AOI 的 NDVI / LST 月時間序列 ---
+# 每個月各送一次 getInfo 會是數百到數千次往返。這裡把整段期間的影像依月份分組，
+# 以 ee.List.map 在伺服器端對每個月份做中位數合成、套用與熱區頁相同的 LST 流程
+# (stsp.lst.derive_lst) 並求 AOI 平均，最後以 reduceColumns 把所有月份打包成一個清單，
+# 一次取回。
+#
+# 結果逐月存在本機 SQLite：過去的月份不會再變，重新整理時只查詢缺少的月份
+# 與最近 REFRESH_MONTHS 個月 (可能仍有新影像進來)。
+
+SERIES_DB = CACHE_DIR / "timeseries.sqlite"
+# 時間序列只需要 AOI 平均，以 90 m 計算即可，減少伺服器端運算量
+SERIES_SCALE = 90
+REFRESH_MONTHS = 3
+REFRESH_AFTER = 24 * 3600
+COLUMNS = ['month', 'NDVI', 'LST', 'images']
+# reduceColumns 會丟掉任一欄位為 null 的 feature；整個 AOI 被雲遮住的月份改填此值，
+# 才能保留該月的影像數 (取回後再轉回 None)
+NO_DATA = -9999
+# 月份有影像但 AOI 全被雲遮住時 NDVI 極值為 null，FV 改用此範圍以免整批運算失敗；
+# 此時沒有有效像素，平均值仍是 null (NO_DATA)，這組預設值不會出現在結果中
+DEFAULT_NDVI_RANGE = {'NDVI_min': 0, 'NDVI_max': 1}
+
+
+def month_range(first, last):
+    # first / last 為 (年, 月)，回傳 "YYYY-MM" 清單 (含頭尾)
+    (y, m), months = first, []
+    while (y, m) <= last:
+        months.append(f"{y:04d}-{m:02d}")
+        y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+    return months
+
+
+def or_default(value, default):
+    return ee.Algorithms.If(ee.Algorithms.IsEqual(value, None), default, value)
+
+
+def or_no_data(value):
+    return or_default(value, NO_DATA)
+
+
+def safe_ndvi_range(composite, aoi, scale):
+    extremes = ndvi_range(composite.normalizedDifference(['nir', 'red']).rename('NDVI'), aoi, scale)
+    return ee.Dictionary({k: or_default(extremes.get(k), v) for k, v in DEFAULT_NDVI_RANGE.items()})
+
+
+def monthly_series(images, aoi, scale=SERIES_SCALE, months=None):
+    images = images.map(lambda image: image.set('month', image.date().format('YYYY-MM')))
+    if months is not None:
+        # 只計算需要的月份，不是整段期間的每一個月
+        images = images.filter(ee.Filter.inList('month', list(months)))
+
+    def one(month):
+        month_images = images.filter(ee.Filter.eq('month', month))
+        composite = month_images.median().clip(aoi)
+        result = derive_lst(aoi, composite, scale, ndvi_stats=safe_ndvi_range(composite, aoi, scale))
+        means = result.ndvi.addBands(result.lst.rename('LST')).reduceRegion(
+            reducer=ee.Reducer.mean(),
+            geometry=aoi,
+            scale=scale,
+            maxPixels=1e9,
+            tileScale=4,
+        )
+        return ee.Feature(None, {
+            'month': month,
+            'NDVI': or_no_data(means.get('NDVI')),
+            'LST': or_no_data(means.get('LST')),
+            'images': month_images.size(),
+        })
+
+    # 只對實際有影像的月份計算
+    return ee.FeatureCollection(images.aggregate_array('month').distinct().map(one))
+
+
+def series_graph(months, bbox, scale=SERIES_SCALE):
+    # 各年份使用的感測器不同 (stsp.composites.sensors_for)，依感測器分段後合併成一個集合
+    aoi = ee.Geometry.Rectangle(list(bbox))
+    groups = {}
+    for month in months:
+        groups.setdefault(sensors_for(int(month[:4])), []).append(month)
+    merged = None
+    for sensors, group in groups.items():
+        start = f"{group[0]}-01"
+        y, m = int(group[-1][:4]), int(group[-1][5:])
+        end = f"{y + 1:04d}-01-01" if m == 12 else f"{y:04d}-{m + 1:02d}-01"
+        part = monthly_series(collection(start, end, tuple(bbox), sensors), aoi, scale, group)
+        merged = part if merged is None else merged.merge(part)
+    return merged.reduceColumns(ee.Reducer.toList(len(COLUMNS)), COLUMNS).get('list')
+
+
+class SeriesStore:
+    def __init__(self, path=SERIES_DB):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS series ("
+                " aoi TEXT NOT NULL, month TEXT NOT NULL,"
+                " ndvi REAL, lst REAL, images INTEGER,"
+                " fetched REAL NOT NULL,"
+                " PRIMARY KEY (aoi, month))"
+            )
+
+    def rows(self, aoi, months):
+        with self._lock:
+            found = self._conn.execute(
+                "SELECT month, ndvi, lst, images, fetched FROM series"
+                " WHERE aoi = ? AND month BETWEEN ? AND ? ORDER BY month",
+                (aoi, months[0], months[-1]),
+            ).fetchall()
+        return {row[0]: row[1:] for row in found}
+
+    def put(self, aoi, rows):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO series VALUES (?, ?, ?, ?, ?, ?)",
+                [(aoi, month, ndvi, lst, images, now) for month, ndvi, lst, images in rows],
+            )
+
+
+def stale_months(months, stored, today=None, refresh_months=REFRESH_MONTHS, refresh_after=REFRESH_AFTER):
+    today = today or date.today()
+    index = today.year * 12 + today.month - 1 - (refresh_months - 1)
+    recent = set(month_range((index // 12, index % 12 + 1), (today.year, today.month)))
+    now = time.time()
+    return [
+        m for m in months
+        if m not in stored or (m in recent and now - stored[m][3] > refresh_after)
+    ]
+
+
+def aoi_key(bbox):
+    return json.dumps([round(v, 6) for v in bbox])
+
+
+def fetch_series(bbox, first_year=FIRST_YEAR, last_year=None, scale=SERIES_SCALE, store=None):
+    today = date.today()
+    last = (today.year, today.month) if last_year is None or last_year >= today.year else (last_year, 12)
+    months = month_range((first_year, 1), last)
+    store = store or SeriesStore()
+    key = aoi_key(bbox) + f"@{scale}"
+    stored = store.rows(key, months)
+    missing = stale_months(months, stored, today)
+    if missing:
+        # 最近的月份仍會變動，磁碟快取只保留數小時
+        fetched = {
+            month: (month, *(None if v == NO_DATA else v for v in (ndvi, lst)), images)
+            for month, ndvi, lst, images in get_info(series_graph(missing, bbox, scale), ttl=6 * 3600)
+        }
+        # 沒有影像的月份也記錄下來，下次不必再查；被雲遮住的月份保留影像數、NDVI / LST 為 None
+        store.put(key, [fetched.get(m, (m, None, None, 0)) for m in missing])
+        stored = store.rows(key, months)
+    return [
+        {"month": m, "NDVI": stored[m][0], "LST": stored[m][1], "images": stored[m][2]}
+        for m in months
+        if m in stored and stored[m][2]
+    ]
+
+
+def annual_means(series):
+    years = {}
+    for row in series:
+        if row["NDVI"] is None or row["LST"] is None:
+            continue
+        years.setdefault(row["month"][:4], []).append(row)
+    return [
+        {
+            "year": year,
+            "NDVI": sum(r["NDVI"] for r in rows) / len(rows),
+            "LST": sum(r["LST"] for r in rows) / len(rows),
+            "months": len(rows),
+        }
+        for year, rows in sorted(years.items())
+    ]
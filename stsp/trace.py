@@ -0,0 +1,159 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+from stsp.ee_cache import CACHE_DIR
+
+# --- Earth Engine 呼叫追蹤 ---
+# 記錄每一次會阻塞的 Earth Engine 呼叫與每一次地圖輸出：耗時、回傳大小、快取命中與否、
+# 由哪個函數呼叫。紀錄保留在記憶體供側邊欄除錯面板顯示，並逐筆附加到 JSONL 檔，
+# 不必接上 profiler 就能取得各頁面、各 AOI 的實際延遲分布。
+
+TRACE_FILE = Path(os.environ.get("STSP_TRACE_FILE", CACHE_DIR / "ee_trace.jsonl"))
+TRACE_ENABLED = os.environ.get("STSP_TRACE", "1") != "0"
+# 超過此大小時輪替為 .1
+MAX_TRACE_BYTES = 20 * 1024 * 1024
+MEMORY_RECORDS = 1000
+PAGES_DIR = Path(__file__).resolve().parent.parent / "pages"
+
+# 這些檔案中的呼叫框架不算「呼叫者」
+_INTERNAL = {
+    str(Path(__file__).with_name(name)) for name in ("trace.py", "ee_cache.py", "maps.py")
+}
+
+_records = deque(maxlen=MEMORY_RECORDS)
+_lock = threading.Lock()
+
+
+def _caller():
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename not in _INTERNAL and "contextlib" not in filename:
+            return f"{Path(filename).stem}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+def _page():
+    # 呼叫堆疊中屬於 app.py 或 pages/ 的那一層即為頁面
+    frame = sys._getframe(2)
+    while frame is not None:
+        path = Path(frame.f_code.co_filename)
+        if path.parent == PAGES_DIR or path == PAGES_DIR.parent / "app.py":
+            return path.stem
+        frame = frame.f_back
+    return None
+
+
+def _session():
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return None
+    ctx = get_script_run_ctx(suppress_warning=True)
+    # 執行緒池中的工作沒有 Streamlit 的執行環境
+    return ctx.session_id if ctx is not None else None
+
+
+def _append(record):
+    with _lock:
+        _records.append(record)
+        if not TRACE_ENABLED:
+            return
+        TRACE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        if TRACE_FILE.exists() and TRACE_FILE.stat().st_size > MAX_TRACE_BYTES:
+            TRACE_FILE.replace(TRACE_FILE.with_suffix(".jsonl.1"))
+        with TRACE_FILE.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+@contextmanager
+def traced(kind, **fields):
+    # with traced("getInfo") as record: ...; record["bytes"] = ...; record["cache"] = "hit"
+    record = {
+        "ts": time.time(),
+        "kind": kind,
+        "caller": _caller(),
+        "session": _session(),
+        "page": _page(),
+        "thread": threading.current_thread().name,
+        **fields,
+    }
+    start = time.perf_counter()
+    try:
+        yield record
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        record["seconds"] = round(time.perf_counter() - start, 4)
+        _append(record)
+
+
+def recent(since=None, session=None):
+    with _lock:
+        records = list(_records)
+    if since is not None:
+        records = [r for r in records if r["ts"] >= since]
+    if session is not None:
+        records = [r for r in records if r["session"] in (session, None)]
+    return records
+
+
+# --- 除錯側邊欄 ---
+BOOTSTRAP_LABELS = {
+    "import_ee": "匯入 ee",
+    "initialize": "ee.Initialize",
+    "import_geemap": "匯入 geemap",
+    "last_rerun": "本次 init_ee",
+}
+
+
+def start_rerun():
+    # 在頁面開頭呼叫，標記本次 rerun 的起點
+    import streamlit as st
+    st.session_state["_stsp_trace_since"] = time.time()
+
+
+def debug_sidebar():
+    import streamlit as st
+
+    enabled = st.query_params.get("debug") == "1" or st.sidebar.checkbox(
+        "顯示 Earth Engine 呼叫紀錄", key="_stsp_trace_panel"
+    )
+    if not enabled:
+        return
+    records = recent(st.session_state.get("_stsp_trace_since"), _session())
+    with st.sidebar.expander("Earth Engine 呼叫紀錄", expanded=True):
+        total = sum(r["seconds"] for r in records if r["kind"] != "map_render")
+        hits = sum(1 for r in records if r.get("cache") == "hit")
+        st.caption(f"{len(records)} 筆，Earth Engine 等待合計 {total:.2f} 秒，快取命中 {hits} 筆")
+        st.dataframe(
+            [
+                {
+                    "種類": r["kind"],
+                    "呼叫者": r["caller"],
+                    "秒": r["seconds"],
+                    "bytes": r.get("bytes"),
+                    "快取": r.get("cache"),
+                    "錯誤": r.get("error"),
+                }
+                for r in records
+            ],
+            width="stretch",
+        )
+        # 行程啟動成本 (stsp.bootstrap)：ee 匯入與初始化只在第一次 rerun 發生
+        from stsp.bootstrap import bootstrap_timings
+        timings = bootstrap_timings()
+        if timings:
+            st.caption("啟動耗時：" + "、".join(
+                f"{BOOTSTRAP_LABELS.get(name, name)} {seconds * 1000:.0f} ms" for name, seconds in timings.items()
+            ))
+        if TRACE_ENABLED:
+            st.caption(f"完整紀錄：{TRACE_FILE}")
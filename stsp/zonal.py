@@ -0,0 +1,174 @@
+import csv
+import io
+import math
+
+import ee
+import numpy as np
+
+from stsp.ee_cache import get_info
+
+# --- 分區統計與熱點分析 ---
+# 把 AOI 切成規則網格，所有網格的 LST / NDVI 平均、最大與百分位數
+# 以一次 reduceRegions 求出 (一個 getInfo)，而不是每個網格各送一次請求；
+# 熱點分析 (Getis-Ord Gi*) 則在本機以向量化 NumPy 計算。
+
+STAT_BANDS = ['LST', 'NDVI']
+PERCENTILES = [50, 90]
+CELL_SIZES = (250, 500, 1000)
+
+
+def grid_cells(coordinates, cell_m=500):
+    west, south, east, north = coordinates
+    mid_lat = math.radians((south + north) / 2)
+    dlat = cell_m / 110574.0
+    dlon = cell_m / (111320.0 * math.cos(mid_lat))
+    rows = max(1, math.ceil((north - south) / dlat))
+    cols = max(1, math.ceil((east - west) / dlon))
+    cells = []
+    for r in range(rows):
+        # 第 0 列在最北邊，與影像陣列的方向一致
+        top = north - r * dlat
+        for c in range(cols):
+            left = west + c * dlon
+            cells.append({
+                "zone": r * cols + c,
+                "row": r,
+                "col": c,
+                "bbox": (left, max(top - dlat, south), min(left + dlon, east), top),
+            })
+    return cells, (rows, cols)
+
+
+def zones_collection(cells):
+    return ee.FeatureCollection([
+        ee.Feature(ee.Geometry.Rectangle(list(cell["bbox"])), {"zone": cell["zone"]})
+        for cell in cells
+    ])
+
+
+def zonal_reducer():
+    return (ee.Reducer.mean()
+            .combine(ee.Reducer.max(), sharedInputs=True)
+            .combine(ee.Reducer.percentile(PERCENTILES), sharedInputs=True))
+
+
+def zonal_graph(result, cells, scale=30):
+    image = result.lst.rename('LST').addBands(result.ndvi.rename('NDVI'))
+    reduced = image.reduceRegions(
+        collection=zones_collection(cells),
+        reducer=zonal_reducer(),
+        scale=scale,
+    )
+    # 只取回屬性，不帶幾何，回傳量與網格數成正比
+    columns = ["zone"] + [
+        f"{band}_{stat}"
+        for band in STAT_BANDS
+        for stat in ["mean", "max"] + [f"p{p}" for p in PERCENTILES]
+    ]
+    return reduced.select(columns, None, False)
+
+
+def rows_from_info(info, cells):
+    by_zone = {f["properties"]["zone"]: f["properties"] for f in info["features"]}
+    return [{**cell, **by_zone.get(cell["zone"], {})} for cell in cells]
+
+
+def zonal_stats(result, cells, scale=30):
+    return rows_from_info(get_info(zonal_graph(result, cells, scale)), cells)
+
+
+# --- Getis-Ord Gi* ---
+def neighbour_sum(values, radius=1):
+    # 以平移相加計算 (2r+1)×(2r+1) 視窗的總和 (含自身)，邊界外視為 0
+    padded = np.pad(values, radius)
+    rows, cols = values.shape
+    total = np.zeros_like(values, dtype=float)
+    for dy in range(2 * radius + 1):
+        for dx in range(2 * radius + 1):
+            total += padded[dy:dy + rows, dx:dx + cols]
+    return total
+
+
+def getis_ord_gi_star(grid, radius=1):
+    # grid 為 2D 陣列，NaN 表示無資料；權重為二元的 queen 鄰接並包含自身
+    valid = ~np.isnan(grid)
+    n = valid.sum()
+    if n < 3:
+        return np.full(grid.shape, np.nan)
+    x = np.where(valid, grid, 0.0)
+    mean = x.sum() / n
+    s = math.sqrt((x[valid] ** 2).sum() / n - mean ** 2)
+    if s == 0:
+        return np.zeros(grid.shape)
+    wx = neighbour_sum(x, radius)
+    w = neighbour_sum(valid.astype(float), radius)
+    # 二元權重下 Σw² = Σw
+    denom = s * np.sqrt((n * w - w ** 2) / (n - 1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = (wx - mean * w) / denom
+    return np.where(valid, z, np.nan)
+
+
+def p_values(z):
+    # 雙尾常態 p 值
+    erfc = np.vectorize(math.erfc, otypes=[float])
+    return np.where(np.isnan(z), np.nan, erfc(np.abs(np.nan_to_num(z)) / math.sqrt(2)))
+
+
+def hotspot_class(z, p):
+    if np.isnan(z) or np.isnan(p):
+        return "無資料"
+    for level, threshold in ((99, 0.01), (95, 0.05), (90, 0.10)):
+        if p < threshold:
+            return f"{'熱點' if z > 0 else '冷點'} {level}%"
+    return "不顯著"
+
+
+def hot_spots(rows, shape, field="LST_mean", radius=1):
+    grid = np.full(shape, np.nan)
+    for row in rows:
+        value = row.get(field)
+        if value is not None:
+            grid[row["row"], row["col"]] = value
+    z = getis_ord_gi_star(grid, radius)
+    p = p_values(z)
+    return [
+        {
+            **row,
+            "gi_z": None if np.isnan(z[row["row"], row["col"]]) else float(z[row["row"], row["col"]]),
+            "gi_p": None if np.isnan(p[row["row"], row["col"]]) else float(p[row["row"], row["col"]]),
+            "hotspot": hotspot_class(z[row["row"], row["col"]], p[row["row"], row["col"]]),
+        }
+        for row in rows
+    ]
+
+
+# --- 匯出 ---
+def flat_rows(rows):
+    out = []
+    for row in rows:
+        flat = {k: v for k, v in row.items() if k != "bbox"}
+        flat["west"], flat["south"], flat["east"], flat["north"] = row["bbox"]
+        out.append(flat)
+    return out
+
+
+def to_csv(rows):
+    rows = flat_rows(rows)
+    buf = io.StringIO()
+    # Earth Engine 不回傳空值屬性，整格被遮住的格子沒有 LST_* / NDVI_* 欄位；
+    # 欄位取所有格子的聯集 (依出現順序)，缺的欄位留空
+    fieldnames = list(dict.fromkeys(k for row in rows for k in row))
+    writer = csv.DictWriter(buf, fieldnames=fieldnames, restval="")
+    writer.writeheader()
+    writer.writerows(rows)
+    # 加上 BOM，Excel 開啟中文欄位才不會亂碼
+    return ("\ufeff" + buf.getvalue()).encode("utf-8")
+
+
+def to_parquet(rows):
+    import pandas as pd
+
+    buf = io.BytesIO()
+    pd.DataFrame(flat_rows(rows)).to_parquet(buf, index=False)
+    return buf.getvalue()